@@ -32,6 +32,9 @@ target_metadata = Base.metadata
 def get_url():
     return settings.DATABASE_URL
 
+# Usar siempre la URL de la aplicación (el .ini solo tiene un valor de ejemplo)
+config.set_main_option("sqlalchemy.url", get_url().replace("%", "%%"))
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = get_url()
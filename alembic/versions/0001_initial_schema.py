@@ -0,0 +1,202 @@
+"""initial schema
+
+Esquema tal como lo creaba Base.metadata.create_all antes de mover el DDL a
+migraciones. En bases de datos existentes basta con `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'users',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('preferences', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('energy_level', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('last_login', sa.DateTime(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.CheckConstraint("energy_level IN ('low', 'medium', 'high')", name='ck_user_energy_level'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+    )
+    op.create_table(
+        'categories',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('color', sa.String(length=7), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'tasks',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('category_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('urgency', sa.String(length=20), nullable=True),
+        sa.Column('impact', sa.String(length=20), nullable=True),
+        sa.Column('estimated_duration', sa.Integer(), nullable=True),
+        sa.Column('deadline', sa.DateTime(), nullable=True),
+        sa.Column('priority_score', sa.Integer(), nullable=True),
+        sa.Column('priority_level', sa.String(length=20), nullable=True),
+        sa.Column('completion_probability', sa.DECIMAL(precision=5, scale=4), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('energy_required', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('actual_duration', sa.Integer(), nullable=True),
+        sa.CheckConstraint("urgency IN ('low', 'medium', 'high')", name='ck_task_urgency'),
+        sa.CheckConstraint("impact IN ('low', 'medium', 'high')", name='ck_task_impact'),
+        sa.CheckConstraint('priority_score >= 1 AND priority_score <= 100', name='ck_task_priority_score'),
+        sa.CheckConstraint("priority_level IN ('low', 'medium', 'high')", name='ck_task_priority_level'),
+        sa.CheckConstraint('completion_probability >= 0 AND completion_probability <= 1', name='ck_task_completion_prob'),
+        sa.CheckConstraint("status IN ('pending', 'in_progress', 'completed', 'archived', 'postponed')", name='ck_task_status'),
+        sa.CheckConstraint("energy_required IN ('low', 'medium', 'high')", name='ck_task_energy_required'),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'task_history',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('task_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('change_type', sa.String(length=50), nullable=False),
+        sa.Column('old_values', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('new_values', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('change_description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'daily_recommendations',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('task_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('recommendation_reason', sa.Text(), nullable=False),
+        sa.Column('confidence_score', sa.DECIMAL(precision=5, scale=4), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('was_completed', sa.Boolean(), nullable=True),
+        sa.Column('completed_on_time', sa.Boolean(), nullable=True),
+        sa.Column('recommendation_date', sa.Date(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.CheckConstraint('confidence_score >= 0 AND confidence_score <= 1', name='ck_recommendation_confidence'),
+        sa.CheckConstraint("status IN ('pending', 'accepted', 'rejected', 'postponed')", name='ck_recommendation_status'),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'energy_logs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('task_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('energy_level', sa.String(length=20), nullable=False),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('logged_at', sa.DateTime(), nullable=True),
+        sa.CheckConstraint("energy_level IN ('low', 'medium', 'high')", name='ck_energy_log_level'),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'ai_models',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('model_type', sa.String(length=50), nullable=False),
+        sa.Column('model_version', sa.String(length=20), nullable=False),
+        sa.Column('model_data', sa.LargeBinary(), nullable=True),
+        sa.Column('feature_weights', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('accuracy_metrics', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('trained_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'ai_feedback',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('task_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('predicted_priority', sa.String(length=20), nullable=True),
+        sa.Column('actual_priority', sa.String(length=20), nullable=True),
+        sa.Column('predicted_completion_probability', sa.DECIMAL(precision=5, scale=4), nullable=True),
+        sa.Column('actual_completed', sa.Boolean(), nullable=True),
+        sa.Column('completed_on_time', sa.Boolean(), nullable=True),
+        sa.Column('feedback_date', sa.DateTime(), nullable=True),
+        sa.Column('used_for_training', sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'task_ml_data',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('task_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('ml_priority_score', sa.DECIMAL(precision=5, scale=4), nullable=True),
+        sa.Column('predicted_completion_time', sa.Integer(), nullable=True),
+        sa.Column('recommended_schedule', sa.String(length=50), nullable=True),
+        sa.Column('features', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'ml_feedback',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('task_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('feedback_type', sa.String(length=50), nullable=True),
+        sa.Column('was_useful', sa.Boolean(), nullable=True),
+        sa.Column('actual_priority', sa.String(length=20), nullable=True),
+        sa.Column('actual_completion_time', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('ml_feedback')
+    op.drop_table('task_ml_data')
+    op.drop_table('ai_feedback')
+    op.drop_table('ai_models')
+    op.drop_table('energy_logs')
+    op.drop_table('daily_recommendations')
+    op.drop_table('task_history')
+    op.drop_table('tasks')
+    op.drop_table('categories')
+    op.drop_table('users')
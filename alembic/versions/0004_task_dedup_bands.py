@@ -0,0 +1,42 @@
+"""task dedup bands
+
+Índice MinHash/LSH por usuario para detectar tareas casi duplicadas.
+Las tareas existentes se indexan con scripts/rebuild_dedup_index.py.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 09:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'task_dedup_bands',
+        sa.Column('task_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('band', sa.SmallInteger(), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('band_hash', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('task_id', 'band'),
+    )
+    op.create_index('ix_task_dedup_bands_user_hash', 'task_dedup_bands', ['user_id', 'band_hash'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_dedup_bands_user_hash', table_name='task_dedup_bands')
+    op.drop_table('task_dedup_bands')
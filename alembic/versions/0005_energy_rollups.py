@@ -0,0 +1,74 @@
+"""energy rollups
+
+Agregados por usuario de energy_logs: distribución por día de la semana y
+hora, y promedios diarios. Se rellenan a partir de los registros existentes.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'energy_rollup_hourly',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('weekday', sa.SmallInteger(), nullable=False),
+        sa.Column('hour', sa.SmallInteger(), nullable=False),
+        sa.Column('low_count', sa.Integer(), nullable=False),
+        sa.Column('medium_count', sa.Integer(), nullable=False),
+        sa.Column('high_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'weekday', 'hour'),
+    )
+    op.create_table(
+        'energy_rollup_daily',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('log_count', sa.Integer(), nullable=False),
+        sa.Column('energy_sum', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'day'),
+    )
+
+    op.execute("""
+        INSERT INTO energy_rollup_hourly (user_id, weekday, hour, low_count, medium_count, high_count)
+        SELECT user_id,
+               EXTRACT(ISODOW FROM logged_at)::int - 1,
+               EXTRACT(HOUR FROM logged_at)::int,
+               COUNT(*) FILTER (WHERE energy_level = 'low'),
+               COUNT(*) FILTER (WHERE energy_level = 'medium'),
+               COUNT(*) FILTER (WHERE energy_level = 'high')
+        FROM energy_logs
+        WHERE logged_at IS NOT NULL
+        GROUP BY 1, 2, 3
+    """)
+    op.execute("""
+        INSERT INTO energy_rollup_daily (user_id, day, log_count, energy_sum)
+        SELECT user_id,
+               logged_at::date,
+               COUNT(*),
+               SUM(CASE energy_level WHEN 'low' THEN 1 WHEN 'medium' THEN 2 ELSE 3 END)
+        FROM energy_logs
+        WHERE logged_at IS NOT NULL
+        GROUP BY 1, 2
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('energy_rollup_daily')
+    op.drop_table('energy_rollup_hourly')
@@ -0,0 +1,33 @@
+"""daily recommendations user/date index
+
+Índice para la generación diaria por lotes (omitir usuarios que ya tienen
+recomendaciones para la fecha) y para los listados por rango de fechas.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 11:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_daily_recommendations_user_date', 'daily_recommendations',
+        ['user_id', 'recommendation_date']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_daily_recommendations_user_date', table_name='daily_recommendations')
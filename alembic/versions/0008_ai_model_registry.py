@@ -0,0 +1,42 @@
+"""ai model registry
+
+Hash de contenido para deduplicar binarios, índice parcial para la búsqueda
+del modelo activo e índice para aplicar la retención por usuario y tipo.
+Las versiones antiguas se borran con scripts/compact_models.py.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 13:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ai_models', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.execute(
+        "UPDATE ai_models SET content_hash = encode(sha256(model_data), 'hex') "
+        "WHERE model_data IS NOT NULL"
+    )
+    op.create_index(
+        'ix_ai_models_active', 'ai_models', ['user_id', 'model_type', 'trained_at'],
+        postgresql_where=sa.text('is_active')
+    )
+    op.create_index('ix_ai_models_user_type_trained', 'ai_models', ['user_id', 'model_type', 'trained_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ai_models_user_type_trained', table_name='ai_models')
+    op.drop_index('ix_ai_models_active', table_name='ai_models')
+    op.drop_column('ai_models', 'content_hash')
@@ -0,0 +1,50 @@
+"""task training sample key
+
+Clave del muestreo ponderado por recencia de las tareas completadas e índices
+parciales para la ventana de entrenamiento.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 16:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, Sequence[str], None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Vida media por defecto (TRAINING_HALF_LIFE_DAYS); misma fórmula que training_window.clave_muestreo
+HALF_LIFE_DAYS = 90
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('training_sample_key', sa.Float(), nullable=True))
+    op.execute(
+        "UPDATE tasks SET training_sample_key = "
+        "extract(epoch FROM coalesce(completed_at, updated_at, created_at, now())) / 86400 "
+        f"* ln(2) / {HALF_LIFE_DAYS} "
+        "- ln(-ln(least(greatest(random(), 1e-12), 1 - 1e-12))) "
+        "WHERE status = 'completed'"
+    )
+    op.create_index(
+        'ix_tasks_user_completed', 'tasks', ['user_id', 'completed_at'],
+        postgresql_where=sa.text("status = 'completed'")
+    )
+    op.create_index(
+        'ix_tasks_user_training_sample', 'tasks', ['user_id', 'training_sample_key'],
+        postgresql_where=sa.text("status = 'completed'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_user_training_sample', table_name='tasks')
+    op.drop_index('ix_tasks_user_completed', table_name='tasks')
+    op.drop_column('tasks', 'training_sample_key')
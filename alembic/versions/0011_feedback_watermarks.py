@@ -0,0 +1,59 @@
+"""feedback watermarks
+
+Marca de agua del feedback consumido por usuario, prioridad real consolidada en
+task_ml_data (una fila por tarea) e índices para leer solo el feedback nuevo.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, Sequence[str], None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'feedback_watermarks',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('ml_feedback_at', sa.DateTime(), nullable=True),
+        sa.Column('consumed_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+    op.add_column('task_ml_data', sa.Column('actual_priority', sa.String(length=20), nullable=True))
+    op.add_column('task_ml_data', sa.Column('actual_priority_at', sa.DateTime(), nullable=True))
+    # Una fila por tarea: se conserva la más reciente
+    op.execute(
+        "DELETE FROM task_ml_data a USING task_ml_data b "
+        "WHERE a.task_id = b.task_id AND (coalesce(a.updated_at, '-infinity'), a.id) "
+        "< (coalesce(b.updated_at, '-infinity'), b.id)"
+    )
+    op.create_unique_constraint('uq_task_ml_data_task', 'task_ml_data', ['task_id'])
+
+    op.create_index('ix_ml_feedback_user_created', 'ml_feedback', ['user_id', 'created_at'])
+    op.create_index(
+        'ix_ai_feedback_user_unused', 'ai_feedback', ['user_id'],
+        postgresql_where=sa.text('used_for_training IS NOT TRUE')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ai_feedback_user_unused', table_name='ai_feedback')
+    op.drop_index('ix_ml_feedback_user_created', table_name='ml_feedback')
+    op.drop_constraint('uq_task_ml_data_task', 'task_ml_data', type_='unique')
+    op.drop_column('task_ml_data', 'actual_priority_at')
+    op.drop_column('task_ml_data', 'actual_priority')
+    op.drop_table('feedback_watermarks')
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
@@ -7,26 +7,36 @@ from app.database import get_db
 from app.models.database_models import Category
 from app.models.pydantic_models import CategoryCreate, CategoryResponse
 from app.security.auth import get_current_active_user
+from app.utils.dependencies import get_read_db
+from app.services.collection_versions import check_collection_etag, etag_headers
+from app.utils.responses import FastJSONResponse, columns_for, rows_as_dicts
 
 router = APIRouter()
 
+CATEGORY_LIST_COLUMNS = columns_for(Category, CategoryResponse)
+
 @router.get("/", response_model=List[CategoryResponse])
 def get_categories(
+    request: Request,
     skip: int = 0, 
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_active_user)
 ):
     """Obtener categorías del usuario actual"""
-    categories = db.query(Category).filter(
+    etag, not_modified = check_collection_etag(request, db, current_user.id, ["categories"])
+    if not_modified:
+        return not_modified
+    
+    categories = db.query(*CATEGORY_LIST_COLUMNS).filter(
         Category.user_id == current_user.id
     ).offset(skip).limit(limit).all()
-    return categories
+    return FastJSONResponse(rows_as_dicts(categories), headers=etag_headers(etag))
 
 @router.get("/{category_id}", response_model=CategoryResponse)
 def get_category(
     category_id: UUID, 
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_active_user)
 ):
     """Obtener una categoría específica por ID"""
@@ -6,11 +6,16 @@ from datetime import datetime, date
 
 from app.database import get_db
 from app.models.database_models import EnergyLog, Task
-from app.models.pydantic_models import EnergyLogCreate, EnergyLogResponse
+from app.models.pydantic_models import EnergyLogCreate, EnergyLogResponse, EnergySummaryResponse
 from app.security.auth import get_current_active_user
+from app.utils.dependencies import get_read_db
+from app.services.energy_service import EnergyRollupService
+from app.utils.responses import FastJSONResponse, columns_for, rows_as_dicts
 
 router = APIRouter()
 
+ENERGY_LOG_LIST_COLUMNS = columns_for(EnergyLog, EnergyLogResponse)
+
 @router.get("/", response_model=List[EnergyLogResponse])
 def get_energy_logs(
     start_date: Optional[date] = None,
@@ -18,11 +23,11 @@ def get_energy_logs(
     task_id: Optional[UUID] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_active_user)
 ):
     """Obtener logs de energía del usuario actual"""
-    query = db.query(EnergyLog).filter(EnergyLog.user_id == current_user.id)
+    query = db.query(*ENERGY_LOG_LIST_COLUMNS).filter(EnergyLog.user_id == current_user.id)
     
     if start_date:
         query = query.filter(EnergyLog.logged_at >= start_date)
@@ -33,12 +38,22 @@ def get_energy_logs(
         query = query.filter(EnergyLog.task_id == task_id)
     
     logs = query.order_by(EnergyLog.logged_at.desc()).offset(skip).limit(limit).all()
-    return logs
+    return FastJSONResponse(rows_as_dicts(logs))
+
+@router.get("/summary", response_model=EnergySummaryResponse)
+def get_energy_summary(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Distribución de energía por día de la semana/hora y promedios diarios del usuario"""
+    return EnergyRollupService.summary(db, current_user.id, start_date, end_date)
 
 @router.get("/{log_id}", response_model=EnergyLogResponse)
 def get_energy_log(
     log_id: UUID, 
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_active_user)
 ):
     """Obtener un log de energía específico por ID"""
@@ -74,6 +89,11 @@ def create_energy_log(
     
     db_energy_log = EnergyLog(**energy_log.dict(), user_id=current_user.id)
     db.add(db_energy_log)
+    db.flush()
+    db.refresh(db_energy_log)
+    
+    # Mantener los agregados en la misma transacción
+    EnergyRollupService.apply(db, current_user.id, db_energy_log.logged_at, db_energy_log.energy_level, +1)
     db.commit()
     db.refresh(db_energy_log)
     return db_energy_log
@@ -96,9 +116,15 @@ def update_energy_log(
             detail="Energy log not found"
         )
     
+    old_level = db_energy_log.energy_level
+    
     for field, value in energy_log_update.dict(exclude_unset=True).items():
         setattr(db_energy_log, field, value)
     
+    if db_energy_log.energy_level != old_level:
+        EnergyRollupService.apply(db, current_user.id, db_energy_log.logged_at, old_level, -1)
+        EnergyRollupService.apply(db, current_user.id, db_energy_log.logged_at, db_energy_log.energy_level, +1)
+    
     db.commit()
     db.refresh(db_energy_log)
     return db_energy_log
@@ -120,6 +146,7 @@ def delete_energy_log(
             detail="Energy log not found"
         )
     
+    EnergyRollupService.apply(db, current_user.id, db_energy_log.logged_at, db_energy_log.energy_level, -1)
     db.delete(db_energy_log)
     db.commit()
     return {"message": "Energy log deleted successfully"}
\ No newline at end of file
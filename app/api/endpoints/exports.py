@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.models.database_models import User
+from app.security.auth import get_current_active_user
+from app.services.export_service import ExportService, EXPORT_DATASETS, EXPORT_FORMATS
+
+router = APIRouter()
+
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = "ndjson",
+    current_user: User = Depends(get_current_active_user)
+):
+    """Exportar en streaming (NDJSON o CSV) todos los registros del usuario actual"""
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Dataset must be one of: {', '.join(EXPORT_DATASETS)}"
+        )
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
+    extension = "csv" if format == "csv" else "ndjson"
+    return StreamingResponse(
+        ExportService.stream_export(dataset, format, current_user.id),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'}
+    )
@@ -1,14 +1,29 @@
 # app/api/endpoints/ml_tasks.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
+from collections import namedtuple
 from typing import List
+from datetime import datetime, timedelta
 from uuid import UUID
 
 from app.database import get_db
 from app.models.database_models import Task, User, TaskMLData, MLFeedback
-from app.models.pydantic_models import TaskResponse
+from app.models.pydantic_models import (
+    TaskResponse, RecommendedTimeBatchRequest, RecommendedTimeItem, DayPlanRequest, DayPlanResponse,
+    TaskScoreRequest, TaskScoreItem
+)
 from app.security.auth import get_current_active_user
+from app.utils.dependencies import get_read_db
 from app.services.ai_service import TaskAgent
+from app.services.schedule_service import recomendar_horarios, energy_profiles
+from app.services.planner import DayPlanner, UNIT_MINUTES
+from app.services.population_model import population_models
+from app.services.task_service import TaskService
+from app.config import settings
+from app.services.collection_versions import check_collection_etag, etag_headers
+from app.utils.responses import FastJSONResponse, columns_for
+from app.utils.concurrency import ml_endpoint
+from app.utils.admission import AdmissionRejected, prioritized_admission, train_admission
 
 router = APIRouter()
 
@@ -16,56 +31,221 @@ class MLTaskResponse(TaskResponse):
     ml_priority_score: float = None
     recommended_schedule: str = None
 
+TASK_LIST_COLUMNS = columns_for(Task, TaskResponse)
+
+# Columnas que necesita el planificador de horarios
+SCHEDULE_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.energy_required,
+    Task.estimated_duration, Task.deadline
+)
+MAX_RECOMMENDED_TIME_BATCH = 500
+MAX_PLAN_TASKS = 500
+
+# Tarea hipotética con los campos que leen las reglas y el modelo (id = posición en la petición)
+ScoreDraft = namedtuple("ScoreDraft", [
+    "id", "title", "description", "urgency", "impact", "energy_required",
+    "estimated_duration", "deadline", "priority_level"
+])
+
 @router.get("/prioritized", response_model=List[MLTaskResponse])
+@ml_endpoint(
+    single_flight=prioritized_admission,
+    key=lambda request, skip, limit, current_user, **_: (
+        current_user.id, skip, limit, request.headers.get("if-none-match")
+    )
+)
 def get_prioritized_tasks(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener tareas ordenadas por el modelo ML"""
-    # Obtener tareas pendientes
-    tasks = db.query(Task).filter(
-        Task.user_id == current_user.id,
-        Task.status.in_(['pending', 'in_progress'])
-    ).offset(skip).limit(limit).all()
+    # El puntaje depende de tareas, feedback, modelo activo (propio o poblacional) y de la hora actual
+    etag, not_modified = check_collection_etag(
+        request, db, current_user.id,
+        ["tasks", "ml_feedback", "ai_models"],
+        extra=f"{datetime.now().strftime('%Y%m%d%H')}|{population_models.active_id(db)}"
+    )
+    if not_modified:
+        return not_modified
 
-    # Usar el agente ML para priorizar
-    agent = TaskAgent(db, current_user.id)
-    prioritized_tasks = agent.predecir_prioridad_tareas(tasks)
-    
-    # Convertir a respuesta
-    response = []
-    for task_data in prioritized_tasks:
-        task_dict = TaskResponse.from_orm(task_data['task_obj']).dict()
-        task_dict['ml_priority_score'] = task_data['puntaje_ml']
-        response.append(MLTaskResponse(**task_dict))
-    
-    return response
+    def priorizar():
+        # Obtener tareas pendientes
+        tasks = db.query(*TASK_LIST_COLUMNS).filter(
+            Task.user_id == current_user.id,
+            Task.status.in_(['pending', 'in_progress'])
+        ).offset(skip).limit(limit).all()
+
+        # Usar el agente ML para priorizar
+        agent = TaskAgent(db, current_user.id)
+        prioritized_tasks = agent.predecir_prioridad_tareas(tasks)
+
+        # Convertir a respuesta directamente desde las filas proyectadas
+        response = []
+        for task_data in prioritized_tasks:
+            task_dict = task_data['task_obj']._asdict()
+            task_dict['ml_priority_score'] = task_data['puntaje_ml']
+            task_dict['recommended_schedule'] = None
+            response.append(task_dict)
+        return response
+
+    try:
+        response = prioritized_admission.run(current_user.id, priorizar, key=(skip, limit))
+    except AdmissionRejected as rejected:
+        if rejected.cached is None:
+            raise
+        # Último resultado de la misma página, sin ETag: puede no corresponder a la versión actual
+        prioritized_admission.served_from_cache()
+        return FastJSONResponse(
+            rejected.cached, headers={**rejected.retry_after_header, "X-Admission": "cached"}
+        )
+
+    return FastJSONResponse(response, headers=etag_headers(etag))
 
 @router.post("/{task_id}/train")
+@ml_endpoint(single_flight=train_admission, key=lambda current_user, **_: current_user.id)
 def train_model_for_task(
     task_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Entrenar modelo cuando se completa una tarea"""
-    agent = TaskAgent(db, current_user.id)
-    success = agent.entrenar_modelo_prioridad()
+    # Las peticiones simultáneas del mismo usuario ya comparten esta ejecución (single_flight)
+    success = train_admission.run(
+        current_user.id, lambda: TaskAgent(db, current_user.id).entrenar_modelo_prioridad()
+    )
     
     return {
         "message": "Modelo actualizado exitosamente" if success else "No hay suficientes datos para entrenar",
         "trained": success
     }
 
+@router.post("/recommended-time", response_model=List[RecommendedTimeItem])
+@ml_endpoint
+def get_recommended_times(
+    batch: RecommendedTimeBatchRequest,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Horarios recomendados para varias tareas (o todas las pendientes) en una sola pasada"""
+    if not batch.all_pending and not batch.task_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide task_ids or set all_pending"
+        )
+    if batch.task_ids and len(batch.task_ids) > MAX_RECOMMENDED_TIME_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_RECOMMENDED_TIME_BATCH} task_ids per request"
+        )
+
+    query = db.query(*SCHEDULE_COLUMNS).filter(Task.user_id == current_user.id)
+    if batch.all_pending:
+        query = query.filter(Task.status.in_(['pending', 'in_progress']))
+    if batch.task_ids:
+        query = query.filter(Task.id.in_(batch.task_ids))
+    tasks = query.limit(MAX_RECOMMENDED_TIME_BATCH).all()
+
+    if batch.task_ids and not batch.all_pending and len(tasks) < len(set(batch.task_ids)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+
+    # Una consulta de tareas, una carga de perfil y una pasada vectorizada
+    response = []
+    for task, (recommended_time, recommended_start) in zip(tasks, recomendar_horarios(db, current_user.id, tasks)):
+        response.append({
+            "task_id": task.id,
+            "recommended_time": recommended_time,
+            "recommended_start": recommended_start
+        })
+    return FastJSONResponse(response)
+
+@router.post("/score", response_model=List[TaskScoreItem])
+@ml_endpoint
+def score_tasks(
+    batch: TaskScoreRequest,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Puntúa tareas sin guardarlas: nivel y score por reglas y puntaje del agente (ML o reglas)"""
+    drafts, rules = [], []
+    for index, task in enumerate(batch.tasks):
+        deadline = task.deadline
+        if deadline is not None and deadline.tzinfo is not None:
+            deadline = deadline.astimezone().replace(tzinfo=None)
+        level, score = TaskService.calcular_prioridad(
+            task.urgency, task.impact, deadline, task.energy_required, task.estimated_duration
+        )
+        rules.append((level, score))
+        drafts.append(ScoreDraft(
+            index, task.title, task.description, task.urgency, task.impact, task.energy_required,
+            task.estimated_duration, deadline, level
+        ))
+
+    # Una sola predicción vectorizada para todo el lote; solo lecturas
+    agent = TaskAgent(db, current_user.id)
+    scores = {item['task_obj'].id: item['puntaje_ml'] for item in agent.predecir_prioridad_tareas(drafts)}
+
+    response = []
+    for draft, (level, score) in zip(drafts, rules):
+        response.append({
+            "index": draft.id,
+            "title": draft.title,
+            "rule_priority_level": level,
+            "rule_priority_score": score,
+            "ml_priority_score": scores[draft.id],
+            "source": agent.fuente
+        })
+    return FastJSONResponse(response)
+
+@router.post("/plan", response_model=DayPlanResponse)
+@ml_endpoint
+def plan_day(
+    plan: DayPlanRequest,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Plan del día: empaqueta las tareas pendientes en las horas disponibles maximizando la prioridad"""
+    start = plan.start
+    if start is None:
+        now = datetime.now().replace(second=0, microsecond=0)
+        start = now + timedelta(minutes=-now.minute % UNIT_MINUTES)
+    elif start.tzinfo is not None:
+        start = start.astimezone().replace(tzinfo=None)
+
+    tasks = db.query(*TASK_LIST_COLUMNS).filter(
+        Task.user_id == current_user.id,
+        Task.status.in_(['pending', 'in_progress'])
+    ).limit(MAX_PLAN_TASKS).all()
+
+    # Prioridades del agente (ML o reglas) y ventanas de energía del perfil aprendido
+    agent = TaskAgent(db, current_user.id)
+    prioritized = agent.predecir_prioridad_tareas(tasks)
+    profile = energy_profiles.get(db, current_user.id)
+
+    planner = DayPlanner(start, plan.available_hours, profile if profile.is_reliable else None)
+    items = [
+        planner.build_item(
+            item['task_obj'].id, item['task_obj'].title, item['puntaje_ml'],
+            item['task_obj'].estimated_duration, item['task_obj'].energy_required, item['task_obj'].deadline
+        )
+        for item in prioritized
+    ]
+    return FastJSONResponse(planner.plan(items, settings.PLAN_TIME_BUDGET_MS))
+
 @router.get("/{task_id}/recommended-time")
+@ml_endpoint
 def get_recommended_time(
     task_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener horario recomendado para una tarea"""
-    task = db.query(Task).filter(
+    task = db.query(*SCHEDULE_COLUMNS).filter(
         Task.id == task_id,
         Task.user_id == current_user.id
     ).first()
@@ -76,8 +256,8 @@ def get_recommended_time(
             detail="Task not found"
         )
     
-    agent = TaskAgent(db, current_user.id)
-    recommended_time = agent.recomendar_horario(task)
+    # No hace falta el modelo de prioridad: solo perfil de energía o reglas
+    recommended_time, _ = recomendar_horarios(db, current_user.id, [task])[0]
     
     return {
         "task_id": task_id,
@@ -86,6 +266,7 @@ def get_recommended_time(
     }
 
 @router.post("/{task_id}/feedback")
+@ml_endpoint
 def submit_ml_feedback(
     task_id: UUID,
     feedback_type: str,
@@ -119,9 +300,15 @@ def submit_ml_feedback(
     db.add(feedback)
     db.commit()
     
-    # Si el feedback es negativo, reentrenar el modelo
+    # Si el feedback es negativo, reentrenar el modelo (con el mismo límite que /train).
+    # Si no se admite, el feedback queda pendiente y lo consume el siguiente entrenamiento
+    retrained = False
     if not was_useful:
-        agent = TaskAgent(db, current_user.id)
-        agent.entrenar_modelo_prioridad()
+        try:
+            retrained = train_admission.run(
+                current_user.id, lambda: TaskAgent(db, current_user.id).entrenar_modelo_prioridad()
+            )
+        except AdmissionRejected:
+            pass
     
-    return {"message": "Feedback registrado exitosamente"}
\ No newline at end of file
+    return {"message": "Feedback registrado exitosamente", "retrained": retrained}
\ No newline at end of file
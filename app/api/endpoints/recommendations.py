@@ -8,9 +8,13 @@ from app.database import get_db
 from app.models.database_models import DailyRecommendation, Task
 from app.models.pydantic_models import DailyRecommendationCreate, DailyRecommendationResponse
 from app.security.auth import get_current_active_user
+from app.utils.dependencies import get_read_db
+from app.utils.responses import FastJSONResponse, columns_for, rows_as_dicts
 
 router = APIRouter()
 
+RECOMMENDATION_LIST_COLUMNS = columns_for(DailyRecommendation, DailyRecommendationResponse)
+
 @router.get("/", response_model=List[DailyRecommendationResponse])
 def get_recommendations(
     start_date: Optional[date] = None,
@@ -18,11 +22,11 @@ def get_recommendations(
     status: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_active_user)
 ):
     """Obtener recomendaciones diarias del usuario actual"""
-    query = db.query(DailyRecommendation).filter(
+    query = db.query(*RECOMMENDATION_LIST_COLUMNS).filter(
         DailyRecommendation.user_id == current_user.id
     )
     
@@ -34,12 +38,12 @@ def get_recommendations(
         query = query.filter(DailyRecommendation.status == status)
     
     recommendations = query.offset(skip).limit(limit).all()
-    return recommendations
+    return FastJSONResponse(rows_as_dicts(recommendations))
 
 @router.get("/{recommendation_id}", response_model=DailyRecommendationResponse)
 def get_recommendation(
     recommendation_id: UUID, 
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_active_user)
 ):
     """Obtener una recomendación específica por ID"""
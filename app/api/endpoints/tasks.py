@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -7,25 +7,40 @@ from uuid import UUID
 
 from app.database import get_db
 from app.models.database_models import Task, User, Category, TaskHistory
-from app.models.pydantic_models import TaskCreate, TaskResponse
+from app.models.pydantic_models import TaskCreate, TaskResponse, TaskCreateResponse, TaskSearchResponse
 from app.security.auth import get_current_active_user
+from app.utils.dependencies import get_read_db
 from app.services.task_service import TaskService
+from app.services.dedup_service import DuplicateDetector
+from app.services.collection_versions import check_collection_etag, etag_headers
+from app.utils.responses import FastJSONResponse, columns_for, rows_as_dicts
 
 router = APIRouter()
 
+# Máximo de tareas por petición en la creación por lotes
+MAX_BATCH_SIZE = 100
+
 # Lista de estados válidos para las tareas
 VALID_STATUSES = ['pending', 'in_progress', 'completed', 'archived', 'postponed']
 
+# Columnas proyectadas para el listado (sin cargar entidades ORM)
+TASK_LIST_COLUMNS = columns_for(Task, TaskResponse)
+
 @router.get("/", response_model=List[TaskResponse])
 def get_tasks(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user) 
 ):
     """Obtener lista de tareas del usuario actual"""
-    query = db.query(Task).filter(Task.user_id == current_user.id)
+    etag, not_modified = check_collection_etag(request, db, current_user.id, ["tasks"])
+    if not_modified:
+        return not_modified
+    
+    query = db.query(*TASK_LIST_COLUMNS).filter(Task.user_id == current_user.id)
     
     if status:
         if status not in VALID_STATUSES:
@@ -36,12 +51,47 @@ def get_tasks(
         query = query.filter(Task.status == status)
     
     tasks = query.offset(skip).limit(limit).all()
-    return tasks
+    return FastJSONResponse(rows_as_dicts(tasks), headers=etag_headers(etag))
+
+@router.get("/search", response_model=List[TaskSearchResponse])
+def search_tasks(
+    q: str,
+    status: Optional[str] = None,
+    category_id: Optional[UUID] = None,
+    skip: int = 0,
+    limit: int = 50,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Buscar tareas por palabras (o prefijos) en título y descripción, ordenadas por relevancia"""
+    if status and status not in VALID_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Status must be one of: {', '.join(VALID_STATUSES)}"
+        )
+    
+    tsquery_text = TaskService.build_search_tsquery(q)
+    if not tsquery_text:
+        return FastJSONResponse([])
+    
+    tsquery = func.to_tsquery('simple', tsquery_text)
+    rank = func.ts_rank_cd(Task.search_vector, tsquery).label("rank")
+    query = db.query(*TASK_LIST_COLUMNS, rank).filter(
+        Task.user_id == current_user.id,
+        Task.search_vector.op('@@')(tsquery)
+    )
+    if status:
+        query = query.filter(Task.status == status)
+    if category_id:
+        query = query.filter(Task.category_id == category_id)
+    
+    results = query.order_by(rank.desc()).offset(skip).limit(min(limit, 100)).all()
+    return FastJSONResponse(rows_as_dicts(results))
 
 @router.get("/{task_id}", response_model=TaskResponse)
 def get_task(
     task_id: UUID, 
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)  
 ):
     """Obtener una tarea específica por ID"""
@@ -56,13 +106,15 @@ def get_task(
         )
     return task
 
-@router.post("/", response_model=TaskResponse)
+@router.post("/", response_model=TaskCreateResponse)
 def create_task(
     task: TaskCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user) 
 ):
     """Crear una nueva tarea para el usuario actual con cálculo automático de prioridad"""
+    # Buscar posibles duplicados entre las tareas abiertas antes de insertar
+    duplicates = DuplicateDetector.find_candidates(db, current_user.id, task.title)
     
     db_task = TaskService.create_task_with_priority(
         db=db,
@@ -71,7 +123,30 @@ def create_task(
         category_id=task.category_id
     )
     
-    return db_task
+    response = TaskCreateResponse.model_validate(db_task)
+    response.possible_duplicates = duplicates
+    return response
+
+@router.post("/batch", response_model=List[TaskCreateResponse])
+def create_tasks_batch(
+    tasks: List[TaskCreate],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Crear varias tareas a la vez, marcando posibles duplicados (también dentro del lote)"""
+    if len(tasks) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch cannot exceed {MAX_BATCH_SIZE} tasks"
+        )
+    
+    responses = []
+    for db_task, duplicates in TaskService.create_tasks_batch(db, tasks, current_user.id):
+        response = TaskCreateResponse.model_validate(db_task)
+        response.possible_duplicates = duplicates
+        responses.append(response)
+    
+    return responses
 
 @router.put("/{task_id}", response_model=TaskResponse)
 def update_task(
@@ -93,10 +168,14 @@ def update_task(
     
     # Guardar el estado anterior para el historial
     old_status = db_task.status
+    old_title = db_task.title
     
     for field, value in task_update.dict(exclude_unset=True).items():
         setattr(db_task, field, value)
     
+    if db_task.title != old_title:
+        DuplicateDetector.index_task(db, db_task)
+    
     db.commit()
     db.refresh(db_task)
     
@@ -9,6 +9,7 @@ from app.api.endpoints.energy_logs import router as energy_logs_router
 from app.api.endpoints.task_history import router as task_history_router
 from app.api.endpoints.auth import router as auth_router 
 from app.api.endpoints.ml_tasks import router as ml_tasks_router
+from app.api.endpoints.exports import router as exports_router
 
 api_router = APIRouter()
 
@@ -19,6 +20,7 @@ api_router.include_router(categories_router, prefix="/categories", tags=["catego
 api_router.include_router(recommendations_router, prefix="/recommendations", tags=["recommendations"])
 api_router.include_router(energy_logs_router, prefix="/energy_logs", tags=["energy_logs"])
 api_router.include_router(task_history_router, prefix="/task_history", tags=["task_history"])
+api_router.include_router(exports_router, prefix="/export", tags=["export"])
 
 
 api_router.include_router(ml_tasks_router, prefix="/ml_tasks", tags=["machine_learning"])
\ No newline at end of file
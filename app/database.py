@@ -1,11 +1,32 @@
-from sqlalchemy import create_engine
+import time
+from typing import Any, Dict, Iterable
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import settings
+from app.utils.metrics import instrument_pool
+from app.utils.read_your_writes import client_wrote_recently, record_commit
 
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(
+    settings.DATABASE_URL,
+    connect_args={"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Réplica opcional de solo lectura; sin DATABASE_REPLICA_URL todo va al primario
+if settings.DATABASE_REPLICA_URL:
+    read_engine = create_engine(
+        settings.DATABASE_REPLICA_URL,
+        connect_args={"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+    )
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+instrument_pool(engine, "primary")
+if read_engine is not engine:
+    instrument_pool(read_engine, "replica")
+
 Base = declarative_base()
 
 def get_db():
@@ -13,4 +34,57 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Read-your-writes: usuarios que escribieron en el primario hace poco (por proceso). Entre
+# workers lo resuelve la marca last_write que devuelve ReadYourWritesMiddleware al cliente
+_recent_writes: Dict[Any, float] = {}
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_written_users(session: Session, flush_context):
+    written = session.info.setdefault("written_users", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        user_id = getattr(obj, "user_id", None)
+        if user_id is not None:
+            written.add(user_id)
+
+def record_user_writes(session: Session, user_ids: Iterable):
+    """
+    Registra escrituras de Core o en bloque (insert/update/query.update), que no pasan
+    por after_flush, para que cuenten en read-your-writes al confirmar la transacción.
+    """
+    session.info.setdefault("written_users", set()).update(u for u in user_ids if u is not None)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _mark_written_users(session: Session):
+    now = time.monotonic()
+    written = session.info.pop("written_users", ())
+    if written:
+        record_commit()
+    for user_id in written:
+        _recent_writes[user_id] = now
+    if len(_recent_writes) > 10000:
+        for user_id, last_write in list(_recent_writes.items()):
+            if now - last_write > settings.READ_YOUR_WRITES_SECONDS:
+                _recent_writes.pop(user_id, None)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_written_users(session: Session):
+    session.info.pop("written_users", None)
+
+def recently_wrote(user_id) -> bool:
+    """Indica si el usuario escribió dentro de la ventana READ_YOUR_WRITES_SECONDS"""
+    last_write = _recent_writes.get(user_id)
+    if last_write is None:
+        return False
+    if time.monotonic() - last_write > settings.READ_YOUR_WRITES_SECONDS:
+        _recent_writes.pop(user_id, None)
+        return False
+    return True
+
+def read_session_for(user_id) -> Session:
+    """Sesión para lecturas: réplica, salvo que el usuario o el cliente hayan escrito recientemente"""
+    if read_engine is engine or recently_wrote(user_id) or client_wrote_recently():
+        return SessionLocal()
+    return ReadSessionLocal()
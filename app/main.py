@@ -1,11 +1,30 @@
+import time
+
+BOOT_STARTED = time.perf_counter()
+
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
 from app.api.routes import api_router
-from app.database import engine, Base
+from app.database import engine, read_engine
+from app.startup import check_schema_revision
+from app.services.evaluation_service import evaluation_queue
+from app.services.keyword_matcher import keyword_matcher
+from app.services.population_model import population_models
+from app.services.schedule_service import energy_profiles
+from app.utils.concurrency import configure_default_threads, thread_pool_stats
+from app.utils.admission import ADMISSION_DETAILS, AdmissionRejected, admission_stats
+from app.utils.read_your_writes import ReadYourWritesMiddleware
+from app.utils.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, cache_families, gauge, pool_status, registry
+
+logger = logging.getLogger(__name__)
 
-# Crear tablas en la base de datos
-Base.metadata.create_all(bind=engine)
+# El DDL vive solo en las migraciones de Alembic (alembic upgrade head)
+boot_stats = {"import_ms": round((time.perf_counter() - BOOT_STARTED) * 1000, 1)}
 
 app = FastAPI(
     title="Smart Task API",
@@ -22,19 +41,105 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Last-Write"],
 )
 
+# Marca last_write para read-your-writes entre workers
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Latencia, consultas y commits por ruta (fuera de CORS: mide también los preflight)
+app.add_middleware(MetricsMiddleware)
+
 # Incluir rutas
 app.include_router(api_router, prefix="/api/v1")
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request, exc: AdmissionRejected):
+    """Control de admisión de las rutas de ML: 429 con Retry-After"""
+    return JSONResponse(
+        status_code=429, content={"detail": ADMISSION_DETAILS[exc.reason]}, headers=exc.retry_after_header
+    )
+
+@app.on_event("startup")
+def verify_schema():
+    """Comprobar la revisión de migraciones y medir el tiempo de arranque del worker"""
+    check_started = time.perf_counter()
+    check_schema_revision(engine)
+    boot_stats["schema_check_ms"] = round((time.perf_counter() - check_started) * 1000, 1)
+    boot_stats["boot_ms"] = round((time.perf_counter() - BOOT_STARTED) * 1000, 1)
+    logger.info(
+        f"🚀 Worker listo en {boot_stats['boot_ms']} ms "
+        f"(importación: {boot_stats['import_ms']} ms, verificación de esquema: {boot_stats['schema_check_ms']} ms)"
+    )
+
+@app.on_event("startup")
+async def configure_thread_pools():
+    configure_default_threads()
+
+@app.on_event("shutdown")
+def stop_background_pools():
+    evaluation_queue.shutdown()
+
 @app.get("/")
 async def root():
     return {"message": "Task Priority AI API", "version": "1.0.0"}
 
+def _database_status() -> str:
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return "connected"
+    except Exception as e:
+        logger.error(f"❌ Base de datos no disponible: {e}")
+        return "unavailable"
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "database": "connected"}
+    database = await run_in_threadpool(_database_status)
+    body = {"status": "healthy" if database == "connected" else "degraded", "database": database,
+            "boot": boot_stats, "thread_pools": thread_pool_stats(), "admission": admission_stats()}
+    # Los balanceadores solo miran el código: sin base de datos el worker sale de rotación
+    return JSONResponse(status_code=200 if database == "connected" else 503, content=body)
+
+def _process_metrics():
+    """Valores que ya mantienen otros módulos, leídos al exportar"""
+    yield from cache_families({
+        "keyword_matcher": keyword_matcher.cache_info(),
+        "energy_profiles": energy_profiles.cache_info(),
+        "population_models": population_models.cache_info()
+    })
+
+    pools = thread_pool_stats()
+    yield gauge("smarttask_threads", "Hilos de cada limitador", (({"pool": p}, s["threads"]) for p, s in pools.items()))
+    yield gauge("smarttask_threads_busy", "Hilos ocupados", (({"pool": p}, s["busy"]) for p, s in pools.items()))
+    yield gauge("smarttask_threads_waiting", "Peticiones esperando hilo", (({"pool": p}, s["waiting"]) for p, s in pools.items()))
+    yield ("smarttask_thread_wait_seconds_total", "counter", "Espera acumulada por un hilo del limitador de ML",
+           [({"pool": "ml"}, pools["ml"]["wait_ms"] / 1000)])
+
+    admission = admission_stats()
+    yield ("smarttask_admission_total", "counter", "Peticiones caras por acción y resultado del control de admisión", [
+        ({"action": action, "outcome": outcome}, admission[action][outcome])
+        for action in ("train", "prioritized")
+        for outcome in ("admitted", "rejected", "deduplicated", "served_cached")
+    ])
+
+    engines = {"primary": engine} if read_engine is engine else {"primary": engine, "replica": read_engine}
+    yield gauge("smarttask_db_pool_connections", "Conexiones del pool por estado", (
+        ({"engine": name, "state": state}, value)
+        for name, e in engines.items() for state, value in pool_status(e).items()
+    ))
+
+    yield gauge("smarttask_boot_milliseconds", "Tiempos de arranque del worker", (
+        ({"phase": phase.removesuffix("_ms")}, value) for phase, value in boot_stats.items()
+    ))
+
+registry.register_collector(_process_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas del worker en formato de texto de Prometheus"""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,4 +1,4 @@
-from .database_models import User, Task, Category, TaskHistory, DailyRecommendation, EnergyLog, AIModel, AIFeedback
+from .database_models import User, Task, Category, TaskHistory, DailyRecommendation, EnergyLog, AIModel, AIFeedback, CollectionVersion, ModelHyperparameters, FeedbackWatermark
 from .pydantic_models import (
     UserBase, UserCreate, UserResponse,
     TaskBase, TaskCreate, TaskResponse,
@@ -9,11 +9,16 @@ from .pydantic_models import (
 )
 
 __all__ = [
-    "User", "Task", "Category", "TaskHistory", "DailyRecommendation", "EnergyLog", "AIModel", "AIFeedback",
+    "User", "Task", "Category", "TaskHistory", "DailyRecommendation", "EnergyLog", "AIModel", "AIFeedback", "CollectionVersion", "ModelHyperparameters", "FeedbackWatermark",
     "UserBase", "UserCreate", "UserResponse",
     "TaskBase", "TaskCreate", "TaskResponse", 
     "CategoryBase", "CategoryCreate", "CategoryResponse",
     "DailyRecommendationBase", "DailyRecommendationCreate", "DailyRecommendationResponse",
     "EnergyLogBase", "EnergyLogCreate", "EnergyLogResponse",
     "TaskHistoryBase", "TaskHistoryResponse"
-]
\ No newline at end of file
+]
+
+# Registrar los listeners de versionado (ETag) para cualquier sesión que use los modelos
+import app.services.collection_versions  # noqa: E402,F401
+# y el que asigna la clave de muestreo de entrenamiento al completar una tarea
+import app.services.training_window  # noqa: E402,F401
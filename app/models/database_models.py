@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, ForeignKey, DECIMAL, Date, LargeBinary, CheckConstraint
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.sql import func
+from sqlalchemy import Column, String, Integer, SmallInteger, BigInteger, Boolean, DateTime, Text, ForeignKey, DECIMAL, Date, Float, LargeBinary, CheckConstraint, Computed, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import deferred
+from sqlalchemy.sql import func, text
 from app.database import Base
 import uuid
 
@@ -63,6 +64,15 @@ class Task(Base):
     updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
     completed_at = Column(DateTime)
     actual_duration = Column(Integer)
+    # Clave del muestreo ponderado por recencia (A-Res); se asigna al completar la tarea
+    training_sample_key = Column(Float)
+    
+    # Índice de texto completo mantenido por PostgreSQL (no se carga con la entidad)
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+        persisted=True
+    )))
     
     __table_args__ = (
         CheckConstraint("urgency IN ('low', 'medium', 'high')", name="ck_task_urgency"),
@@ -72,6 +82,9 @@ class Task(Base):
         CheckConstraint("completion_probability >= 0 AND completion_probability <= 1", name="ck_task_completion_prob"),
         CheckConstraint("status IN ('pending', 'in_progress', 'completed', 'archived', 'postponed')", name="ck_task_status"),
         CheckConstraint("energy_required IN ('low', 'medium', 'high')", name="ck_task_energy_required"),
+        Index("ix_tasks_user_search", "user_id", "search_vector", postgresql_using="gin"),
+        Index("ix_tasks_user_completed", "user_id", "completed_at", postgresql_where=text("status = 'completed'")),
+        Index("ix_tasks_user_training_sample", "user_id", "training_sample_key", postgresql_where=text("status = 'completed'")),
     )
 
 class TaskHistory(Base):
@@ -108,6 +121,7 @@ class DailyRecommendation(Base):
     __table_args__ = (
         CheckConstraint("confidence_score >= 0 AND confidence_score <= 1", name="ck_recommendation_confidence"),
         CheckConstraint("status IN ('pending', 'accepted', 'rejected', 'postponed')", name="ck_recommendation_status"),
+        Index("ix_daily_recommendations_user_date", "user_id", "recommendation_date"),
     )
 
 class EnergyLog(Base):
@@ -138,9 +152,33 @@ class AIModel(Base):
     model_data = Column(LargeBinary)
     feature_weights = Column(JSONB)
     accuracy_metrics = Column(JSONB)
+    # Duración del entrenamiento, tamaño del dataset y origen (on_demand / nightly)
+    training_metadata = Column(JSONB)
+    # SHA-256 de model_data: un reentrenamiento que produce el mismo árbol reutiliza la fila
+    content_hash = Column(String(64))
     
     is_active = Column(Boolean, default=False)
     trained_at = Column(DateTime, default=func.current_timestamp())
+    
+    __table_args__ = (
+        Index(
+            "ix_ai_models_active", "user_id", "model_type", "trained_at",
+            postgresql_where=text("is_active")
+        ),
+        Index("ix_ai_models_user_type_trained", "user_id", "model_type", "trained_at"),
+    )
+
+# Mejores hiperparámetros encontrados por la búsqueda fuera de línea (se reutilizan al reentrenar)
+class ModelHyperparameters(Base):
+    __tablename__ = "model_hyperparameters"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    model_type = Column(String(50), primary_key=True)
+    
+    params = Column(JSONB, nullable=False)
+    cv_score = Column(DECIMAL(5,4))
+    samples = Column(Integer, nullable=False)
+    searched_at = Column(DateTime, default=func.current_timestamp())
 
 class AIFeedback(Base):
     __tablename__ = "ai_feedback"
@@ -157,6 +195,10 @@ class AIFeedback(Base):
     
     feedback_date = Column(DateTime, default=func.current_timestamp())
     used_for_training = Column(Boolean, default=False)
+    
+    __table_args__ = (
+        Index("ix_ai_feedback_user_unused", "user_id", postgresql_where=text("used_for_training IS NOT TRUE")),
+    )
 
 
 # Nuevo para IA
@@ -172,9 +214,16 @@ class TaskMLData(Base):
     predicted_completion_time = Column(Integer)  # Tiempo estimado en minutos
     recommended_schedule = Column(String(50))  # Horario recomendado
     features = Column(JSONB)  # Características extraídas para el ML
+    # Prioridad real según el feedback ya consumido (el más reciente gana)
+    actual_priority = Column(String(20))
+    actual_priority_at = Column(DateTime)
     
     created_at = Column(DateTime, default=func.current_timestamp())
     updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
+    
+    __table_args__ = (
+        UniqueConstraint("task_id", name="uq_task_ml_data_task"),
+    )
 
 class MLFeedback(Base):
     __tablename__ = "ml_feedback"
@@ -188,4 +237,64 @@ class MLFeedback(Base):
     actual_priority = Column(String(20))  # Prioridad real que tuvo el usuario
     actual_completion_time = Column(Integer)  # Tiempo real que tomó
     
-    created_at = Column(DateTime, default=func.current_timestamp())
\ No newline at end of file
+    created_at = Column(DateTime, default=func.current_timestamp())
+    
+    __table_args__ = (
+        Index("ix_ml_feedback_user_created", "user_id", "created_at"),
+    )
+
+# Marca de agua del feedback consumido por el entrenamiento de cada usuario
+class FeedbackWatermark(Base):
+    __tablename__ = "feedback_watermarks"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    # created_at del ml_feedback más reciente ya consumido
+    ml_feedback_at = Column(DateTime)
+    consumed_at = Column(DateTime, default=func.current_timestamp())
+
+
+# Versionado de colecciones por usuario (ETag / If-None-Match)
+class CollectionVersion(Base):
+    __tablename__ = "collection_versions"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    collection = Column(String(50), primary_key=True)  # 'tasks', 'categories', 'ml_feedback', 'ai_models'
+    version = Column(BigInteger, nullable=False, default=0)
+    
+    updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+
+# Bandas MinHash/LSH del título para detectar tareas casi duplicadas
+class TaskDedupBand(Base):
+    __tablename__ = "task_dedup_bands"
+    
+    task_id = Column(UUID(as_uuid=True), ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True)
+    band = Column(SmallInteger, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    band_hash = Column(BigInteger, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_task_dedup_bands_user_hash", "user_id", "band_hash"),
+    )
+
+
+# Agregados incrementales de energy_logs (se mantienen en cada alta/edición/baja)
+class EnergyRollupHourly(Base):
+    __tablename__ = "energy_rollup_hourly"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    weekday = Column(SmallInteger, primary_key=True)  # 0 = lunes
+    hour = Column(SmallInteger, primary_key=True)
+    
+    low_count = Column(Integer, nullable=False, default=0)
+    medium_count = Column(Integer, nullable=False, default=0)
+    high_count = Column(Integer, nullable=False, default=0)
+
+class EnergyRollupDaily(Base):
+    __tablename__ = "energy_rollup_daily"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    
+    log_count = Column(Integer, nullable=False, default=0)
+    energy_sum = Column(Integer, nullable=False, default=0)  # low=1, medium=2, high=3
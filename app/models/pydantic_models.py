@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, validator
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime, date
 from uuid import UUID
 
@@ -76,6 +76,12 @@ class TaskResponse(TaskBase):
     class Config:
         from_attributes = True
 
+class TaskCreateResponse(TaskResponse):
+    possible_duplicates: List[UUID] = []
+
+class TaskSearchResponse(TaskResponse):
+    rank: float
+
 
 class CategoryBase(BaseModel):
     name: str
@@ -130,6 +136,24 @@ class EnergyLogResponse(EnergyLogBase):
     class Config:
         from_attributes = True
 
+class EnergyHourlyBucket(BaseModel):
+    weekday: int
+    hour: int
+    low: int
+    medium: int
+    high: int
+    average: float
+
+class EnergyDailyAverage(BaseModel):
+    date: date
+    count: int
+    average: float
+
+class EnergySummaryResponse(BaseModel):
+    total_logs: int
+    hourly: List[EnergyHourlyBucket]
+    daily: List[EnergyDailyAverage]
+
 
 class TaskHistoryBase(BaseModel):
     change_type: str
@@ -150,6 +174,61 @@ class MLTaskResponse(TaskResponse):
     ml_priority_score: float = None
     recommended_schedule: str = None
 
+class RecommendedTimeBatchRequest(BaseModel):
+    task_ids: Optional[List[UUID]] = None
+    all_pending: bool = False
+
+class RecommendedTimeItem(BaseModel):
+    task_id: UUID
+    recommended_time: str
+    recommended_start: Optional[datetime] = None
+
+class TaskScoreRequest(BaseModel):
+    tasks: List[TaskBase]
+    
+    @validator('tasks')
+    def validate_tasks(cls, v):
+        if not v:
+            raise ValueError('tasks cannot be empty')
+        if len(v) > 500:
+            raise ValueError('At most 500 tasks per request')
+        return v
+
+class TaskScoreItem(BaseModel):
+    index: int
+    title: str
+    rule_priority_level: str
+    rule_priority_score: int
+    ml_priority_score: float
+    source: str
+
+class DayPlanRequest(BaseModel):
+    available_hours: float = 8
+    start: Optional[datetime] = None
+    
+    @validator('available_hours')
+    def validate_available_hours(cls, v):
+        if v <= 0 or v > 16:
+            raise ValueError('available_hours must be between 0 and 16')
+        return v
+
+class PlannedTask(BaseModel):
+    task_id: UUID
+    title: str
+    start: datetime
+    end: datetime
+    priority_score: float
+
+class DayPlanResponse(BaseModel):
+    start: datetime
+    end: datetime
+    total_priority: float
+    used_minutes: int
+    scheduled: List[PlannedTask]
+    unscheduled: List[UUID]
+    algorithm: str
+    elapsed_ms: float
+
 class MLFeedbackBase(BaseModel):
     feedback_type: str
     was_useful: bool
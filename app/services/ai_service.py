@@ -1,18 +1,26 @@
 import pandas as pd
 from sklearn.tree import DecisionTreeClassifier
 from datetime import datetime
+import time
 import numpy as np
 from sqlalchemy.orm import Session
 import joblib
 from io import BytesIO
 import traceback
-from typing import List, Dict, Any
+from bisect import bisect_right
+from typing import List, Dict, Any, Optional
 import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
-from app.models.database_models import Task, MLFeedback, AIModel
+from app.models.database_models import Task, MLFeedback
+from app.services.feedback_service import consumir_feedback, instante_de_lectura, prioridades_reales
+from app.services.keyword_matcher import keyword_matcher
+from app.services.model_registry import ModelRegistry
+from app.services.schedule_service import recomendar_horarios
+from app.services.training_window import tareas_de_entrenamiento
+from app.utils.metrics import AGENT_SECONDS, PREDICTED_TASKS, PREDICTIONS
 
 
 # Mapeos fijos (no requieren persistencia)
@@ -21,6 +29,24 @@ IMPACTO_MAP = {"low": 0, "medium": 1, "high": 2}
 ENERGIA_MAP = {"low": 0, "medium": 1, "high": 2}
 PRIORIDAD_MAP = {"low": 1, "medium": 2, "high": 3}
 
+FEATURE_NAMES = [
+    'urgencia_encoded', 'impacto_encoded', 'energia_encoded',
+    'duracion_estimada', 'longitud_descripcion',
+    'tiene_urgente', 'tiene_bug', 'deadline_proximo'
+]
+
+# Hiperparámetros por defecto; la búsqueda fuera de línea puede sustituirlos por usuario
+DEFAULT_HYPERPARAMETERS = {
+    "max_depth": 3,  # Evitar overfitting
+    "min_samples_split": 2,
+    "min_samples_leaf": 1,
+    "class_weight": "balanced"
+}
+
+MODEL_TYPE = "priority_predictor_v3"
+MODEL_VERSION = "3.1"
+MIN_TRAINING_TASKS = 3
+
 
 def _normalizar_nivel(valor: str) -> str:
     if not valor:
@@ -34,6 +60,145 @@ def _normalizar_nivel(valor: str) -> str:
         return "medium"
 
 
+def caracteristicas(task) -> List[float]:
+    """Vector de características de una tarea en el orden de FEATURE_NAMES"""
+    # Calcular si tiene deadline próximo
+    deadline_proximo = 0
+    if task.deadline:
+        dias = (task.deadline - datetime.now()).days
+        deadline_proximo = 1 if dias <= 1 else 0
+
+    flags = keyword_matcher.classify(task.title, task.description)
+    return [
+        URGENCIA_MAP.get(_normalizar_nivel(task.urgency), 1),
+        IMPACTO_MAP.get(_normalizar_nivel(task.impact), 1),
+        ENERGIA_MAP.get(_normalizar_nivel(task.energy_required), 1),
+        float(task.estimated_duration or 60),
+        len(task.description or ""),
+        1 if "tiene_urgente" in flags else 0,
+        1 if "tiene_bug" in flags else 0,
+        deadline_proximo
+    ]
+
+
+def prioridades_objetivo(db: Session, user_id: uuid.UUID, tareas) -> List[int]:
+    """Nivel (1, 2, 3) a aprender por tarea: la prioridad real del feedback más reciente o su priority_level"""
+    reales = prioridades_reales(db, user_id, [task.id for task in tareas])
+    return [PRIORIDAD_MAP[_normalizar_nivel(reales.get(task.id, task.priority_level))] for task in tareas]
+
+
+def preparar_datos_entrenamiento(db: Session, user_id: uuid.UUID):
+    """Prepara datos de tareas completadas para entrenamiento"""
+    _, X_df, y = cargar_dataset(db, user_id)
+    return X_df, y
+
+
+def cargar_dataset(db: Session, user_id: uuid.UUID):
+    """Ventana de entrenamiento (por fecha de completado), sus características y la prioridad objetivo"""
+    try:
+        tareas = tareas_de_entrenamiento(db, user_id)
+        logger.info(f"📊 Tareas completadas encontradas para entrenamiento: {len(tareas)}")
+
+        if len(tareas) < MIN_TRAINING_TASKS:
+            logger.warning(f"⚠️ Insuficientes tareas completadas ({len(tareas)}/{MIN_TRAINING_TASKS}). No se entrenará ML.")
+            return None, None, None
+
+        datos = [caracteristicas(task) for task in tareas]
+        objetivos = prioridades_objetivo(db, user_id, tareas)
+
+        return tareas, pd.DataFrame(datos, columns=FEATURE_NAMES), np.array(objetivos)
+
+    except Exception as e:
+        logger.error(f"❌ Error en cargar_dataset: {e}")
+        logger.error(traceback.format_exc())
+        return None, None, None
+
+
+# Multiplicadores del sistema de reglas
+REGLAS_PRIORIDAD = {"high": 3.0, "medium": 2.0, "low": 1.0}
+REGLAS_URGENCIA = {"high": 1.4, "medium": 1.1, "low": 1.0}
+REGLAS_IMPACTO = {"high": 1.3, "medium": 1.1, "low": 1.0}
+
+
+def puntaje_por_reglas(task) -> float:
+    """Puntaje heurístico de una tarea (sin ajustes de contexto ni feedback)"""
+    puntaje = REGLAS_PRIORIDAD.get(task.priority_level or "medium", 2.0)
+    flags = keyword_matcher.classify(task.title, task.description)
+
+    # Ajuste por palabras clave en título
+    if "titulo_critico" in flags:
+        puntaje *= 1.8
+        logger.debug(f"🔧 Palabra clave crítica en título: {task.title}")
+    # Ajuste por palabras clave en descripción
+    elif "descripcion_urgente" in flags:
+        puntaje *= 1.5
+        logger.debug(f"❗ Palabra clave urgente en descripción: {task.title}")
+
+    # Ajuste por metadatos
+    puntaje *= REGLAS_URGENCIA.get(task.urgency or "medium", 1.0)
+    puntaje *= REGLAS_IMPACTO.get(task.impact or "medium", 1.0)
+
+    # Ajuste por deadline
+    if task.deadline:
+        dias = (task.deadline - datetime.now()).days
+        if dias < 0:
+            puntaje *= 2.5
+            logger.debug(f"🚨 Deadline vencido: {task.title}")
+        elif dias == 0:
+            puntaje *= 2.0
+            logger.debug(f"⏳ Deadline hoy: {task.title}")
+        elif dias <= 1:
+            puntaje *= 1.7
+            logger.debug(f"📅 Deadline mañana: {task.title}")
+        elif dias <= 3:
+            puntaje *= 1.3
+            logger.debug(f"📅 Deadline en 3 días: {task.title}")
+
+    return float(puntaje)
+
+
+# Cortes fijos de los puntos de referencia (0-6): < 2 baja, < 4 media, resto alta
+REFERENCIA_CORTES = (2.0, 4.0)
+
+
+def nivel_por_reglas(task) -> int:
+    """
+    Nivel de prioridad (1, 2, 3) de las reglas como referencia para evaluar el modelo.
+    No usa priority_level (es la etiqueta cuando no hay feedback) y mide el deadline
+    desde completed_at: en una tarea completada la distancia a ahora siempre es negativa.
+    """
+    puntos = URGENCIA_MAP.get(_normalizar_nivel(task.urgency), 1) + IMPACTO_MAP.get(_normalizar_nivel(task.impact), 1)
+    flags = keyword_matcher.classify(task.title, task.description)
+    if "titulo_critico" in flags or "descripcion_urgente" in flags:
+        puntos += 1
+    if task.deadline:
+        referencia = getattr(task, "completed_at", None) or datetime.now()
+        dias = (task.deadline - referencia).days
+        if dias <= 0:
+            puntos += 1
+        elif dias <= 3:
+            puntos += 0.5
+    return 1 + bisect_right(REFERENCIA_CORTES, puntos)
+
+
+def hiperparametros(params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Hiperparámetros efectivos: los guardados para el usuario sobre los valores por defecto"""
+    return {**DEFAULT_HYPERPARAMETERS, **(params or {})}
+
+
+def entrenar_clasificador(X: np.ndarray, y: np.ndarray,
+                          params: Optional[Dict[str, Any]] = None) -> DecisionTreeClassifier:
+    modelo = DecisionTreeClassifier(random_state=42, **hiperparametros(params))
+    modelo.fit(X, y)
+    return modelo
+
+
+def serializar_modelo(modelo) -> bytes:
+    buffer = BytesIO()
+    joblib.dump(modelo, buffer)
+    return buffer.getvalue()
+
+
 class TaskAgent:
     """
     Agente de priorización con ML robusto y reglas de respaldo.
@@ -44,27 +209,37 @@ class TaskAgent:
         self.db = db
         self.user_id = user_id
         self.modelo = None
-        self.feature_names = [
-            'urgencia_encoded', 'impacto_encoded', 'energia_encoded',
-            'duracion_estimada', 'longitud_descripcion',
-            'tiene_urgente', 'tiene_bug', 'deadline_proximo'
-        ]
+        self.feature_names = FEATURE_NAMES
+        # Origen de las últimas predicciones: "ml", "population" o "rules"
+        self.fuente = "rules"
         logger.info(f"🔄 Inicializando TaskAgent para usuario: {user_id}")
-        self._cargar_modelo()
+        self.tareas_completadas = self.db.query(Task).filter(
+            Task.user_id == self.user_id,
+            Task.status == 'completed'
+        ).count()
+        # Los usuarios sin datos suficientes (la mayoría) no tienen modelo propio: no se busca
+        if self.tareas_completadas >= MIN_TRAINING_TASKS:
+            with AGENT_SECONDS.time("load"):
+                self._cargar_modelo()
 
     def _cargar_modelo(self):
         """Carga el modelo ML más reciente y activo del usuario"""
         try:
             logger.info("🔍 Buscando modelo ML en base de datos...")
-            modelo_db = self.db.query(AIModel).filter(
-                AIModel.user_id == self.user_id,
-                AIModel.is_active == True
-            ).order_by(AIModel.trained_at.desc()).first()
-
-            if modelo_db and modelo_db.model_data and len(modelo_db.model_data) > 0:
-                logger.info(f"✅ Modelo encontrado ({len(modelo_db.model_data)} bytes)")
+            activo = ModelRegistry.load_active(self.db, self.user_id, MODEL_TYPE)
+            metricas = (activo.accuracy_metrics or {}) if activo else {}
+
+            if activo and metricas.get("beats_rules") is False:
+                # La evaluación fuera de línea mostró que las reglas aciertan más
+                logger.info(
+                    f"📉 Modelo descartado: precisión {metricas.get('model_accuracy')} "
+                    f"< reglas {metricas.get('rules_accuracy')}. Se usará sistema de reglas."
+                )
+                self.modelo = None
+            elif activo and activo.model_data:
+                logger.info(f"✅ Modelo encontrado ({len(activo.model_data)} bytes)")
                 try:
-                    buffer = BytesIO(modelo_db.model_data)
+                    buffer = BytesIO(activo.model_data)
                     self.modelo = joblib.load(buffer)
                     logger.info(f"✅ Modelo cargado exitosamente: {type(self.modelo)}")
                 except Exception as e:
@@ -82,59 +257,16 @@ class TaskAgent:
 
     def _preparar_datos_entrenamiento(self):
         """Prepara datos de tareas completadas para entrenamiento"""
-        try:
-            tareas = self.db.query(Task).filter(
-                Task.user_id == self.user_id,
-                Task.status == 'completed'
-            ).all()
-            logger.info(f"📊 Tareas completadas encontradas para entrenamiento: {len(tareas)}")
-
-            if len(tareas) < 3:
-                logger.warning(f"⚠️ Insuficientes tareas completadas ({len(tareas)}/3). No se entrenará ML.")
-                return None, None
-
-            datos = []
-            objetivos = []
-            
-            for task in tareas:
-                # Obtener feedback para esta tarea
-                feedback = self.db.query(MLFeedback).filter(
-                    MLFeedback.task_id == task.id,
-                    MLFeedback.actual_priority.isnot(None)
-                ).order_by(MLFeedback.created_at.desc()).first()
-                
-                # Determinar prioridad objetivo
-                prioridad_objetivo = feedback.actual_priority if feedback else task.priority_level
-                prioridad_objetivo = _normalizar_nivel(prioridad_objetivo)
-                
-                # Calcular si tiene deadline próximo
-                deadline_proximo = 0
-                if task.deadline:
-                    dias = (task.deadline - datetime.now()).days
-                    deadline_proximo = 1 if dias <= 1 else 0
-                
-                dato = {
-                    "urgencia_encoded": URGENCIA_MAP.get(_normalizar_nivel(task.urgency), 1),
-                    "impacto_encoded": IMPACTO_MAP.get(_normalizar_nivel(task.impact), 1),
-                    "energia_encoded": ENERGIA_MAP.get(_normalizar_nivel(task.energy_required), 1),
-                    "duracion_estimada": float(task.estimated_duration or 60),
-                    "longitud_descripcion": len(task.description or ""),
-                    "tiene_urgente": 1 if "urgent" in (task.description or "").lower() or "crític" in (task.title or "").lower() else 0,
-                    "tiene_bug": 1 if "bug" in (task.title or "").lower() or "fix" in (task.title or "").lower() else 0,
-                    "deadline_proximo": deadline_proximo
-                }
-                datos.append(dato)
-                objetivos.append(PRIORIDAD_MAP[prioridad_objetivo])
-
-            return pd.DataFrame(datos), np.array(objetivos)
-
-        except Exception as e:
-            logger.error(f"❌ Error en _preparar_datos_entrenamiento: {e}")
-            logger.error(traceback.format_exc())
-            return None, None
+        return preparar_datos_entrenamiento(self.db, self.user_id)
 
     def entrenar_modelo_prioridad(self) -> bool:
         """Entrena un modelo con DecisionTreeClassifier"""
+        with AGENT_SECONDS.time("train"):
+            return self._entrenar_modelo_prioridad()
+
+    def _entrenar_modelo_prioridad(self) -> bool:
+        # El dataset ya incluye el feedback sin consumir; se consume al guardar el modelo
+        leido_en = instante_de_lectura(self.db)
         X_df, y = self._preparar_datos_entrenamiento()
         if X_df is None or y is None or len(X_df) < 3:
             logger.warning("🧠 No hay suficientes datos para entrenar modelo ML. Usando reglas.")
@@ -146,16 +278,21 @@ class TaskAgent:
             logger.info(f"Dataset de entrenamiento:\n{X_df.head()}")
             logger.info(f"Objetivos (prioridades): {y}")
 
-            # Entrenar modelo
-            self.modelo = DecisionTreeClassifier(
-                max_depth=3,  # Evitar overfitting
-                random_state=42,
-                class_weight="balanced"
-            )
-            self.modelo.fit(X_df.values, y)
+            # Entrenar modelo (con los hiperparámetros de la búsqueda, si los hay)
+            params = ModelRegistry.get_hyperparameters(self.db, self.user_id, MODEL_TYPE)
+            inicio = time.perf_counter()
+            self.modelo = entrenar_clasificador(X_df.values, y, params)
+            duracion_ms = (time.perf_counter() - inicio) * 1000
 
             # Guardar modelo
-            self._guardar_modelo()
+            self.tareas_completadas = len(X_df)
+            self._guardar_modelo({
+                "trigger": "on_demand",
+                "duration_ms": round(duracion_ms, 2),
+                "samples": len(X_df),
+                "features": X_df.shape[1],
+                "hyperparameters": hiperparametros(params)
+            }, feedback_hasta=leido_en)
             logger.info("✅ Modelo entrenado y guardado exitosamente")
             return True
 
@@ -165,37 +302,27 @@ class TaskAgent:
             self.modelo = None
             return False
 
-    def _guardar_modelo(self):
-        """Guarda el modelo en la base de datos"""
+    def _guardar_modelo(self, training_metadata: Dict[str, Any] = None, feedback_hasta: Optional[datetime] = None):
+        """Guarda el modelo y, en la misma transacción, consume el feedback con el que se entrenó"""
         if self.modelo is None:
             logger.warning("⚠️ No se puede guardar: modelo no entrenado.")
             return
 
         try:
-            # Desactivar versiones anteriores
-            self.db.query(AIModel).filter(
-                AIModel.user_id == self.user_id,
-                AIModel.model_type == "priority_predictor_v3"
-            ).update({"is_active": False})
-            self.db.commit()
-
-            # Guardar nuevo modelo
-            buffer = BytesIO()
-            joblib.dump(self.modelo, buffer)
-            modelo_bin = buffer.getvalue()
-
-            nuevo_modelo = AIModel(
-                user_id=self.user_id,
-                model_type="priority_predictor_v3",
-                model_version="3.1",
-                model_data=modelo_bin,
-                is_active=True
+            # Desactiva la versión anterior, deduplica por contenido y aplica la retención
+            modelo_bin = serializar_modelo(self.modelo)
+            model_id = ModelRegistry.register(
+                self.db, self.user_id, MODEL_TYPE, MODEL_VERSION, modelo_bin, training_metadata
             )
-
-            self.db.add(nuevo_modelo)
+            if feedback_hasta is not None:
+                consumir_feedback(self.db, [self.user_id], feedback_hasta)
             self.db.commit()
             logger.info(f"💾 Modelo guardado ({len(modelo_bin)} bytes)")
 
+            # Métricas fuera del camino de la petición (import diferido: evaluation_service usa este módulo)
+            from app.services.evaluation_service import evaluation_queue
+            evaluation_queue.submit([model_id])
+
         except Exception as e:
             logger.error(f"❌ Error al guardar el modelo: {e}")
             logger.error(traceback.format_exc())
@@ -265,45 +392,11 @@ class TaskAgent:
     def _prioridad_por_reglas(self, tasks: List[Task]) -> List[Dict[str, Any]]:
         """Sistema de respaldo basado en reglas heurísticas"""
         logger.info("📋 Usando sistema de reglas para priorización (no hay suficientes datos para ML)")
-        prioridad_map = {"high": 3.0, "medium": 2.0, "low": 1.0}
-        urgencia_map = {"high": 1.4, "medium": 1.1, "low": 1.0}
-        impacto_map = {"high": 1.3, "medium": 1.1, "low": 1.0}
+        self.fuente = "rules"
 
         resultados = []
         for task in tasks:
-            puntaje = prioridad_map.get(task.priority_level or "medium", 2.0)
-            titulo = (task.title or "").lower()
-            desc = (task.description or "").lower()
-
-            # Ajuste por palabras clave en título
-            if any(w in titulo for w in ['bug', 'fix', 'crític', 'urgent', 'hotfix', 'error', 'caído', 'seguridad']):
-                puntaje *= 1.8
-                logger.debug(f"🔧 Palabra clave crítica en título: {task.title}")
-            # Ajuste por palabras clave en descripción
-            elif any(w in desc for w in ['urgent', 'important', 'critical', 'importante', 'crític']):
-                puntaje *= 1.5
-                logger.debug(f"❗ Palabra clave urgente en descripción: {task.title}")
-
-            # Ajuste por metadatos
-            puntaje *= urgencia_map.get(task.urgency or "medium", 1.0)
-            puntaje *= impacto_map.get(task.impact or "medium", 1.0)
-
-            # Ajuste por deadline
-            if task.deadline:
-                dias = (task.deadline - datetime.now()).days
-                if dias < 0:
-                    puntaje *= 2.5
-                    logger.debug(f"🚨 Deadline vencido: {task.title}")
-                elif dias == 0:
-                    puntaje *= 2.0
-                    logger.debug(f"⏳ Deadline hoy: {task.title}")
-                elif dias <= 1:
-                    puntaje *= 1.7
-                    logger.debug(f"📅 Deadline mañana: {task.title}")
-                elif dias <= 3:
-                    puntaje *= 1.3
-                    logger.debug(f"📅 Deadline en 3 días: {task.title}")
-
+            puntaje = puntaje_por_reglas(task)
             resultados.append({
                 'task_obj': task,
                 'puntaje_ml': float(puntaje),
@@ -318,74 +411,50 @@ class TaskAgent:
         if not tasks:
             return []
 
-        # Verificar si hay suficientes datos para ML
-        completed_count = self.db.query(Task).filter(
-            Task.user_id == self.user_id,
-            Task.status == 'completed'
-        ).count()
+        with AGENT_SECONDS.time("predict"):
+            resultados = self._predecir_prioridad_tareas(tasks)
+        PREDICTIONS.inc(self.fuente)
+        PREDICTED_TASKS.inc(self.fuente, amount=len(tasks))
+        return resultados
+
+    def _predecir_prioridad_tareas(self, tasks: List[Task]) -> List[Dict[str, Any]]:
+        completed_count = self.tareas_completadas
         logger.info(f"✅ Tareas completadas disponibles: {completed_count}")
 
-        # Si no hay suficientes datos o modelo no cargado, usar reglas
-        if self.modelo is None or completed_count < 3:
-            logger.warning(f"🧠 Usando sistema de reglas (modelo no disponible o solo {completed_count}/3 tareas completadas)")
-            return self._prioridad_por_reglas(tasks)
+        modelo, ajuste = self.modelo, 0.0
+        if modelo is None or completed_count < MIN_TRAINING_TASKS:
+            # Arranque en frío: modelo poblacional residente en memoria (import diferido:
+            # population_model usa este módulo), si existe y supera a las reglas
+            from app.services.population_model import population_models
+            modelo = population_models.get(self.db)
+            if modelo is None:
+                logger.warning(f"🧠 Usando sistema de reglas (modelo no disponible o solo {completed_count}/{MIN_TRAINING_TASKS} tareas completadas)")
+                return self._prioridad_por_reglas(tasks)
+            ajuste = population_models.residual(self.db, self.user_id, modelo) if completed_count else 0.0
+            self.fuente = "population"
+            logger.info(f"🌍 Usando modelo poblacional (ajuste del usuario: {ajuste:+.2f})")
+        else:
+            self.fuente = "ml"
 
         try:
             logger.info("🤖 Usando modelo ML para predicción")
-            datos_pred = []
-            
-            for task in tasks:
-                # Calcular si tiene deadline próximo
-                deadline_proximo = 0
-                if task.deadline:
-                    dias = (task.deadline - datetime.now()).days
-                    deadline_proximo = 1 if dias <= 1 else 0
-                
-                d = {
-                    'task_obj': task,
-                    'urgencia_encoded': URGENCIA_MAP.get(_normalizar_nivel(task.urgency), 1),
-                    'impacto_encoded': IMPACTO_MAP.get(_normalizar_nivel(task.impact), 1),
-                    'energia_encoded': ENERGIA_MAP.get(_normalizar_nivel(task.energy_required), 1),
-                    'duracion_estimada': float(task.estimated_duration or 60),
-                    'longitud_descripcion': len(task.description or ""),
-                    'tiene_urgente': 1 if "urgent" in (task.description or "").lower() or "crític" in (task.title or "").lower() else 0,
-                    'tiene_bug': 1 if "bug" in (task.title or "").lower() or "fix" in (task.title or "").lower() else 0,
-                    'deadline_proximo': deadline_proximo
-                }
-                datos_pred.append(d)
-
-            # Preparar datos para predicción
-            X_pred = []
-            for d in datos_pred:
-                x = [
-                    d['urgencia_encoded'],
-                    d['impacto_encoded'],
-                    d['energia_encoded'],
-                    d['duracion_estimada'],
-                    d['longitud_descripcion'],
-                    d['tiene_urgente'],
-                    d['tiene_bug'],
-                    d['deadline_proximo']
-                ]
-                X_pred.append(x)
-
-            X_pred = np.array(X_pred)
+            X_pred = np.array([caracteristicas(task) for task in tasks])
             logger.info(f"📊 Datos para predicción (shape: {X_pred.shape}):\n{X_pred}")
 
             # Realizar predicciones
-            predicciones = self.modelo.predict(X_pred)
+            predicciones = modelo.predict(X_pred)
             logger.info(f"🎯 Predicciones del modelo (niveles de prioridad): {predicciones}")
 
-            # Convertir a puntajes (1, 2, 3)
+            # Convertir a puntajes (1, 2, 3, desplazados por el residuo del usuario en arranque en frío)
             resultados = []
-            for i, d in enumerate(datos_pred):
-                puntaje = float(predicciones[i])  # Ya es 1, 2 o 3
+            for task, prediccion in zip(tasks, predicciones):
+                puntaje = float(min(max(prediccion + ajuste, 1.0), 3.0))
                 resultados.append({
-                    'task_obj': d['task_obj'],
+                    'task_obj': task,
                     'puntaje_ml': puntaje,
-                    'titulo': d['task_obj'].title
+                    'titulo': task.title
                 })
-                logger.info(f"📈 Tarea '{d['task_obj'].title[:20]}': prioridad ML = {puntaje:.0f}")
+                logger.info(f"📈 Tarea '{task.title[:20]}': prioridad ML = {puntaje:.2f}")
 
             # Aplicar post-procesamiento
             resultados = self._post_procesamiento(resultados)
@@ -402,20 +471,5 @@ class TaskAgent:
             return self._prioridad_por_reglas(tasks)
 
     def recomendar_horario(self, task: Task) -> str:
-        """Recomienda hora basado en energía y tipo de tarea"""
-        try:
-            energia = task.energy_required or "medium"
-            titulo = (task.title or "").lower()
-            
-            if energia == "high" or any(w in titulo for w in ['bug', 'fix', 'critical', 'error', 'caído', 'seguridad']):
-                return "08:00"
-            elif 10 <= datetime.now().hour < 15 and energia == "medium":
-                return "12:00"
-            elif energia == "medium":
-                return "14:00"
-            else:
-                return "16:00"
-        except Exception as e:
-            logger.error(f"❌ Error en recomendar_horario: {e}")
-            logger.error(traceback.format_exc())
-            return "10:00"
\ No newline at end of file
+        """Recomienda hora usando el perfil de energía del usuario (o reglas si no hay datos)"""
+        return recomendar_horarios(self.db, self.user_id, [task])[0][0]
@@ -0,0 +1,115 @@
+import hashlib
+from urllib.parse import urlencode
+from typing import Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+from fastapi import Request, Response
+from sqlalchemy import event, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.database import record_user_writes
+from app.models.database_models import Task, Category, MLFeedback, AIModel, CollectionVersion
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Modelos cuya escritura invalida la colección del usuario
+VERSIONED_MODELS = {
+    Task: "tasks",
+    Category: "categories",
+    MLFeedback: "ml_feedback",
+    AIModel: "ai_models",
+}
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_collection_versions(session: Session, flush_context):
+    """
+    Incrementa el contador de versión de cada colección tocada en el flush.
+    Se ejecuta en la misma transacción que la escritura, así que la versión
+    nunca queda adelantada ni atrasada respecto a los datos.
+    """
+    touched = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        collection = VERSIONED_MODELS.get(type(obj))
+        user_id = getattr(obj, "user_id", None)
+        if collection is None or user_id is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        touched.add((user_id, collection))
+
+    bump_collection_versions(session, touched)
+
+
+def bump_collection_versions(session: Session, touched: Iterable[Tuple[UUID, str]]):
+    """
+    Incrementa las versiones (user_id, colección) indicadas. Las escrituras en bloque
+    (insert/update de Core) no pasan por after_flush y deben llamarlo explícitamente.
+    """
+    touched = set(touched)
+    if not touched:
+        return
+    record_user_writes(session, (user_id for user_id, _ in touched))
+
+    # Orden estable para evitar deadlocks entre transacciones concurrentes
+    rows = [{"user_id": u, "collection": c, "version": 1} for u, c in sorted(touched, key=lambda x: (str(x[0]), x[1]))]
+    stmt = insert(CollectionVersion).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CollectionVersion.user_id, CollectionVersion.collection],
+        set_={"version": CollectionVersion.version + 1, "updated_at": func.current_timestamp()}
+    )
+    session.connection().execute(stmt)
+
+
+def get_collection_versions(db: Session, user_id: UUID, collections: Iterable[str]) -> Dict[str, int]:
+    """Versión actual de cada colección del usuario (0 si nunca se escribió)"""
+    collections = list(collections)
+    rows = db.query(CollectionVersion.collection, CollectionVersion.version).filter(
+        CollectionVersion.user_id == user_id,
+        CollectionVersion.collection.in_(collections)
+    ).all()
+    versions = {collection: 0 for collection in collections}
+    versions.update({collection: version for collection, version in rows})
+    return versions
+
+
+def collection_etag(db: Session, user_id: UUID, collections: Iterable[str], extra: str = "") -> str:
+    """ETag débil derivado de las versiones de las colecciones y de un discriminador extra"""
+    versions = get_collection_versions(db, user_id, collections)
+    raw = f"{user_id}|" + "|".join(f"{c}:{v}" for c, v in sorted(versions.items())) + f"|{extra}"
+    return 'W/"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Devuelve un 304 si el cliente ya tiene la versión indicada por el ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    # La comparación débil ignora el prefijo W/
+    weak = etag[2:] if etag.startswith("W/") else etag
+    if "*" in candidates or etag in candidates or weak in candidates:
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def query_discriminator(request: Request) -> str:
+    """Query string normalizada (parámetros ordenados) para que cada página/filtro tenga su ETag"""
+    return urlencode(sorted(request.query_params.multi_items()))
+
+
+def check_collection_etag(request: Request, db: Session, user_id: UUID,
+                          collections: Iterable[str], extra: str = "") -> Tuple[str, Optional[Response]]:
+    """
+    Calcula el ETag de las colecciones y, si coincide con If-None-Match, el 304 a devolver.
+    El ETag incluye la query string normalizada: skip, limit o status distintos dan
+    respuestas distintas y no pueden compartir validador.
+    """
+    etag = collection_etag(db, user_id, collections, f"{query_discriminator(request)}|{extra}")
+    return etag, not_modified(request, etag)
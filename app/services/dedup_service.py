@@ -0,0 +1,113 @@
+import hashlib
+import random
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Task, TaskDedupBand
+import logging
+
+logger = logging.getLogger(__name__)
+
+# MinHash de 32 permutaciones en 8 bandas de 4 filas: umbral LSH ≈ 0.6 de Jaccard
+NUM_PERM = 32
+BANDS = 8
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+SIMILARITY_THRESHOLD = 0.6
+MAX_CANDIDATES = 50
+
+# Estados en los que una tarea sigue "abierta" y puede duplicarse
+OPEN_STATUSES = ['pending', 'in_progress', 'postponed']
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def normalizar_titulo(title: Optional[str]) -> str:
+    """Minúsculas, sin acentos ni signos de puntuación y con espacios colapsados"""
+    text = unicodedata.normalize("NFKD", (title or "").lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def shingles(title: Optional[str]) -> Set[str]:
+    text = normalizar_titulo(title)
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def band_hashes(shingle_set: Set[str]) -> List[int]:
+    """Firma MinHash agrupada en bandas; cada banda se reduce a un BIGINT con signo"""
+    if not shingle_set:
+        return []
+    base = [_hash64(s) for s in shingle_set]
+    signature = [min((a * h + b) % _MERSENNE_PRIME for h in base) for a, b in _PERMUTATIONS]
+    hashes = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(f"{band}:{rows}".encode("ascii"), digest_size=8).digest()
+        hashes.append(int.from_bytes(digest, "big", signed=True))
+    return hashes
+
+
+class DuplicateDetector:
+    @staticmethod
+    def index_task(db: Session, task: Task):
+        """(Re)indexa las bandas del título de una tarea; se confirma con el commit del llamador"""
+        db.query(TaskDedupBand).filter(TaskDedupBand.task_id == task.id).delete(synchronize_session=False)
+        for band, band_hash in enumerate(band_hashes(shingles(task.title))):
+            db.add(TaskDedupBand(task_id=task.id, band=band, user_id=task.user_id, band_hash=band_hash))
+
+    @staticmethod
+    def find_candidates(db: Session, user_id: UUID, title: str,
+                        exclude_ids: Optional[Iterable[UUID]] = None) -> List[UUID]:
+        """
+        IDs de tareas abiertas del usuario con título casi igual, de más a menos parecida.
+        Solo consulta las tareas que comparten al menos una banda LSH (búsqueda por índice).
+        """
+        shingle_set = shingles(title)
+        hashes = band_hashes(shingle_set)
+        if not hashes:
+            return []
+
+        rows = db.query(Task.id, Task.title).join(
+            TaskDedupBand, TaskDedupBand.task_id == Task.id
+        ).filter(
+            TaskDedupBand.user_id == user_id,
+            TaskDedupBand.band_hash.in_(hashes),
+            Task.status.in_(OPEN_STATUSES)
+        ).distinct().limit(MAX_CANDIDATES).all()
+
+        excluded = set(exclude_ids or ())
+        scored = []
+        for task_id, candidate_title in rows:
+            if task_id in excluded:
+                continue
+            similarity = jaccard(shingle_set, shingles(candidate_title))
+            if similarity >= SIMILARITY_THRESHOLD:
+                scored.append((similarity, task_id))
+
+        scored.sort(key=lambda x: x[0], reverse=True)
+        if scored:
+            logger.info(f"🪞 {len(scored)} posibles duplicados para '{title[:30]}'")
+        return [task_id for _, task_id in scored]
@@ -0,0 +1,104 @@
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.database import record_user_writes
+from app.models.database_models import EnergyRollupHourly, EnergyRollupDaily
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Valor numérico de cada nivel para promedios
+ENERGY_VALUES = {"low": 1, "medium": 2, "high": 3}
+
+# Clave de session.info con los cambios pendientes para los perfiles en caché
+PROFILE_UPDATES_KEY = "energy_profile_updates"
+
+
+class EnergyRollupService:
+    @staticmethod
+    def apply(db: Session, user_id: UUID, logged_at: Optional[datetime], energy_level: str, delta: int):
+        """
+        Suma (delta=+1) o resta (delta=-1) un registro en los agregados del usuario.
+        Se ejecuta en la transacción del llamador, junto con la escritura del log.
+        """
+        if logged_at is None or energy_level not in ENERGY_VALUES:
+            return
+
+        count_column = f"{energy_level}_count"
+        counts = {"low_count": 0, "medium_count": 0, "high_count": 0}
+        counts[count_column] = delta
+        hourly = insert(EnergyRollupHourly).values(
+            user_id=user_id,
+            weekday=logged_at.weekday(),
+            hour=logged_at.hour,
+            **counts
+        )
+        hourly = hourly.on_conflict_do_update(
+            index_elements=[EnergyRollupHourly.user_id, EnergyRollupHourly.weekday, EnergyRollupHourly.hour],
+            set_={count_column: getattr(EnergyRollupHourly, count_column) + delta}
+        )
+
+        daily = insert(EnergyRollupDaily).values(
+            user_id=user_id,
+            day=logged_at.date(),
+            log_count=delta,
+            energy_sum=ENERGY_VALUES[energy_level] * delta
+        )
+        daily = daily.on_conflict_do_update(
+            index_elements=[EnergyRollupDaily.user_id, EnergyRollupDaily.day],
+            set_={
+                "log_count": EnergyRollupDaily.log_count + delta,
+                "energy_sum": EnergyRollupDaily.energy_sum + ENERGY_VALUES[energy_level] * delta
+            }
+        )
+
+        db.execute(hourly)
+        db.execute(daily)
+        record_user_writes(db, [user_id])
+        db.info.setdefault(PROFILE_UPDATES_KEY, []).append((user_id, logged_at, energy_level, delta))
+
+    @staticmethod
+    def summary(db: Session, user_id: UUID, start_date: Optional[date] = None,
+                end_date: Optional[date] = None) -> Dict[str, Any]:
+        """Resumen de energía leído de los agregados: O(buckets), sin recorrer los logs"""
+        hourly_rows = db.query(EnergyRollupHourly).filter(
+            EnergyRollupHourly.user_id == user_id
+        ).order_by(EnergyRollupHourly.weekday, EnergyRollupHourly.hour).all()
+
+        hourly = []
+        for row in hourly_rows:
+            total = row.low_count + row.medium_count + row.high_count
+            if total <= 0:
+                continue
+            hourly.append({
+                "weekday": row.weekday,
+                "hour": row.hour,
+                "low": row.low_count,
+                "medium": row.medium_count,
+                "high": row.high_count,
+                "average": round((row.low_count + 2 * row.medium_count + 3 * row.high_count) / total, 3)
+            })
+
+        daily_query = db.query(EnergyRollupDaily).filter(
+            EnergyRollupDaily.user_id == user_id,
+            EnergyRollupDaily.log_count > 0
+        )
+        if start_date:
+            daily_query = daily_query.filter(EnergyRollupDaily.day >= start_date)
+        if end_date:
+            daily_query = daily_query.filter(EnergyRollupDaily.day <= end_date)
+
+        daily = [
+            {"date": row.day, "count": row.log_count, "average": round(row.energy_sum / row.log_count, 3)}
+            for row in daily_query.order_by(EnergyRollupDaily.day).all()
+        ]
+
+        return {
+            "total_logs": sum(b["low"] + b["medium"] + b["high"] for b in hourly),
+            "hourly": hourly,
+            "daily": daily
+        }
@@ -0,0 +1,190 @@
+import threading
+import time
+from datetime import datetime
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import KFold, StratifiedKFold, cross_val_score
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.database_models import AIModel
+from app.services.collection_versions import bump_collection_versions
+from app.services.ai_service import FEATURE_NAMES, MIN_TRAINING_TASKS, cargar_dataset, nivel_por_reglas
+from app.utils.process_pool import run_bounded, worker_pool
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fracción más reciente (por fecha de completado) reservada como holdout
+HOLDOUT_FRACTION = 0.2
+MIN_HOLDOUT = 3
+MAX_CV_FOLDS = 5
+# Modelos por lote enviado a cada worker
+EVALUATION_CHUNK = 20
+
+
+def cv_splitter(y: np.ndarray):
+    """Folds estratificados si cada clase tiene al menos 2 ejemplos; si no, KFold simple"""
+    _, counts = np.unique(y, return_counts=True)
+    folds = min(MAX_CV_FOLDS, int(counts.min()))
+    if folds >= 2:
+        return StratifiedKFold(n_splits=folds, shuffle=True, random_state=42), folds
+    folds = min(MAX_CV_FOLDS, len(y))
+    if folds >= 2:
+        return KFold(n_splits=folds, shuffle=True, random_state=42), folds
+    return None, 0
+
+
+def evaluar_modelo(db: Session, model_id: UUID) -> Optional[Dict[str, Any]]:
+    """
+    Evalúa un modelo guardado contra el dataset actual de su usuario y guarda
+    accuracy_metrics y feature_weights en la fila. El modelo se compara con
+    las reglas sobre el mismo holdout (o sobre todo el dataset si es pequeño).
+    """
+    started = time.perf_counter()
+    row = db.query(AIModel.user_id, AIModel.model_data).filter(AIModel.id == model_id).first()
+    if row is None or not row.model_data:
+        return None
+
+    modelo = joblib.load(BytesIO(row.model_data))
+    tareas, X_df, y = cargar_dataset(db, row.user_id)
+    if X_df is None:
+        return None
+    X = X_df.values
+    reglas = np.array([nivel_por_reglas(task) for task in tareas])
+
+    metrics: Dict[str, Any] = {"samples": int(len(y))}
+
+    # Validación cruzada con los mismos hiperparámetros del modelo guardado
+    cv, folds = cv_splitter(y)
+    if cv is not None:
+        scores = cross_val_score(clone(modelo), X, y, cv=cv, scoring="accuracy")
+        metrics.update({
+            "cv_folds": folds,
+            "cv_accuracy_mean": round(float(scores.mean()), 4),
+            "cv_accuracy_std": round(float(scores.std()), 4)
+        })
+
+    # Holdout temporal: se entrena con lo más antiguo y se prueba con lo más reciente
+    holdout = int(round(len(y) * HOLDOUT_FRACTION))
+    if holdout >= MIN_HOLDOUT and len(y) - holdout >= MIN_TRAINING_TASKS:
+        candidato = clone(modelo).fit(X[:-holdout], y[:-holdout])
+        metrics.update({
+            "holdout_size": holdout,
+            "holdout_accuracy": round(float((candidato.predict(X[-holdout:]) == y[-holdout:]).mean()), 4),
+            "rules_holdout_accuracy": round(float((reglas[-holdout:] == y[-holdout:]).mean()), 4)
+        })
+        model_accuracy = metrics["holdout_accuracy"]
+        rules_accuracy = metrics["rules_holdout_accuracy"]
+    else:
+        # Dataset pequeño: validación cruzada frente a las reglas sobre todo el dataset
+        model_accuracy = metrics.get("cv_accuracy_mean")
+        rules_accuracy = round(float((reglas == y).mean()), 4)
+
+    metrics.update({
+        "rules_accuracy": rules_accuracy,
+        "model_accuracy": model_accuracy,
+        "beats_rules": None if model_accuracy is None else bool(model_accuracy >= rules_accuracy),
+        "evaluated_at": datetime.now().isoformat(timespec="seconds"),
+        "evaluation_ms": round((time.perf_counter() - started) * 1000, 2)
+    })
+    feature_weights = {
+        name: round(float(weight), 4)
+        for name, weight in zip(FEATURE_NAMES, getattr(modelo, "feature_importances_", []))
+    }
+
+    db.execute(
+        update(AIModel).where(AIModel.id == model_id).values(
+            accuracy_metrics=metrics,
+            feature_weights=feature_weights
+        )
+    )
+    # El update de Core no pasa por after_flush: beats_rules puede cambiar el puntaje de /prioritized
+    bump_collection_versions(db, [(row.user_id, "ai_models")])
+    return metrics
+
+
+def _evaluar_lote(model_ids: List[UUID]) -> Tuple[int, int]:
+    """Se ejecuta en un worker: evalúa y guarda cada modelo (lee del primario: el modelo es nuevo)"""
+    db = SessionLocal()
+    evaluados, errores = 0, 0
+    try:
+        for model_id in model_ids:
+            try:
+                metrics = evaluar_modelo(db, model_id)
+                db.commit()
+                if metrics is not None:
+                    evaluados += 1
+                    logger.info(
+                        f"📏 Modelo {model_id}: precisión {metrics['model_accuracy']} "
+                        f"vs reglas {metrics['rules_accuracy']}"
+                    )
+            except Exception as e:
+                errores += 1
+                db.rollback()
+                logger.error(f"❌ Error evaluando el modelo {model_id}: {e}")
+            finally:
+                db.expunge_all()
+    finally:
+        db.close()
+    return evaluados, errores
+
+
+def evaluar_en_lote(executor, model_ids: List[UUID], max_in_flight: int = 1) -> Dict[str, int]:
+    """Evalúa muchos modelos con un pool ya creado (p. ej. el del reentrenamiento nocturno) o en línea si es None"""
+    stats = {"evaluated": 0, "errors": 0}
+    lotes = ((model_ids[i:i + EVALUATION_CHUNK],) for i in range(0, len(model_ids), EVALUATION_CHUNK))
+    if executor is None:
+        resultados = ((args, _evaluar_lote(*args), None) for args in lotes)
+    else:
+        resultados = run_bounded(executor, _evaluar_lote, lotes, max_in_flight)
+    for (ids,), resultado, error in resultados:
+        if error is not None:
+            stats["errors"] += len(ids)
+            logger.error(f"❌ Lote de evaluación de {len(ids)} modelos falló: {error}")
+            continue
+        stats["evaluated"] += resultado[0]
+        stats["errors"] += resultado[1]
+    return stats
+
+
+class EvaluationQueue:
+    """
+    Evaluación fuera del camino de la petición: tras entrenar, la API encola el
+    modelo y un pool de procesos propio (creado al primer uso) lo evalúa.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, model_ids: List[UUID]):
+        if not model_ids or settings.EVALUATION_WORKERS <= 0:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = worker_pool(settings.EVALUATION_WORKERS)
+            future = self._executor.submit(_evaluar_lote, list(model_ids))
+        future.add_done_callback(self._log_result)
+
+    @staticmethod
+    def _log_result(future):
+        error = future.exception()
+        if error is not None:
+            logger.error(f"❌ Evaluación en segundo plano falló: {error}")
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+evaluation_queue = EvaluationQueue()
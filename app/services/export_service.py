@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.database import read_session_for
+from app.models.database_models import Task, TaskHistory, EnergyLog, MLFeedback
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Filas que se piden al cursor del servidor en cada viaje
+EXPORT_CHUNK_SIZE = 1000
+
+# Columnas exportadas por cada conjunto de datos (siempre filtradas por user_id)
+EXPORT_DATASETS = {
+    "tasks": (Task, [
+        Task.id, Task.category_id, Task.title, Task.description, Task.urgency, Task.impact,
+        Task.estimated_duration, Task.deadline, Task.priority_score, Task.priority_level,
+        Task.completion_probability, Task.status, Task.energy_required, Task.created_at,
+        Task.updated_at, Task.completed_at, Task.actual_duration
+    ]),
+    "task_history": (TaskHistory, [
+        TaskHistory.id, TaskHistory.task_id, TaskHistory.change_type, TaskHistory.old_values,
+        TaskHistory.new_values, TaskHistory.change_description, TaskHistory.created_at
+    ]),
+    "energy_logs": (EnergyLog, [
+        EnergyLog.id, EnergyLog.task_id, EnergyLog.energy_level, EnergyLog.notes, EnergyLog.logged_at
+    ]),
+    "ml_feedback": (MLFeedback, [
+        MLFeedback.id, MLFeedback.task_id, MLFeedback.feedback_type, MLFeedback.was_useful,
+        MLFeedback.actual_priority, MLFeedback.actual_completion_time, MLFeedback.created_at
+    ]),
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return value
+
+
+class ExportService:
+    @staticmethod
+    def stream_export(dataset: str, fmt: str, user_id: UUID) -> Iterator[bytes]:
+        """
+        Genera el export por bloques usando un cursor del lado del servidor.
+        Abre su propia sesión porque el generador se consume después de que
+        el endpoint ya devolvió la respuesta; la memoria usada es constante
+        (un bloque de EXPORT_CHUNK_SIZE filas) sin importar el total de filas.
+        """
+        model, columns = EXPORT_DATASETS[dataset]
+        keys = [column.key for column in columns]
+        stmt = select(*columns).where(model.user_id == user_id)
+
+        db = read_session_for(user_id)
+        try:
+            result = db.execute(stmt, execution_options={"yield_per": EXPORT_CHUNK_SIZE})
+
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(keys)
+                yield buffer.getvalue().encode("utf-8")
+                for partition in result.partitions():
+                    buffer.seek(0)
+                    buffer.truncate(0)
+                    writer.writerows([_csv_value(v) for v in row] for row in partition)
+                    yield buffer.getvalue().encode("utf-8")
+            else:
+                for partition in result.partitions():
+                    chunk = "".join(
+                        json.dumps(dict(zip(keys, row)), default=_json_default) + "\n"
+                        for row in partition
+                    )
+                    yield chunk.encode("utf-8")
+
+            logger.info(f"📦 Export '{dataset}' ({fmt}) completado para usuario {user_id}")
+        finally:
+            db.close()
@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import DateTime, cast, func, null, or_, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.database import record_user_writes
+from app.models.database_models import AIFeedback, FeedbackWatermark, MLFeedback, TaskMLData
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Se relee este margen antes de la marca de agua: un feedback cuya transacción empezó
+# antes pero confirmó después no se pierde (la consolidación es idempotente)
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def _desde_marca():
+    """Condición sobre ml_feedback: posterior a la marca de agua (menos el margen) o sin marca"""
+    return or_(
+        FeedbackWatermark.ml_feedback_at.is_(None),
+        MLFeedback.created_at > FeedbackWatermark.ml_feedback_at - WATERMARK_OVERLAP
+    )
+
+
+def instante_de_lectura(db: Session) -> datetime:
+    """Hora actual del servidor (misma zona que los created_at) antes de leer un dataset de entrenamiento"""
+    return db.execute(select(cast(func.clock_timestamp(), DateTime))).scalar()
+
+
+def _feedback_nuevo(user_ids: List[UUID], hasta: Optional[datetime] = None):
+    """
+    (user_id, task_id, actual_priority, at, ai_feedback_id, marca) del feedback aún no
+    consumido (hasta la hora dada); marca es la marca de agua previa de ml_feedback, para
+    distinguir las filas nuevas de las que se releen por el margen.
+    """
+    ml = select(
+        MLFeedback.user_id, MLFeedback.task_id, MLFeedback.actual_priority,
+        MLFeedback.created_at.label("at"), null().label("ai_feedback_id"),
+        FeedbackWatermark.ml_feedback_at.label("marca")
+    ).outerjoin(
+        FeedbackWatermark, FeedbackWatermark.user_id == MLFeedback.user_id
+    ).where(
+        MLFeedback.user_id.in_(user_ids),
+        _desde_marca()
+    )
+    if hasta is not None:
+        ml = ml.where(MLFeedback.created_at <= hasta)
+    ai = select(
+        AIFeedback.user_id, AIFeedback.task_id, AIFeedback.actual_priority,
+        AIFeedback.feedback_date.label("at"), AIFeedback.id.label("ai_feedback_id"), null().label("marca")
+    ).where(
+        AIFeedback.user_id.in_(user_ids),
+        AIFeedback.used_for_training.isnot(True)
+    )
+    if hasta is not None:
+        ai = ai.where(AIFeedback.feedback_date <= hasta)
+    return union_all(ml, ai)
+
+
+def _mas_recientes(filas: Iterable) -> Dict[UUID, Tuple[str, datetime]]:
+    """Prioridad real más reciente por tarea"""
+    ultimas: Dict[UUID, Tuple[str, datetime]] = {}
+    for fila in filas:
+        if not fila.actual_priority:
+            continue
+        at = fila.at or datetime.min
+        actual = ultimas.get(fila.task_id)
+        if actual is None or at >= actual[1]:
+            ultimas[fila.task_id] = (fila.actual_priority, at)
+    return ultimas
+
+
+def consumir_feedback(db: Session, user_ids: List[UUID], hasta: Optional[datetime] = None) -> int:
+    """
+    Consolida en task_ml_data la prioridad real del feedback nuevo de los usuarios
+    (ml_feedback posterior a su marca de agua y ai_feedback sin usar), marca en bloque
+    ai_feedback.used_for_training y avanza las marcas de agua. Se ejecuta en la
+    transacción del llamador, que debe ser la que guarda el modelo entrenado con ese
+    feedback (hasta = instante_de_lectura del dataset): si el entrenamiento falla, el
+    feedback sigue pendiente. Devuelve cuántos feedbacks nuevos se consumieron: las
+    filas de ml_feedback posteriores a la marca previa y los ai_feedback que se marcaron
+    aquí (las releídas por el margen no cuentan).
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    filas = db.execute(_feedback_nuevo(user_ids, hasta)).all()
+    if not filas:
+        return 0
+
+    record_user_writes(db, (fila.user_id for fila in filas))
+    user_por_tarea = {fila.task_id: fila.user_id for fila in filas}
+    ultimas = _mas_recientes(filas)
+    if ultimas:
+        stmt = insert(TaskMLData).values([
+            {"task_id": task_id, "user_id": user_por_tarea[task_id], "actual_priority": prioridad, "actual_priority_at": at}
+            for task_id, (prioridad, at) in ultimas.items()
+        ])
+        # El feedback más reciente gana aunque el margen relea filas ya consolidadas
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_task_ml_data_task",
+            set_={
+                "actual_priority": stmt.excluded.actual_priority,
+                "actual_priority_at": stmt.excluded.actual_priority_at,
+                "updated_at": func.current_timestamp()
+            },
+            where=or_(
+                TaskMLData.actual_priority_at.is_(None),
+                stmt.excluded.actual_priority_at >= TaskMLData.actual_priority_at
+            )
+        )
+        db.execute(stmt)
+
+    consumidos = sum(
+        1 for fila in filas
+        if fila.ai_feedback_id is None and (fila.marca is None or fila.at is None or fila.at > fila.marca)
+    )
+    ai_ids = [fila.ai_feedback_id for fila in filas if fila.ai_feedback_id is not None]
+    if ai_ids:
+        # Solo cuentan los que esta transacción marca (otro reentrenamiento pudo adelantarse)
+        consumidos += db.execute(
+            update(AIFeedback).where(
+                AIFeedback.id.in_(ai_ids),
+                AIFeedback.used_for_training.isnot(True)
+            ).values(used_for_training=True)
+        ).rowcount
+
+    marcas: Dict[UUID, datetime] = {}
+    for fila in filas:
+        if fila.ai_feedback_id is None and fila.at is not None:
+            marcas[fila.user_id] = max(marcas.get(fila.user_id, fila.at), fila.at)
+    if marcas:
+        stmt = insert(FeedbackWatermark).values([
+            {"user_id": user_id, "ml_feedback_at": at} for user_id, at in marcas.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FeedbackWatermark.user_id],
+            set_={
+                "ml_feedback_at": func.greatest(FeedbackWatermark.ml_feedback_at, stmt.excluded.ml_feedback_at),
+                "consumed_at": func.current_timestamp()
+            }
+        )
+        db.execute(stmt)
+
+    logger.info(f"📥 {consumidos} feedbacks consumidos de {len(user_ids)} usuarios ({len(ultimas)} tareas con prioridad real)")
+    return consumidos
+
+
+def prioridades_reales(db: Session, user_id: UUID, task_ids: List[UUID]) -> Dict[UUID, str]:
+    """
+    Prioridad real por tarea para entrenar: la consolidada en task_ml_data más el
+    feedback aún no consumido. Solo lectura (sirve en la réplica y en los workers).
+    """
+    if not task_ids:
+        return {}
+    consolidadas = db.execute(
+        select(
+            TaskMLData.task_id, TaskMLData.actual_priority, TaskMLData.actual_priority_at.label("at")
+        ).where(
+            TaskMLData.task_id.in_(task_ids),
+            TaskMLData.actual_priority.isnot(None)
+        )
+    ).all()
+    tareas = set(task_ids)
+    nuevas = [fila for fila in db.execute(_feedback_nuevo([user_id])).all() if fila.task_id in tareas]
+    return {task_id: prioridad for task_id, (prioridad, _) in _mas_recientes(list(consolidadas) + nuevas).items()}
+
+
+def feedback_pendiente():
+    """(user_id, pending) con el feedback aún no consumido por usuario, para priorizar el reentrenamiento"""
+    ml = select(MLFeedback.user_id).outerjoin(
+        FeedbackWatermark, FeedbackWatermark.user_id == MLFeedback.user_id
+    ).where(
+        or_(
+            FeedbackWatermark.ml_feedback_at.is_(None),
+            MLFeedback.created_at > FeedbackWatermark.ml_feedback_at
+        )
+    )
+    ai = select(AIFeedback.user_id).where(AIFeedback.used_for_training.isnot(True))
+    pendientes = union_all(ml, ai).subquery()
+    return select(
+        pendientes.c.user_id, func.count().label("pending")
+    ).group_by(pendientes.c.user_id)
+
+
+def contar_feedback_pendiente(db: Session, user_id: UUID) -> int:
+    stmt = feedback_pendiente().subquery()
+    return db.execute(select(stmt.c.pending).where(stmt.c.user_id == user_id)).scalar() or 0
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional
+
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Palabras clave por idioma: flag -> campo ('title' / 'description') -> palabras
+DEFAULT_KEYWORDS = {
+    "en": {
+        "titulo_critico": {"title": ["bug", "fix", "urgent", "hotfix", "error"]},
+        "descripcion_urgente": {"description": ["urgent", "important", "critical"]},
+        "tiene_urgente": {"description": ["urgent"]},
+        "tiene_bug": {"title": ["bug", "fix"]},
+        "horario_temprano": {"title": ["bug", "fix", "critical", "error"]},
+    },
+    "es": {
+        "titulo_critico": {"title": ["crític", "caído", "seguridad"]},
+        "descripcion_urgente": {"description": ["importante", "crític"]},
+        "tiene_urgente": {"title": ["crític"]},
+        "horario_temprano": {"title": ["caído", "seguridad"]},
+    },
+}
+
+FIELDS = ("title", "description")
+
+
+def _merge_keywords(*configs: Dict) -> Dict[str, Dict[str, List[str]]]:
+    merged: Dict[str, Dict[str, List[str]]] = {}
+    for config in configs:
+        for flag, fields in config.items():
+            for field, words in fields.items():
+                bucket = merged.setdefault(flag, {}).setdefault(field, [])
+                bucket.extend(w.lower() for w in words if w.lower() not in bucket)
+    return merged
+
+
+class KeywordMatcher:
+    """
+    Clasificador de palabras clave compilado una sola vez.
+    Cada campo se recorre una única vez con una expresión regular que contiene
+    todas sus palabras; el resultado se guarda en un LRU por hash del contenido.
+    """
+
+    def __init__(self, keywords: Dict[str, Dict[str, List[str]]], cache_size: int = 10000):
+        self.flags = frozenset(keywords)
+        self._patterns = {}
+        self._flags_by_word = {}
+        for field in FIELDS:
+            words = {}
+            for flag, fields in keywords.items():
+                for word in fields.get(field, []):
+                    words.setdefault(word, set()).add(flag)
+            # Una palabra que contiene a otra también activa los flags de la contenida
+            for word in words:
+                for other, other_flags in list(words.items()):
+                    if other != word and other in word:
+                        words[word] |= other_flags
+            if words:
+                # Lookahead para encontrar coincidencias solapadas (mismo resultado que `in`)
+                alternation = "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+                self._patterns[field] = re.compile(f"(?=({alternation}))")
+                self._flags_by_word[field] = {w: frozenset(f) for w, f in words.items()}
+
+        self._cache: "OrderedDict[bytes, FrozenSet[str]]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls) -> "KeywordMatcher":
+        """Construye el clasificador con los idiomas y el archivo de palabras configurados"""
+        configs = [DEFAULT_KEYWORDS[lang] for lang in settings.KEYWORD_LANGUAGES if lang in DEFAULT_KEYWORDS]
+        if settings.KEYWORDS_FILE:
+            with open(settings.KEYWORDS_FILE, encoding="utf-8") as f:
+                configs.append(json.load(f))
+            logger.info(f"🔤 Palabras clave adicionales cargadas desde {settings.KEYWORDS_FILE}")
+        return cls(_merge_keywords(*configs))
+
+    def _scan(self, field: str, text: str) -> FrozenSet[str]:
+        pattern = self._patterns.get(field)
+        if pattern is None or not text:
+            return frozenset()
+        flags_by_word = self._flags_by_word[field]
+        found = set()
+        for match in pattern.finditer(text.lower()):
+            found |= flags_by_word[match.group(1)]
+        return frozenset(found)
+
+    def classify(self, title: Optional[str], description: Optional[str] = None) -> FrozenSet[str]:
+        """Devuelve todos los flags activos para el título y la descripción de una tarea"""
+        title = title or ""
+        description = description or ""
+        key = hashlib.blake2b(f"{title}\x00{description}".encode("utf-8"), digest_size=16).digest()
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        flags = self._scan("title", title) | self._scan("description", description)
+
+        with self._lock:
+            self._cache[key] = flags
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return flags
+
+    def cache_info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+
+# Instancia compartida, construida una vez al importar
+keyword_matcher = KeywordMatcher.from_settings()
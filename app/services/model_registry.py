@@ -0,0 +1,201 @@
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.database_models import AIModel, ModelHyperparameters
+from app.services.collection_versions import bump_collection_versions
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Filas borradas por sentencia durante la compactación (transacciones cortas)
+COMPACTION_BATCH_SIZE = 1000
+
+
+def content_hash(model_data: bytes) -> str:
+    """SHA-256 del binario; coincide con encode(sha256(model_data), 'hex') de la migración"""
+    return hashlib.sha256(model_data).hexdigest()
+
+
+def _por_claves(keys: List[Tuple[Optional[UUID], str]]):
+    """Filtro (user_id, model_type) IN (...); los modelos poblacionales (user_id NULL) no casan con IN"""
+    por_usuario = [key for key in keys if key[0] is not None]
+    poblacionales = [model_type for user_id, model_type in keys if user_id is None]
+    condiciones = []
+    if por_usuario:
+        condiciones.append(tuple_(AIModel.user_id, AIModel.model_type).in_(por_usuario))
+    if poblacionales:
+        condiciones.append(and_(AIModel.user_id.is_(None), AIModel.model_type.in_(poblacionales)))
+    return or_(*condiciones)
+
+
+class ModelRegistry:
+    """
+    Registro de modelos por usuario y tipo sobre ai_models:
+    un único modelo activo, deduplicado por hash de contenido, y como mucho
+    MODEL_RETENTION versiones por usuario y tipo (las inactivas más antiguas se borran).
+    Las operaciones se ejecutan en la transacción del llamador.
+    """
+
+    @staticmethod
+    def load_active(db: Session, user_id: Optional[UUID], model_type: str):
+        """Binario y métricas del modelo activo (user_id None = modelo poblacional)"""
+        return db.execute(
+            select(AIModel.id, AIModel.model_data, AIModel.accuracy_metrics).where(
+                AIModel.user_id == user_id,
+                AIModel.model_type == model_type,
+                AIModel.is_active == True
+            ).order_by(AIModel.trained_at.desc()).limit(1)
+        ).first()
+
+    @staticmethod
+    def register(db: Session, user_id: Optional[UUID], model_type: str, model_version: str,
+                 model_data: bytes, training_metadata: Optional[Dict[str, Any]] = None) -> UUID:
+        """Registra un modelo recién entrenado y devuelve el id de la fila activa"""
+        return ModelRegistry.register_many(db, [{
+            "user_id": user_id,
+            "model_type": model_type,
+            "model_version": model_version,
+            "model_data": model_data,
+            "training_metadata": training_metadata
+        }])[0]
+
+    @staticmethod
+    def register_many(db: Session, rows: List[Dict[str, Any]]) -> List[UUID]:
+        """
+        Registra en bloque (un modelo por usuario y tipo). Si el binario es idéntico a
+        una versión ya guardada (p. ej. el mismo árbol), se reutiliza esa fila: se
+        reactiva y se actualiza trained_at en lugar de guardar otro blob.
+        """
+        if not rows:
+            return []
+        for row in rows:
+            row["content_hash"] = content_hash(row["model_data"])
+        keys = [(row["user_id"], row["model_type"]) for row in rows]
+
+        existing = {
+            (user_id, model_type, digest): model_id
+            for model_id, user_id, model_type, digest in db.execute(
+                select(AIModel.id, AIModel.user_id, AIModel.model_type, AIModel.content_hash).where(
+                    _por_claves(keys),
+                    AIModel.content_hash.in_([row["content_hash"] for row in rows])
+                )
+            )
+        }
+
+        db.execute(
+            update(AIModel).where(
+                _por_claves(keys),
+                AIModel.is_active == True
+            ).values(is_active=False)
+        )
+
+        ids, reused, nuevos = [], [], []
+        for row in rows:
+            model_id = existing.get((row["user_id"], row["model_type"], row["content_hash"]))
+            if model_id is not None:
+                reused.append({"id": model_id, "training_metadata": row.get("training_metadata")})
+                ids.append(model_id)
+            else:
+                nuevos.append(row)
+        if reused:
+            for item in reused:
+                db.execute(
+                    update(AIModel).where(AIModel.id == item["id"]).values(
+                        is_active=True,
+                        trained_at=func.current_timestamp(),
+                        training_metadata=item["training_metadata"]
+                    )
+                )
+            logger.info(f"♻️ {len(reused)} modelos idénticos a una versión guardada: se reutilizan")
+        if nuevos:
+            inserted = db.execute(
+                insert(AIModel).returning(AIModel.id),
+                [dict(row, is_active=True) for row in nuevos]
+            ).scalars().all()
+            ids.extend(inserted)
+
+        ModelRegistry.prune(db, keys)
+        bump_collection_versions(db, [(user_id, "ai_models") for user_id, _ in keys if user_id is not None])
+        return ids
+
+    @staticmethod
+    def get_hyperparameters(db: Session, user_id: UUID, model_type: str) -> Optional[Dict[str, Any]]:
+        """Hiperparámetros guardados por la búsqueda para el usuario (None = valores por defecto)"""
+        return db.execute(
+            select(ModelHyperparameters.params).where(
+                ModelHyperparameters.user_id == user_id,
+                ModelHyperparameters.model_type == model_type
+            )
+        ).scalar()
+
+    @staticmethod
+    def save_hyperparameters(db: Session, rows: List[Dict[str, Any]]):
+        """Upsert en bloque de {user_id, model_type, params, cv_score, samples}"""
+        if not rows:
+            return
+        stmt = pg_insert(ModelHyperparameters).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ModelHyperparameters.user_id, ModelHyperparameters.model_type],
+            set_={
+                "params": stmt.excluded.params,
+                "cv_score": stmt.excluded.cv_score,
+                "samples": stmt.excluded.samples,
+                "searched_at": func.current_timestamp()
+            }
+        )
+        db.execute(stmt)
+
+    @staticmethod
+    def prune(db: Session, keys: Iterable[Tuple[UUID, str]], keep: Optional[int] = None) -> int:
+        """Borra las versiones inactivas que exceden la retención para los (usuario, tipo) dados"""
+        keep = settings.MODEL_RETENTION if keep is None else keep
+        keys = list(set(keys))
+        if not keys:
+            return 0
+        ranked = select(
+            AIModel.id, AIModel.is_active,
+            func.row_number().over(
+                partition_by=(AIModel.user_id, AIModel.model_type),
+                order_by=AIModel.trained_at.desc()
+            ).label("rank")
+        ).where(_por_claves(keys)).subquery()
+        result = db.execute(
+            delete(AIModel).where(AIModel.id.in_(
+                select(ranked.c.id).where(ranked.c.rank > keep, ranked.c.is_active == False)
+            ))
+        )
+        return result.rowcount
+
+    @staticmethod
+    def compact(db: Session, keep: Optional[int] = None, batch_size: int = COMPACTION_BATCH_SIZE) -> int:
+        """
+        Aplica la retención a toda la tabla en lotes, con un commit por lote para no
+        bloquear ai_models. Pensado para un trabajo periódico (scripts/compact_models.py).
+        """
+        keep = settings.MODEL_RETENTION if keep is None else keep
+        total = 0
+        while True:
+            ranked = select(
+                AIModel.id, AIModel.is_active,
+                func.row_number().over(
+                    partition_by=(AIModel.user_id, AIModel.model_type),
+                    order_by=AIModel.trained_at.desc()
+                ).label("rank")
+            ).subquery()
+            batch = select(ranked.c.id).where(
+                ranked.c.rank > keep, ranked.c.is_active == False
+            ).limit(batch_size)
+            deleted = db.execute(delete(AIModel).where(AIModel.id.in_(batch))).rowcount
+            db.commit()
+            total += deleted
+            if deleted < batch_size:
+                break
+            logger.info(f"🧹 {total} modelos antiguos eliminados...")
+        logger.info(f"🧹 Compactación terminada: {total} modelos eliminados (se conservan {keep} por usuario y tipo)")
+        return total
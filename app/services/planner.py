@@ -0,0 +1,175 @@
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.energy_service import ENERGY_VALUES
+from app.services.schedule_service import EnergyProfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+# El día se discretiza en unidades de 5 minutos
+UNIT_MINUTES = 5
+MAX_PLAN_HOURS = 16
+# Una tarea cabe en un hueco si la energía esperada es >= energía requerida - tolerancia
+# (con 1.0 solo las tareas "high" quedan restringidas a horas de energía media o alta)
+ENERGY_TOLERANCE = 1.0
+
+
+class PlanItem:
+    """Tarea a planificar ya reducida a unidades de tiempo"""
+    __slots__ = ("task_id", "title", "priority", "units", "need", "deadline_unit")
+
+    def __init__(self, task_id, title: str, priority: float, units: int, need: float, deadline_unit: int):
+        self.task_id = task_id
+        self.title = title
+        self.priority = priority
+        self.units = units
+        self.need = need
+        self.deadline_unit = deadline_unit
+
+
+class DayPlanner:
+    """
+    Empaqueta tareas en el tiempo disponible maximizando la prioridad total.
+
+    1. Selección: mochila 0/1 por programación dinámica (vectorizada con numpy)
+       sobre unidades de 5 minutos, con presupuesto de tiempo; si se agota se
+       usa un voraz por densidad (prioridad / duración).
+    2. Colocación: EDF (primero el deadline más cercano) en el primer hueco libre
+       que respete el deadline y la ventana de energía; lo que no cabe se descarta
+       y el hueco sobrante se rellena de forma voraz con las tareas no elegidas.
+       Si queda presupuesto se devuelve el mejor entre este plan y el voraz puro.
+    """
+
+    def __init__(self, start: datetime, available_hours: float, profile: Optional[EnergyProfile] = None):
+        self.start = start
+        self.capacity = int(min(available_hours, MAX_PLAN_HOURS) * 60 // UNIT_MINUTES)
+        self.unit_times = [start + timedelta(minutes=UNIT_MINUTES * i) for i in range(self.capacity)]
+        if profile is not None and self.capacity:
+            weekdays = np.array([t.weekday() for t in self.unit_times])
+            hours = np.array([t.hour for t in self.unit_times])
+            self.unit_energy = profile.expected[weekdays, hours]
+        else:
+            # Sin perfil fiable no se restringe por energía
+            self.unit_energy = np.full(self.capacity, np.inf)
+
+    def build_item(self, task_id, title: str, priority: float, estimated_duration: Optional[int],
+                   energy_required: Optional[str], deadline: Optional[datetime]) -> PlanItem:
+        units = max(1, math.ceil((estimated_duration or 60) / UNIT_MINUTES))
+        need = float(ENERGY_VALUES.get(energy_required or "medium", 2))
+        deadline_unit = self.capacity
+        if deadline:
+            if deadline.tzinfo is not None:
+                deadline = deadline.astimezone().replace(tzinfo=None)
+            minutes = (deadline - self.start).total_seconds() / 60
+            # Un deadline ya imposible de cumplir no restringe: se planifica lo antes posible
+            if minutes >= units * UNIT_MINUTES:
+                deadline_unit = min(int(minutes // UNIT_MINUTES), self.capacity)
+        return PlanItem(task_id, title, max(float(priority), 0.0), units, need, deadline_unit)
+
+    def _select_dp(self, items: List[PlanItem], deadline_at: float) -> Optional[List[int]]:
+        """Índices elegidos por la mochila, o None si se agota el presupuesto"""
+        capacity = self.capacity
+        best = np.zeros(capacity + 1)
+        keep = np.zeros((len(items), capacity + 1), dtype=bool)
+        for i, item in enumerate(items):
+            if time.perf_counter() > deadline_at:
+                return None
+            w = item.units
+            if w > capacity or item.priority <= 0:
+                continue
+            candidate = best[:-w] + item.priority
+            better = candidate > best[w:]
+            keep[i, w:] = better
+            best[w:] = np.where(better, candidate, best[w:])
+
+        chosen = []
+        c = capacity
+        for i in range(len(items) - 1, -1, -1):
+            if keep[i, c]:
+                chosen.append(i)
+                c -= items[i].units
+        return chosen
+
+    @staticmethod
+    def _select_greedy(items: List[PlanItem]) -> List[int]:
+        return sorted(range(len(items)), key=lambda i: items[i].priority / items[i].units, reverse=True)
+
+    def _place(self, item: PlanItem, free: np.ndarray) -> Optional[int]:
+        """Primera unidad de inicio libre, dentro de la ventana de energía y antes del deadline"""
+        w = item.units
+        last_start = item.deadline_unit - w
+        if last_start < 0:
+            return None
+        usable = free & (self.unit_energy >= item.need - ENERGY_TOLERANCE)
+        cumsum = np.concatenate([[0], np.cumsum(usable)])
+        fits = (cumsum[w:w + last_start + 1] - cumsum[:last_start + 1]) == w
+        if not fits.any():
+            return None
+        return int(np.argmax(fits))
+
+    def _colocar(self, items: List[PlanItem], *orders: List[int]) -> Dict[int, int]:
+        """Coloca las tareas en el orden dado; devuelve índice -> unidad de inicio"""
+        free = np.ones(self.capacity, dtype=bool)
+        placed: Dict[int, int] = {}
+        for order in orders:
+            for i in order:
+                if i in placed or items[i].units > self.capacity:
+                    continue
+                unit = self._place(items[i], free)
+                if unit is not None:
+                    free[unit:unit + items[i].units] = False
+                    placed[i] = unit
+            if not free.any():
+                break
+        return placed
+
+    def plan(self, items: List[PlanItem], time_budget_ms: float) -> Dict[str, Any]:
+        started = time.perf_counter()
+        deadline_at = started + time_budget_ms / 1000
+
+        greedy_order = self._select_greedy(items)
+        selected = self._select_dp(items, deadline_at) if self.capacity else []
+        if selected is None:
+            algorithm = "greedy"
+            placed = self._colocar(items, greedy_order)
+            logger.warning(f"⏱️ Presupuesto de {time_budget_ms} ms agotado: planificación voraz para {len(items)} tareas")
+        else:
+            # EDF sobre la selección (desempate por prioridad) y relleno voraz de los huecos que quedaron
+            algorithm = "dp"
+            edf_order = sorted(selected, key=lambda i: (items[i].deadline_unit, -items[i].priority))
+            placed = self._colocar(items, edf_order, greedy_order)
+            # Deadlines y ventanas de energía pueden descartar parte de la selección:
+            # si queda presupuesto se compara con el voraz puro y se queda el mejor
+            if time.perf_counter() < deadline_at:
+                greedy = self._colocar(items, greedy_order)
+                if sum(items[i].priority for i in greedy) > sum(items[i].priority for i in placed):
+                    algorithm, placed = "greedy", greedy
+
+        scheduled = []
+        for i, unit in sorted(placed.items(), key=lambda x: x[1]):
+            item = items[i]
+            scheduled.append({
+                "task_id": item.task_id,
+                "title": item.title,
+                "start": self.unit_times[unit],
+                "end": self.unit_times[unit] + timedelta(minutes=UNIT_MINUTES * item.units),
+                "priority_score": round(item.priority, 4)
+            })
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"🗓️ Plan: {len(scheduled)}/{len(items)} tareas en {elapsed_ms:.1f} ms ({algorithm})")
+        return {
+            "start": self.start,
+            "end": self.start + timedelta(minutes=UNIT_MINUTES * self.capacity),
+            "total_priority": round(sum(items[i].priority for i in placed), 4),
+            "used_minutes": UNIT_MINUTES * sum(items[i].units for i in placed),
+            "scheduled": scheduled,
+            "unscheduled": [item.task_id for i, item in enumerate(items) if i not in placed],
+            "algorithm": algorithm,
+            "elapsed_ms": round(elapsed_ms, 2)
+        }
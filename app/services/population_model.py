@@ -0,0 +1,191 @@
+import threading
+import time
+from datetime import datetime
+from io import BytesIO
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+import joblib
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.database_models import AIModel, Task, TaskMLData, User
+from app.services.ai_service import (
+    PRIORIDAD_MAP, _normalizar_nivel, caracteristicas, entrenar_clasificador,
+    nivel_por_reglas, prioridades_objetivo, serializar_modelo
+)
+from app.services.evaluation_service import HOLDOUT_FRACTION
+from app.services.model_registry import ModelRegistry
+from app.services.task_records import cargar_registros
+import logging
+
+logger = logging.getLogger(__name__)
+
+POPULATION_MODEL_TYPE = "priority_population_v1"
+POPULATION_MODEL_VERSION = "1.0"
+# Un árbol algo más profundo que el por usuario: hay muchos más ejemplos
+POPULATION_HYPERPARAMETERS = {"max_depth": 6, "min_samples_leaf": 20}
+MIN_POPULATION_SAMPLES = 50
+# Tareas recientes del usuario usadas para el residuo, y peso a priori (pseudo-observaciones)
+RESIDUAL_TASKS = 20
+RESIDUAL_PRIOR = 3.0
+
+
+def entrenar_modelo_poblacional(db: Session, max_samples: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Entrena el modelo compartido con las tareas completadas más recientes de todos
+    los usuarios activos. Solo se usan las características de cada tarea (sin el
+    usuario), así que el modelo no guarda datos identificables.
+    """
+    max_samples = max_samples or settings.POPULATION_MAX_SAMPLES
+    started = time.perf_counter()
+
+    # Prioridad real del feedback ya consolidado (el aún no consumido entra en la siguiente ejecución)
+    stmt = select(
+        Task.title, Task.description, Task.urgency, Task.impact, Task.energy_required,
+        Task.estimated_duration, Task.deadline, Task.priority_level, Task.completed_at, TaskMLData.actual_priority
+    ).join(
+        User, User.id == Task.user_id
+    ).outerjoin(
+        TaskMLData, TaskMLData.task_id == Task.id
+    ).where(
+        User.is_active == True,
+        Task.status == 'completed'
+    ).order_by(Task.completed_at.desc().nulls_last()).limit(max_samples)
+
+    X, y, reglas = [], [], []
+    for row in db.execute(stmt, execution_options={"yield_per": 5000}):
+        X.append(caracteristicas(row))
+        y.append(PRIORIDAD_MAP[_normalizar_nivel(row.actual_priority or row.priority_level)])
+        reglas.append(nivel_por_reglas(row))
+    if len(y) < MIN_POPULATION_SAMPLES:
+        logger.warning(f"⚠️ Insuficientes tareas para el modelo poblacional ({len(y)}/{MIN_POPULATION_SAMPLES})")
+        return None
+
+    # Orden cronológico: el holdout son las tareas más recientes
+    X, y, reglas = np.array(X[::-1]), np.array(y[::-1]), np.array(reglas[::-1])
+    holdout = max(int(round(len(y) * HOLDOUT_FRACTION)), 1)
+    candidato = entrenar_clasificador(X[:-holdout], y[:-holdout], POPULATION_HYPERPARAMETERS)
+    model_accuracy = round(float((candidato.predict(X[-holdout:]) == y[-holdout:]).mean()), 4)
+    rules_accuracy = round(float((reglas[-holdout:] == y[-holdout:]).mean()), 4)
+
+    inicio = time.perf_counter()
+    modelo = entrenar_clasificador(X, y, POPULATION_HYPERPARAMETERS)
+    entrenamiento_ms = (time.perf_counter() - inicio) * 1000
+    modelo_bin = serializar_modelo(modelo)
+
+    model_id = ModelRegistry.register(
+        db, None, POPULATION_MODEL_TYPE, POPULATION_MODEL_VERSION, modelo_bin, {
+            "trigger": "population",
+            "duration_ms": round(entrenamiento_ms, 2),
+            "samples": len(y),
+            "features": X.shape[1],
+            "model_bytes": len(modelo_bin),
+            "hyperparameters": POPULATION_HYPERPARAMETERS
+        }
+    )
+    metrics = {
+        "samples": len(y),
+        "holdout_size": holdout,
+        "holdout_accuracy": model_accuracy,
+        "rules_holdout_accuracy": rules_accuracy,
+        "model_accuracy": model_accuracy,
+        "rules_accuracy": rules_accuracy,
+        "beats_rules": bool(model_accuracy >= rules_accuracy),
+        "evaluated_at": datetime.now().isoformat(timespec="seconds")
+    }
+    db.query(AIModel).filter(AIModel.id == model_id).update(
+        {"accuracy_metrics": metrics}, synchronize_session=False
+    )
+    db.commit()
+
+    stats = dict(metrics, model_id=str(model_id), model_bytes=len(modelo_bin),
+                 seconds=round(time.perf_counter() - started, 2))
+    logger.info(
+        f"🌍 Modelo poblacional entrenado con {len(y)} tareas: precisión {model_accuracy} vs reglas {rules_accuracy}"
+    )
+    return stats
+
+
+class PopulationModelCache:
+    """
+    Modelo poblacional residente en memoria en cada worker. Se carga al primer uso;
+    pasado el TTL solo se consulta el id del modelo activo y el binario se vuelve
+    a leer únicamente si cambió.
+    """
+
+    def __init__(self):
+        self._model = None
+        self._model_id: Optional[UUID] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session):
+        """Modelo poblacional activo (None si no existe o no supera a las reglas)"""
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < settings.POPULATION_MODEL_TTL_SECONDS:
+                self.hits += 1
+                return self._model
+            self.misses += 1
+            try:
+                self._refresh(db)
+            except Exception as e:
+                logger.error(f"❌ Error cargando el modelo poblacional: {e}")
+            self._checked_at = now
+            return self._model
+
+    def _refresh(self, db: Session):
+        active_id = db.execute(
+            select(AIModel.id).where(
+                AIModel.user_id.is_(None),
+                AIModel.model_type == POPULATION_MODEL_TYPE,
+                AIModel.is_active == True
+            ).order_by(AIModel.trained_at.desc()).limit(1)
+        ).scalar()
+        if active_id is not None and active_id == self._model_id:
+            return
+
+        activo = ModelRegistry.load_active(db, None, POPULATION_MODEL_TYPE) if active_id else None
+        metricas = (activo.accuracy_metrics or {}) if activo else {}
+        if activo is None or not activo.model_data or metricas.get("beats_rules") is False:
+            self._model, self._model_id = None, active_id
+            return
+        self._model = joblib.load(BytesIO(activo.model_data))
+        self._model_id = activo.id
+        logger.info(f"🌍 Modelo poblacional cargado ({len(activo.model_data)} bytes)")
+
+    def active_id(self, db: Session) -> Optional[UUID]:
+        """Id del modelo poblacional que sirve este worker (None si no hay uno utilizable)"""
+        return self._model_id if self.get(db) is not None else None
+
+    def residual(self, db: Session, user_id: UUID, modelo) -> float:
+        """
+        Ajuste por usuario: error medio del modelo poblacional en sus tareas completadas
+        recientes, contraído hacia 0 con RESIDUAL_PRIOR pseudo-observaciones.
+        """
+        if not settings.POPULATION_RESIDUAL_ADJUSTMENT:
+            return 0.0
+        tareas = cargar_registros(
+            db, Task.user_id == user_id, Task.status == 'completed',
+            order_by=Task.completed_at.desc().nulls_last(), limit=RESIDUAL_TASKS
+        )
+        if not tareas:
+            return 0.0
+        predicciones = modelo.predict(np.array([caracteristicas(task) for task in tareas]))
+        objetivos = np.array(prioridades_objetivo(db, user_id, tareas))
+        return float((objetivos - predicciones).sum() / (len(tareas) + RESIDUAL_PRIOR))
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = None
+
+    def cache_info(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "loaded": self._model is not None}
+
+
+population_models = PopulationModelCache()
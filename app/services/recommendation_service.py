@@ -0,0 +1,163 @@
+import math
+import time
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import exists, insert, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, ReadSessionLocal
+from app.models.database_models import DailyRecommendation, Task, User
+from app.services.ai_service import TaskAgent
+from app.services.keyword_matcher import keyword_matcher
+from app.services.task_records import cargar_registros
+from app.utils.process_pool import default_workers, run_bounded, worker_pool
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Usuarios por lote enviado a cada worker
+RECOMMENDATION_USER_CHUNK = 50
+# Tareas candidatas como máximo por usuario
+MAX_CANDIDATES = 500
+CANDIDATE_STATUSES = ['pending', 'in_progress']
+FUENTES = {"ml": "el modelo ML", "population": "el modelo poblacional", "rules": "las reglas"}
+
+
+def _confianza(puntaje: float) -> float:
+    """Lleva el puntaje (sin techo fijo) a 0..1: ~0.28 para 1, ~0.63 para 3, ~0.86 para 6"""
+    return round(1 - math.exp(-max(puntaje, 0.0) / 3), 4)
+
+
+def _motivo(task, puntaje: float, fuente: str, hoy: date) -> str:
+    motivos = []
+    if task.deadline:
+        dias = (task.deadline.date() - hoy).days
+        if dias < 0:
+            motivos.append("deadline vencido")
+        elif dias == 0:
+            motivos.append("vence hoy")
+        elif dias == 1:
+            motivos.append("vence mañana")
+    flags = keyword_matcher.classify(task.title, task.description)
+    if "titulo_critico" in flags or "descripcion_urgente" in flags:
+        motivos.append("contiene palabras clave críticas")
+    if task.urgency == "high":
+        motivos.append("urgencia alta")
+    if task.impact == "high":
+        motivos.append("impacto alto")
+    detalle = ", ".join(motivos) if motivos else "mejor puntaje entre tus tareas pendientes"
+    return f"Prioridad {puntaje:.2f} según {fuente}: {detalle}"
+
+
+def recomendar_para_usuario(db: Session, user_id: UUID, fecha: date, top_k: int) -> List[Dict[str, Any]]:
+    """Top-k de tareas pendientes del usuario según su modelo (o reglas), listo para insertar"""
+    tasks = cargar_registros(
+        db, Task.user_id == user_id, Task.status.in_(CANDIDATE_STATUSES), limit=MAX_CANDIDATES
+    )
+    if not tasks:
+        return []
+
+    agent = TaskAgent(db, user_id)
+    resultados = sorted(agent.predecir_prioridad_tareas(tasks), key=lambda x: x['puntaje_ml'], reverse=True)
+    fuente = FUENTES[agent.fuente]
+
+    return [{
+        "user_id": user_id,
+        "task_id": item['task_obj'].id,
+        "recommendation_reason": _motivo(item['task_obj'], item['puntaje_ml'], fuente, fecha),
+        "confidence_score": _confianza(item['puntaje_ml']),
+        "status": "pending",
+        "recommendation_date": fecha
+    } for item in resultados[:top_k]]
+
+
+def _procesar_lote(user_ids: List[UUID], fecha: date, top_k: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Se ejecuta en un worker: solo lee (réplica si hay) y devuelve las filas al padre"""
+    db = ReadSessionLocal()
+    filas, errores = [], 0
+    try:
+        for user_id in user_ids:
+            try:
+                filas.extend(recomendar_para_usuario(db, user_id, fecha, top_k))
+            except Exception as e:
+                errores += 1
+                db.rollback()
+                logger.error(f"❌ Error generando recomendaciones para {user_id}: {e}")
+    finally:
+        db.close()
+    return filas, errores
+
+
+class RecommendationEngine:
+    """
+    Genera las recomendaciones diarias de todos los usuarios activos.
+    Los usuarios se reparten en lotes entre un pool de procesos (el cálculo de
+    prioridades es CPU), y el padre inserta los resultados en bloque.
+    """
+
+    def __init__(self, fecha: Optional[date] = None, top_k: Optional[int] = None,
+                 workers: Optional[int] = None, chunk_size: int = RECOMMENDATION_USER_CHUNK):
+        self.fecha = fecha or date.today()
+        self.top_k = top_k or settings.RECOMMENDATIONS_TOP_K
+        self.workers = workers or default_workers()
+        self.chunk_size = chunk_size
+
+    def _usuarios(self, reader: Session) -> Iterator[Tuple[List[UUID], date, int]]:
+        """Usuarios activos con tareas pendientes y sin recomendaciones para la fecha, en lotes"""
+        stmt = select(User.id).where(
+            User.is_active == True,
+            exists().where(Task.user_id == User.id, Task.status.in_(CANDIDATE_STATUSES)),
+            ~exists().where(
+                DailyRecommendation.user_id == User.id,
+                DailyRecommendation.recommendation_date == self.fecha
+            )
+        )
+        result = reader.execute(stmt, execution_options={"yield_per": self.chunk_size})
+        for batch in result.partitions():
+            yield [row.id for row in batch], self.fecha, self.top_k
+
+    def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        stats = {"date": self.fecha.isoformat(), "users": 0, "recommendations": 0, "errors": 0}
+
+        # Sesión de lectura aparte: el cursor del servidor no sobrevive a los commits de escritura
+        reader = SessionLocal()
+        db = SessionLocal()
+        try:
+            if self.workers <= 1:
+                resultados = ((args, _procesar_lote(*args), None) for args in self._usuarios(reader))
+                self._guardar(db, resultados, stats)
+            else:
+                with worker_pool(self.workers) as executor:
+                    resultados = run_bounded(executor, _procesar_lote, self._usuarios(reader), self.workers * 2)
+                    self._guardar(db, resultados, stats)
+        finally:
+            db.close()
+            reader.close()
+
+        elapsed = time.perf_counter() - started
+        stats["seconds"] = round(elapsed, 2)
+        stats["seconds_per_1000_users"] = round(elapsed / stats["users"] * 1000, 2) if stats["users"] else 0.0
+        logger.info(
+            f"✅ {stats['recommendations']} recomendaciones para {stats['users']} usuarios en {elapsed:.1f} s "
+            f"({stats['seconds_per_1000_users']} s por 1000 usuarios, {self.workers} workers)"
+        )
+        return stats
+
+    def _guardar(self, db: Session, resultados, stats: Dict[str, Any]):
+        for (user_ids, _, _), resultado, error in resultados:
+            stats["users"] += len(user_ids)
+            if error is not None:
+                stats["errors"] += len(user_ids)
+                logger.error(f"❌ Lote de {len(user_ids)} usuarios falló: {error}")
+                continue
+            filas, errores = resultado
+            stats["errors"] += errores
+            if filas:
+                db.execute(insert(DailyRecommendation), filas)
+                db.commit()
+                stats["recommendations"] += len(filas)
+            logger.info(f"🔄 {stats['users']} usuarios procesados...")
@@ -0,0 +1,258 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.database_models import EnergyRollupHourly
+from app.services.energy_service import ENERGY_VALUES, PROFILE_UPDATES_KEY
+from app.services.keyword_matcher import keyword_matcher
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Horizonte de búsqueda de huecos (horas a partir de la próxima hora en punto)
+HORIZON_HOURS = 72
+# Peso de la media global en el suavizado de cada hora (pseudo-observaciones)
+PRIOR_STRENGTH = 3.0
+DEFAULT_ENERGY = 2.0
+
+
+class EnergyProfile:
+    """
+    Perfil de energía esperado (1=low .. 3=high) por día de la semana y hora.
+    Se construye a partir de energy_rollup_hourly y se actualiza en memoria
+    con cada registro nuevo, sin volver a consultar el historial.
+    """
+
+    def __init__(self, user_id: UUID, counts: np.ndarray, sums: np.ndarray):
+        self.user_id = user_id
+        self.counts = counts  # (7, 24)
+        self.sums = sums      # (7, 24)
+        self.expected, self.total_logs = self._recompute(counts, sums)
+
+    @classmethod
+    def load(cls, db: Session, user_id: UUID) -> "EnergyProfile":
+        counts = np.zeros((7, 24))
+        sums = np.zeros((7, 24))
+        rows = db.query(
+            EnergyRollupHourly.weekday, EnergyRollupHourly.hour,
+            EnergyRollupHourly.low_count, EnergyRollupHourly.medium_count, EnergyRollupHourly.high_count
+        ).filter(EnergyRollupHourly.user_id == user_id).all()
+        for weekday, hour, low, medium, high in rows:
+            counts[weekday, hour] = low + medium + high
+            sums[weekday, hour] = low + 2 * medium + 3 * high
+        return cls(user_id, counts, sums)
+
+    @staticmethod
+    def _recompute(counts: np.ndarray, sums: np.ndarray) -> Tuple[np.ndarray, int]:
+        """Energía esperada (matriz nueva) y total de registros a partir de conteos y sumas"""
+        total = counts.sum()
+        global_mean = sums.sum() / total if total > 0 else DEFAULT_ENERGY
+        # Suavizado jerárquico: celda -> media de la hora (todos los días) -> media global
+        hour_counts = counts.sum(axis=0)
+        hour_mean = (sums.sum(axis=0) + PRIOR_STRENGTH * global_mean) / (hour_counts + PRIOR_STRENGTH)
+        expected = (sums + PRIOR_STRENGTH * hour_mean) / (counts + PRIOR_STRENGTH)
+        return expected, int(total)
+
+    @property
+    def is_reliable(self) -> bool:
+        return self.total_logs >= settings.ENERGY_PROFILE_MIN_LOGS
+
+    def apply(self, logged_at: datetime, energy_level: str, delta: int):
+        """
+        Actualiza el perfil con un registro (delta=+1) o su eliminación (delta=-1).
+        Las matrices se reconstruyen en copias y se sustituyen de una vez: un
+        EnergyScheduler que lea el perfil a la vez ve el estado anterior o el nuevo,
+        nunca uno a medias.
+        """
+        weekday, hour = logged_at.weekday(), logged_at.hour
+        counts, sums = self.counts.copy(), self.sums.copy()
+        counts[weekday, hour] = max(counts[weekday, hour] + delta, 0)
+        sums[weekday, hour] = max(sums[weekday, hour] + ENERGY_VALUES[energy_level] * delta, 0)
+        expected, total_logs = self._recompute(counts, sums)
+        self.counts, self.sums, self.expected, self.total_logs = counts, sums, expected, total_logs
+
+
+class EnergyProfileCache:
+    """
+    Perfiles precalculados por usuario (por proceso) con TTL como red de seguridad entre
+    workers. Es un LRU acotado a max_size perfiles; las entradas caducadas se descartan
+    al acceder a ellas.
+    """
+
+    def __init__(self, max_size: int = settings.ENERGY_PROFILE_CACHE_SIZE):
+        self._profiles: "OrderedDict[UUID, Tuple[EnergyProfile, float]]" = OrderedDict()
+        self._max_size = max(1, max_size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _vigente(self, user_id: UUID, now: float) -> Optional[EnergyProfile]:
+        """Perfil en caché si no ha caducado (la entrada caducada se elimina); llamar con el candado"""
+        cached = self._profiles.get(user_id)
+        if cached is None:
+            return None
+        if now - cached[1] >= settings.ENERGY_PROFILE_TTL_SECONDS:
+            del self._profiles[user_id]
+            return None
+        self._profiles.move_to_end(user_id)
+        return cached[0]
+
+    def get(self, db: Session, user_id: UUID) -> EnergyProfile:
+        now = time.monotonic()
+        with self._lock:
+            profile = self._vigente(user_id, now)
+            if profile is not None:
+                self.hits += 1
+                return profile
+            self.misses += 1
+        profile = EnergyProfile.load(db, user_id)
+        with self._lock:
+            self._profiles[user_id] = (profile, now)
+            self._profiles.move_to_end(user_id)
+            while len(self._profiles) > self._max_size:
+                self._profiles.popitem(last=False)
+                self.evictions += 1
+        return profile
+
+    def apply(self, user_id: UUID, logged_at: datetime, energy_level: str, delta: int):
+        with self._lock:
+            profile = self._vigente(user_id, time.monotonic())
+            if profile is not None:
+                profile.apply(logged_at, energy_level, delta)
+
+    def cache_info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._profiles), "evictions": self.evictions}
+
+
+energy_profiles = EnergyProfileCache()
+
+
+# Los cambios que EnergyRollupService deja en la sesión se aplican solo si se confirman
+@event.listens_for(Session, "after_commit")
+def _apply_profile_updates(session: Session):
+    for update in session.info.pop(PROFILE_UPDATES_KEY, ()):
+        energy_profiles.apply(*update)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_profile_updates(session: Session):
+    session.info.pop(PROFILE_UPDATES_KEY, None)
+
+
+class EnergyScheduler:
+    """
+    Elige el hueco de inicio para una tarea según el perfil de energía del usuario,
+    la energía requerida, la duración estimada y el deadline. Todos los huecos del
+    horizonte se evalúan a la vez con numpy.
+    """
+
+    def __init__(self, profile: EnergyProfile, now: Optional[datetime] = None):
+        now = now or datetime.now()
+        self.start = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        self.slot_times = [self.start + timedelta(hours=i) for i in range(HORIZON_HOURS)]
+        hours = np.array([t.hour for t in self.slot_times])
+        weekdays = np.array([t.weekday() for t in self.slot_times])
+        self.slot_energy = profile.expected[weekdays, hours]
+
+        # Horas laborables que quedan en el día a partir de cada hueco (0 si no es laborable)
+        in_workday = (hours >= settings.WORKDAY_START_HOUR) & (hours < settings.WORKDAY_END_HOUR)
+        self.hours_left = np.where(in_workday, settings.WORKDAY_END_HOUR - hours, 0)
+        self._energy_cumsum = np.concatenate([[0.0], np.cumsum(self.slot_energy)])
+
+    def _window_energy(self, duration_hours: int) -> np.ndarray:
+        """Energía media esperada en la ventana [i, i + duración) para cada hueco"""
+        idx = np.arange(HORIZON_HOURS)
+        end = np.minimum(idx + duration_hours, HORIZON_HOURS)
+        return (self._energy_cumsum[end] - self._energy_cumsum[idx]) / (end - idx)
+
+    def recommend(self, task) -> datetime:
+        return self.recommend_many([task])[0]
+
+    def recommend_many(self, tasks) -> List[datetime]:
+        """Evalúa todas las tareas contra todos los huecos en una sola pasada matricial (tareas × huecos)"""
+        if not tasks:
+            return []
+        n = len(tasks)
+        workday_length = settings.WORKDAY_END_HOUR - settings.WORKDAY_START_HOUR
+        durations = np.empty(n, dtype=int)
+        need = np.empty(n)
+        critical = np.zeros(n, dtype=bool)
+        hours_to_deadline = np.full(n, np.inf)
+        for i, task in enumerate(tasks):
+            durations[i] = int(np.clip(np.ceil((task.estimated_duration or 60) / 60), 1, workday_length))
+            critical[i] = "horario_temprano" in keyword_matcher.classify(task.title, task.description)
+            need[i] = 3.0 if critical[i] else float(ENERGY_VALUES.get(task.energy_required or "medium", 2))
+            if task.deadline:
+                deadline = task.deadline
+                if deadline.tzinfo is not None:
+                    deadline = deadline.astimezone().replace(tzinfo=None)
+                hours_to_deadline[i] = (deadline - self.start).total_seconds() / 3600
+
+        # Energía de ventana: una fila por duración distinta, reutilizada entre tareas
+        unique_durations, inverse = np.unique(durations, return_inverse=True)
+        energy = np.stack([self._window_energy(d) for d in unique_durations])[inverse]
+
+        # Falta de energía penaliza mucho; sobra de energía (desperdiciarla) poco
+        gap = need[:, None] - energy
+        fit = -(2.0 * np.maximum(gap, 0) + 0.5 * np.maximum(-gap, 0))
+
+        slots = np.arange(HORIZON_HOURS)
+        feasible = self.hours_left[None, :] >= durations[:, None]
+        before_deadline = slots[None, :] + durations[:, None] <= hours_to_deadline[:, None]
+        # Si no cabe antes del deadline, se ignora el deadline (lo antes posible)
+        use_deadline = (feasible & before_deadline).any(axis=1)
+        feasible = np.where(use_deadline[:, None], feasible & before_deadline, feasible)
+
+        urgency_weight = np.where(critical | (hours_to_deadline <= HORIZON_HOURS), 2.0, 0.5)
+        score = fit - urgency_weight[:, None] * slots[None, :] / HORIZON_HOURS
+        score = np.where(feasible, score, -np.inf)
+
+        best = np.argmax(score, axis=1)
+        best = np.where(feasible.any(axis=1), best, 0)
+        return [self.slot_times[i] for i in best]
+
+
+def horario_por_reglas(task) -> str:
+    """Recomienda hora basado en energía y tipo de tarea"""
+    try:
+        energia = task.energy_required or "medium"
+        flags = keyword_matcher.classify(task.title, task.description)
+        
+        if energia == "high" or "horario_temprano" in flags:
+            return "08:00"
+        elif 10 <= datetime.now().hour < 15 and energia == "medium":
+            return "12:00"
+        elif energia == "medium":
+            return "14:00"
+        else:
+            return "16:00"
+    except Exception as e:
+        logger.error(f"❌ Error en horario_por_reglas: {e}")
+        return "10:00"
+
+
+def recomendar_horarios(db: Session, user_id: UUID, tasks) -> List[Tuple[str, Optional[datetime]]]:
+    """
+    Horario recomendado (HH:MM) y fecha/hora de inicio para cada tarea.
+    Una carga de perfil por llamada; si el perfil no es fiable se usan reglas (inicio None).
+    """
+    if not tasks:
+        return []
+    try:
+        perfil = energy_profiles.get(db, user_id)
+        if perfil.is_reliable:
+            inicios = EnergyScheduler(perfil).recommend_many(tasks)
+            logger.info(f"🕒 {len(tasks)} horarios por perfil de energía ({perfil.total_logs} registros)")
+            return [(inicio.strftime("%H:%M"), inicio) for inicio in inicios]
+    except Exception as e:
+        logger.error(f"❌ Error en el perfil de energía: {e}")
+    return [(horario_por_reglas(task), None) for task in tasks]
@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Task
+
+# Columnas que leen las reglas y el modelo (más completed_at para ordenar el entrenamiento)
+SCORING_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.urgency, Task.impact, Task.energy_required,
+    Task.estimated_duration, Task.deadline, Task.priority_level, Task.completed_at
+)
+
+
+class TaskRecord:
+    """
+    Proyección compacta de una tarea para puntuar y entrenar: sin estado de
+    instrumentación, sin identity map ni seguimiento de cambios. Con __slots__
+    ocupa una fracción de una entidad Task (ver scripts/benchmarks/bench_task_records.py).
+    """
+
+    __slots__ = (
+        "id", "title", "description", "urgency", "impact", "energy_required",
+        "estimated_duration", "deadline", "priority_level", "completed_at"
+    )
+
+    def __init__(self, id: UUID, title: str, description: Optional[str], urgency: Optional[str],
+                 impact: Optional[str], energy_required: Optional[str], estimated_duration: Optional[int],
+                 deadline: Optional[datetime], priority_level: Optional[str], completed_at: Optional[datetime] = None):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.urgency = urgency
+        self.impact = impact
+        self.energy_required = energy_required
+        self.estimated_duration = estimated_duration
+        self.deadline = deadline
+        self.priority_level = priority_level
+        self.completed_at = completed_at
+
+    def _asdict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"TaskRecord(id={self.id!r}, title={self.title!r})"
+
+
+def cargar_registros(db: Session, *criterios, order_by=None, limit: Optional[int] = None) -> List[TaskRecord]:
+    """Tareas que cumplen los criterios como TaskRecord (una consulta de columnas, sin entidades)"""
+    query = db.query(*SCORING_COLUMNS).filter(*criterios)
+    if order_by is not None:
+        query = query.order_by(order_by)
+    if limit is not None:
+        query = query.limit(limit)
+    return [TaskRecord(*row) for row in query]
@@ -1,14 +1,19 @@
-from typing import Optional
+from typing import List, Optional, Tuple
+import re
 from uuid import UUID
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 from app.models.database_models import Task, TaskHistory, Category
 from app.models.pydantic_models import TaskCreate
+from app.services.dedup_service import DuplicateDetector
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Máximo de términos que se aceptan en una búsqueda
+MAX_SEARCH_TERMS = 10
+
 class TaskService:
     @staticmethod
     def _calcular_priority_level(urgency: Optional[str], impact: Optional[str], 
@@ -132,21 +137,28 @@ class TaskService:
         return final_score
 
     @staticmethod
-    def create_task_with_priority(db: Session, task_create: TaskCreate, user_id: UUID, category_id: Optional[UUID] = None):
-        """Crear tarea con cálculo automático de prioridad usando solo reglas"""
-        
-        # Validar categoría si se proporciona
-        if category_id:
-            category = db.query(Category).filter(
-                Category.id == category_id,
-                Category.user_id == user_id
-            ).first()
-            if not category:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Category not found or doesn't belong to user"
-                )
+    def calcular_prioridad(urgency: Optional[str], impact: Optional[str], deadline: Optional[datetime],
+                           energy_required: Optional[str], estimated_duration: Optional[int]) -> Tuple[str, int]:
+        """Nivel y score (1-100) por reglas que recibiría una tarea con estos datos, sin guardarla"""
+        priority_level = TaskService._calcular_priority_level(
+            urgency, impact, deadline, energy_required, estimated_duration
+        )
+        return priority_level, TaskService._calcular_priority_score(priority_level, urgency, impact, deadline)
 
+    @staticmethod
+    def build_search_tsquery(text: str) -> Optional[str]:
+        """
+        Convierte texto libre en una expresión to_tsquery con coincidencia por prefijo.
+        Solo se conservan letras y números, así que el usuario no puede inyectar operadores.
+        """
+        terms = re.findall(r"\w+", (text or "").lower())[:MAX_SEARCH_TERMS]
+        if not terms:
+            return None
+        return " & ".join(f"{term}:*" for term in terms)
+
+    @staticmethod
+    def _nueva_tarea(task_create: TaskCreate, user_id: UUID, category_id: Optional[UUID] = None) -> Task:
+        """Entidad Task (sin añadir a la sesión) con la prioridad calculada por reglas"""
         # Preparar datos de la tarea
         task_data = task_create.dict()
         task_data['user_id'] = user_id
@@ -175,17 +187,14 @@ class TaskService:
         task_data['priority_score'] = priority_score
         
         logger.info(f"✅ Tarea creada - Level: {priority_level}, Score: {priority_score}")
-        
-        # Crear la tarea
-        db_task = Task(**task_data)
-        db.add(db_task)
-        db.commit()
-        db.refresh(db_task)
-        
-        # Registrar en historial
+        return Task(**task_data)
+
+    @staticmethod
+    def _registrar_creacion(db: Session, db_task: Task):
+        """Historial e índice de duplicados de una tarea ya insertada; se confirma con el commit del llamador"""
         history_entry = TaskHistory(
             task_id=db_task.id,
-            user_id=user_id,
+            user_id=db_task.user_id,
             change_type='created',
             new_values={
                 'title': db_task.title,
@@ -197,10 +206,81 @@ class TaskService:
             change_description='Task created with rule-based priority calculation'
         )
         db.add(history_entry)
+        DuplicateDetector.index_task(db, db_task)
+
+    @staticmethod
+    def create_task_with_priority(db: Session, task_create: TaskCreate, user_id: UUID, category_id: Optional[UUID] = None):
+        """Crear tarea con cálculo automático de prioridad usando solo reglas"""
+        
+        # Validar categoría si se proporciona
+        if category_id:
+            category = db.query(Category).filter(
+                Category.id == category_id,
+                Category.user_id == user_id
+            ).first()
+            if not category:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Category not found or doesn't belong to user"
+                )
+
+        # Crear la tarea
+        db_task = TaskService._nueva_tarea(task_create, user_id, category_id)
+        db.add(db_task)
+        db.commit()
+        db.refresh(db_task)
+        
+        # Registrar en historial
+        TaskService._registrar_creacion(db, db_task)
         db.commit()
         
         return db_task
 
+    @staticmethod
+    def create_tasks_batch(db: Session, tasks: List[TaskCreate], user_id: UUID) -> List[Tuple[Task, List[UUID]]]:
+        """
+        Crear un lote de tareas en una sola transacción: o se crean todas o ninguna.
+        Las categorías se validan antes de escribir nada; después se insertan e indexan
+        todas y cada tarea se compara con las filas ya volcadas (flush): las existentes y
+        las anteriores del lote. Devuelve (tarea, posibles duplicados).
+        """
+        category_ids = {task.category_id for task in tasks if task.category_id}
+        if category_ids:
+            owned = {category_id for category_id, in db.query(Category.id).filter(
+                Category.id.in_(category_ids),
+                Category.user_id == user_id
+            ).all()}
+            if category_ids - owned:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Category not found or doesn't belong to user"
+                )
+
+        try:
+            db_tasks = [TaskService._nueva_tarea(task, user_id, task.category_id) for task in tasks]
+            db.add_all(db_tasks)
+            db.flush()
+            for db_task in db_tasks:
+                TaskService._registrar_creacion(db, db_task)
+            # La sesión no hace autoflush: las bandas del lote deben estar en la BD antes de buscar
+            db.flush()
+
+            ids = [db_task.id for db_task in db_tasks]
+            results = []
+            for position, db_task in enumerate(db_tasks):
+                # Cada tarea se compara con las existentes y con las anteriores del lote, no consigo ni con las siguientes
+                duplicates = DuplicateDetector.find_candidates(db, user_id, db_task.title, exclude_ids=ids[position:])
+                results.append((db_task, duplicates))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        # Una sola consulta recarga las tareas expiradas por el commit
+        if ids:
+            db.query(Task).filter(Task.id.in_(ids)).all()
+        return results
+
     @staticmethod
     def create_task_with_history(db: Session, task_data: TaskCreate, user_id: UUID):
         """Crear tarea y registrar en historial (versión original)"""
@@ -0,0 +1,215 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import exists, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.database_models import AIModel, Task, User
+from app.services.ai_service import (
+    MIN_TRAINING_TASKS, MODEL_TYPE, MODEL_VERSION,
+    entrenar_clasificador, hiperparametros, preparar_datos_entrenamiento, serializar_modelo
+)
+from app.services.evaluation_service import evaluar_en_lote
+from app.services.feedback_service import consumir_feedback, feedback_pendiente, instante_de_lectura
+from app.services.model_registry import ModelRegistry
+from app.utils.process_pool import default_workers, run_bounded, worker_pool
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Usuarios por lote enviado a cada worker (y por escritura en la base de datos)
+RETRAIN_USER_CHUNK = 20
+
+
+def usuarios_para_reentrenar():
+    """
+    Usuarios activos con al menos MIN_TRAINING_TASKS tareas completadas cuyo
+    dataset cambió desde el último modelo activo: sin modelo, tareas completadas
+    modificadas o feedback sin consumir. Primero los que más feedback pendiente tienen.
+    """
+    ultimo_modelo = select(
+        AIModel.user_id, func.max(AIModel.trained_at).label("trained_at")
+    ).where(
+        AIModel.model_type == MODEL_TYPE,
+        AIModel.is_active == True
+    ).group_by(AIModel.user_id).subquery()
+
+    con_datos = select(Task.user_id).where(
+        Task.status == 'completed'
+    ).group_by(Task.user_id).having(func.count() >= MIN_TRAINING_TASKS).subquery()
+
+    pendiente = feedback_pendiente().subquery()
+
+    return select(User.id).join(
+        con_datos, con_datos.c.user_id == User.id
+    ).outerjoin(
+        ultimo_modelo, ultimo_modelo.c.user_id == User.id
+    ).outerjoin(
+        pendiente, pendiente.c.user_id == User.id
+    ).where(
+        User.is_active == True,
+        or_(
+            ultimo_modelo.c.trained_at.is_(None),
+            exists().where(
+                Task.user_id == User.id,
+                Task.status == 'completed',
+                Task.updated_at > ultimo_modelo.c.trained_at
+            ),
+            pendiente.c.pending > 0
+        )
+    ).order_by(pendiente.c.pending.desc().nulls_last())
+
+
+def entrenar_usuario(db: Session, user_id: UUID) -> Optional[Dict[str, Any]]:
+    """Entrena el modelo de un usuario y devuelve la fila a insertar (None si no hay datos)"""
+    inicio = time.perf_counter()
+    X_df, y = preparar_datos_entrenamiento(db, user_id)
+    if X_df is None or len(X_df) < MIN_TRAINING_TASKS:
+        return None
+    preparacion_ms = (time.perf_counter() - inicio) * 1000
+
+    params = ModelRegistry.get_hyperparameters(db, user_id, MODEL_TYPE)
+    inicio = time.perf_counter()
+    modelo = entrenar_clasificador(X_df.values, y, params)
+    entrenamiento_ms = (time.perf_counter() - inicio) * 1000
+    modelo_bin = serializar_modelo(modelo)
+
+    return {
+        "user_id": user_id,
+        "model_type": MODEL_TYPE,
+        "model_version": MODEL_VERSION,
+        "model_data": modelo_bin,
+        "training_metadata": {
+            "trigger": "nightly",
+            "duration_ms": round(entrenamiento_ms, 2),
+            "data_prep_ms": round(preparacion_ms, 2),
+            "samples": len(X_df),
+            "features": X_df.shape[1],
+            "model_bytes": len(modelo_bin),
+            "hyperparameters": hiperparametros(params)
+        }
+    }
+
+
+def _entrenar_lote(user_ids: List[UUID]) -> Tuple[List[Dict[str, Any]], int, int, datetime]:
+    """
+    Se ejecuta en un worker: lee y entrena; la escritura la hace el padre en bloque.
+    Devuelve también la hora de lectura: el feedback posterior no entró en los modelos.
+    Lee del primario, como la evaluación: con una réplica con retraso el dataset no
+    incluiría feedback anterior a leido_en y el padre lo daría por consumido.
+    """
+    db = SessionLocal()
+    filas, omitidos, errores = [], 0, 0
+    try:
+        leido_en = instante_de_lectura(db)
+        for user_id in user_ids:
+            try:
+                fila = entrenar_usuario(db, user_id)
+                if fila is None:
+                    omitidos += 1
+                else:
+                    filas.append(fila)
+            except Exception as e:
+                errores += 1
+                db.rollback()
+                logger.error(f"❌ Error entrenando el modelo de {user_id}: {e}")
+            finally:
+                # Las entidades de un usuario no se necesitan para el siguiente
+                db.expunge_all()
+    finally:
+        db.close()
+    return filas, omitidos, errores, leido_en
+
+
+class RetrainingJob:
+    """
+    Reentrena en paralelo los modelos de los usuarios cuyo dataset cambió y después
+    evalúa los modelos nuevos en el mismo pool (métricas fuera del entrenamiento).
+    Memoria acotada: lotes pequeños, como mucho 2 lotes en vuelo por worker y
+    procesos reciclados cada RETRAIN_MAX_TASKS_PER_CHILD lotes.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = RETRAIN_USER_CHUNK,
+                 limit: Optional[int] = None):
+        self.workers = workers or default_workers()
+        self.chunk_size = chunk_size
+        self.limit = limit
+
+    def _lotes(self, reader: Session) -> Iterator[Tuple[List[UUID]]]:
+        stmt = usuarios_para_reentrenar()
+        if self.limit:
+            stmt = stmt.limit(self.limit)
+        result = reader.execute(stmt, execution_options={"yield_per": self.chunk_size})
+        for batch in result.partitions():
+            yield ([row.id for row in batch],)
+
+    def count_pending(self) -> int:
+        db = SessionLocal()
+        try:
+            return db.execute(select(func.count()).select_from(usuarios_para_reentrenar().subquery())).scalar()
+        finally:
+            db.close()
+
+    def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        stats = {
+            "users": 0, "trained": 0, "skipped": 0, "errors": 0, "samples": 0, "train_ms": 0.0,
+            "feedback_consumed": 0
+        }
+        self._model_ids: List[UUID] = []
+
+        # Sesión de lectura aparte: el cursor del servidor no sobrevive a los commits de escritura
+        reader = SessionLocal()
+        db = SessionLocal()
+        try:
+            if self.workers <= 1:
+                resultados = ((args, _entrenar_lote(*args), None) for args in self._lotes(reader))
+                self._guardar(db, resultados, stats)
+                stats["evaluation"] = evaluar_en_lote(None, self._model_ids)
+            else:
+                with worker_pool(self.workers, max_tasks_per_child=settings.RETRAIN_MAX_TASKS_PER_CHILD) as executor:
+                    resultados = run_bounded(executor, _entrenar_lote, self._lotes(reader), self.workers * 2)
+                    self._guardar(db, resultados, stats)
+                    stats["evaluation"] = evaluar_en_lote(executor, self._model_ids, self.workers * 2)
+        finally:
+            db.close()
+            reader.close()
+
+        elapsed = time.perf_counter() - started
+        stats["seconds"] = round(elapsed, 2)
+        stats["train_ms"] = round(stats["train_ms"], 2)
+        logger.info(
+            f"✅ {stats['trained']} modelos reentrenados de {stats['users']} usuarios en {elapsed:.1f} s "
+            f"({stats['skipped']} sin datos suficientes, {stats['errors']} errores, {self.workers} workers)"
+        )
+        return stats
+
+    def _guardar(self, db: Session, resultados, stats: Dict[str, Any]):
+        for (user_ids,), resultado, error in resultados:
+            stats["users"] += len(user_ids)
+            if error is not None:
+                stats["errors"] += len(user_ids)
+                logger.error(f"❌ Lote de {len(user_ids)} usuarios falló: {error}")
+                continue
+
+            filas, omitidos, errores, leido_en = resultado
+            stats["skipped"] += omitidos
+            stats["errors"] += errores
+            if not filas:
+                continue
+
+            # Registro en bloque y consumo del feedback que ya está en los modelos, en una
+            # transacción por lote: los usuarios que fallan conservan su feedback pendiente
+            self._model_ids.extend(ModelRegistry.register_many(db, filas))
+            stats["feedback_consumed"] += consumir_feedback(db, [fila["user_id"] for fila in filas], leido_en)
+            db.commit()
+
+            stats["trained"] += len(filas)
+            for fila in filas:
+                stats["samples"] += fila["training_metadata"]["samples"]
+                stats["train_ms"] += fila["training_metadata"]["duration_ms"]
+            logger.info(f"💾 {stats['trained']} modelos guardados ({stats['users']} usuarios revisados)")
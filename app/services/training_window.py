@@ -0,0 +1,69 @@
+import math
+import random
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.database_models import Task
+from app.services.task_records import TaskRecord, cargar_registros
+import logging
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def clave_muestreo(completed_at: datetime, u: float = None) -> float:
+    """
+    Clave A-Res (Efraimidis-Spirakis) en forma logarítmica para el peso
+    w = 2^(días / TRAINING_HALF_LIFE_DAYS): quedarse con las k claves mayores es una
+    muestra ponderada sin reemplazo. Como el cociente entre pesos no cambia con el
+    tiempo, la clave se calcula una sola vez, al completar la tarea.
+    """
+    u = random.random() if u is None else u
+    u = min(max(u, 1e-12), 1 - 1e-12)
+    dias = (completed_at - EPOCH).total_seconds() / 86400
+    return dias * math.log(2) / settings.TRAINING_HALF_LIFE_DAYS - math.log(-math.log(u))
+
+
+@event.listens_for(Session, "before_flush")
+def _asignar_clave_muestreo(session: Session, flush_context, instances):
+    """Mantiene la muestra de forma incremental: clave al completar, sin clave al reabrir"""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Task):
+            continue
+        if obj.status == 'completed':
+            if obj.training_sample_key is None:
+                # completed_at puede ser func.now() (aún sin valor en Python)
+                completado = obj.completed_at if isinstance(obj.completed_at, datetime) else datetime.now()
+                obj.training_sample_key = clave_muestreo(completado)
+        elif obj.training_sample_key is not None:
+            obj.training_sample_key = None
+
+
+def tareas_de_entrenamiento(db: Session, user_id: UUID) -> List[TaskRecord]:
+    """
+    Ventana de entrenamiento acotada: las TRAINING_RECENT_TASKS tareas completadas más
+    recientes completas y, de las anteriores, TRAINING_SAMPLE_SIZE elegidas por la clave
+    de muestreo (más probable cuanto más reciente). Devuelve orden cronológico.
+    """
+    criterios = (Task.user_id == user_id, Task.status == 'completed')
+    recientes = cargar_registros(
+        db, *criterios,
+        order_by=Task.completed_at.desc().nulls_last(),
+        limit=settings.TRAINING_RECENT_TASKS
+    )
+
+    antiguas = []
+    if len(recientes) == settings.TRAINING_RECENT_TASKS and settings.TRAINING_SAMPLE_SIZE > 0:
+        antiguas = cargar_registros(
+            db, *criterios, Task.id.notin_([task.id for task in recientes]),
+            order_by=Task.training_sample_key.desc().nulls_last(),
+            limit=settings.TRAINING_SAMPLE_SIZE
+        )
+
+    return sorted(recientes + antiguas, key=lambda task: task.completed_at or datetime.min)
@@ -0,0 +1,176 @@
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sklearn.model_selection import GridSearchCV
+from sklearn.tree import DecisionTreeClassifier
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, ReadSessionLocal
+from app.models.database_models import ModelHyperparameters, Task, User
+from app.services.ai_service import MODEL_TYPE, preparar_datos_entrenamiento
+from app.services.evaluation_service import cv_splitter
+from app.services.model_registry import ModelRegistry
+from app.utils.process_pool import default_workers, run_bounded, worker_pool
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Espacio de búsqueda del árbol de prioridad (90 combinaciones)
+PARAM_GRID = {
+    "max_depth": [2, 3, 4, 5, None],
+    "min_samples_split": [2, 4, 8],
+    "min_samples_leaf": [1, 2, 4],
+    "class_weight": [None, "balanced"]
+}
+# Se repite la búsqueda cuando el dataset creció este factor desde la última
+RETUNE_GROWTH = 1.5
+# Usuarios por lote enviado a cada worker
+TUNING_USER_CHUNK = 5
+
+
+def usuarios_para_ajustar():
+    """
+    Usuarios activos con al menos MIN_TUNING_SAMPLES tareas completadas y sin
+    hiperparámetros guardados, o cuyo dataset creció RETUNE_GROWTH veces desde la búsqueda.
+    """
+    completadas = select(
+        Task.user_id, func.count().label("samples")
+    ).where(
+        Task.status == 'completed'
+    ).group_by(Task.user_id).having(func.count() >= settings.MIN_TUNING_SAMPLES).subquery()
+
+    return select(User.id).join(
+        completadas, completadas.c.user_id == User.id
+    ).outerjoin(
+        ModelHyperparameters,
+        (ModelHyperparameters.user_id == User.id) & (ModelHyperparameters.model_type == MODEL_TYPE)
+    ).where(
+        User.is_active == True,
+        or_(
+            ModelHyperparameters.user_id.is_(None),
+            completadas.c.samples >= ModelHyperparameters.samples * RETUNE_GROWTH
+        )
+    )
+
+
+def buscar_hiperparametros(db: Session, user_id: UUID) -> Optional[Dict[str, Any]]:
+    """Búsqueda en rejilla con validación cruzada; devuelve la fila a guardar (None si no hay datos)"""
+    X_df, y = preparar_datos_entrenamiento(db, user_id)
+    if X_df is None or len(X_df) < settings.MIN_TUNING_SAMPLES:
+        return None
+    cv, _ = cv_splitter(y)
+    if cv is None:
+        return None
+
+    # n_jobs=1: el paralelismo está en el pool de procesos (un usuario por worker)
+    search = GridSearchCV(
+        DecisionTreeClassifier(random_state=42), PARAM_GRID,
+        cv=cv, scoring="accuracy", n_jobs=1, refit=False
+    )
+    search.fit(X_df.values, y)
+    return {
+        "user_id": user_id,
+        "model_type": MODEL_TYPE,
+        "params": search.best_params_,
+        "cv_score": round(float(search.best_score_), 4),
+        "samples": len(X_df)
+    }
+
+
+def _buscar_lote(user_ids: List[UUID]) -> Tuple[List[Dict[str, Any]], int, int]:
+    """Se ejecuta en un worker: lee y busca; el padre guarda los resultados en bloque"""
+    db = ReadSessionLocal()
+    filas, omitidos, errores = [], 0, 0
+    try:
+        for user_id in user_ids:
+            try:
+                fila = buscar_hiperparametros(db, user_id)
+                if fila is None:
+                    omitidos += 1
+                else:
+                    filas.append(fila)
+            except Exception as e:
+                errores += 1
+                db.rollback()
+                logger.error(f"❌ Error buscando hiperparámetros de {user_id}: {e}")
+            finally:
+                db.expunge_all()
+    finally:
+        db.close()
+    return filas, omitidos, errores
+
+
+class TuningJob:
+    """
+    Búsqueda de hiperparámetros por usuario repartida en un pool de procesos.
+    Los mejores parámetros se guardan en model_hyperparameters y los reutilizan
+    los reentrenamientos siguientes (nocturno y bajo demanda), que así no repiten la búsqueda.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = TUNING_USER_CHUNK,
+                 limit: Optional[int] = None):
+        self.workers = workers or default_workers()
+        self.chunk_size = chunk_size
+        self.limit = limit
+
+    def _lotes(self, reader: Session) -> Iterator[Tuple[List[UUID]]]:
+        stmt = usuarios_para_ajustar()
+        if self.limit:
+            stmt = stmt.limit(self.limit)
+        result = reader.execute(stmt, execution_options={"yield_per": self.chunk_size})
+        for batch in result.partitions():
+            yield ([row.id for row in batch],)
+
+    def count_pending(self) -> int:
+        db = SessionLocal()
+        try:
+            return db.execute(select(func.count()).select_from(usuarios_para_ajustar().subquery())).scalar()
+        finally:
+            db.close()
+
+    def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        stats = {"users": 0, "tuned": 0, "skipped": 0, "errors": 0}
+
+        # Sesión de lectura aparte: el cursor del servidor no sobrevive a los commits de escritura
+        reader = SessionLocal()
+        db = SessionLocal()
+        try:
+            if self.workers <= 1:
+                resultados = ((args, _buscar_lote(*args), None) for args in self._lotes(reader))
+                self._guardar(db, resultados, stats)
+            else:
+                with worker_pool(self.workers, max_tasks_per_child=settings.RETRAIN_MAX_TASKS_PER_CHILD) as executor:
+                    resultados = run_bounded(executor, _buscar_lote, self._lotes(reader), self.workers * 2)
+                    self._guardar(db, resultados, stats)
+        finally:
+            db.close()
+            reader.close()
+
+        elapsed = time.perf_counter() - started
+        stats["seconds"] = round(elapsed, 2)
+        logger.info(
+            f"✅ Hiperparámetros de {stats['tuned']} usuarios ajustados en {elapsed:.1f} s "
+            f"({stats['skipped']} sin datos suficientes, {stats['errors']} errores, {self.workers} workers)"
+        )
+        return stats
+
+    def _guardar(self, db: Session, resultados, stats: Dict[str, Any]):
+        for (user_ids,), resultado, error in resultados:
+            stats["users"] += len(user_ids)
+            if error is not None:
+                stats["errors"] += len(user_ids)
+                logger.error(f"❌ Lote de {len(user_ids)} usuarios falló: {error}")
+                continue
+
+            filas, omitidos, errores = resultado
+            stats["skipped"] += omitidos
+            stats["errors"] += errores
+            if filas:
+                ModelRegistry.save_hyperparameters(db, filas)
+                db.commit()
+                stats["tuned"] += len(filas)
+            logger.info(f"💾 {stats['tuned']} búsquedas guardadas ({stats['users']} usuarios revisados)")
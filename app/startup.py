@@ -0,0 +1,73 @@
+import os
+import time
+import logging
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+class SchemaMismatchError(RuntimeError):
+    """La revisión de la base de datos no coincide con la cabeza de las migraciones"""
+
+
+def expected_revisions() -> set:
+    """Cabeza(s) de las migraciones incluidas en el código desplegado (sin tocar la BD)"""
+    script = ScriptDirectory.from_config(Config(ALEMBIC_INI))
+    return set(script.get_heads())
+
+
+def current_revisions(engine) -> set:
+    """Revisión aplicada en la base de datos, en una sola consulta"""
+    with engine.connect() as conn:
+        try:
+            rows = conn.execute(text("SELECT version_num FROM alembic_version")).fetchall()
+        except ProgrammingError:
+            return set()
+    return {row[0] for row in rows}
+
+
+def check_schema_revision(engine) -> None:
+    """
+    Verifica que la base de datos esté en la revisión head de Alembic.
+    Reintenta con backoff si la base de datos aún no responde; el DDL nunca
+    se ejecuta aquí, solo con `alembic upgrade head`.
+    """
+    mode = settings.SCHEMA_CHECK
+    if mode == "off":
+        logger.info("ℹ️ Verificación de esquema desactivada (SCHEMA_CHECK=off)")
+        return
+
+    expected = expected_revisions()
+    delay = 0.5
+    # Siempre al menos un intento, aunque SCHEMA_CHECK_RETRIES sea 0 o negativo
+    attempts = max(1, settings.SCHEMA_CHECK_RETRIES)
+    for attempt in range(1, attempts + 1):
+        try:
+            current = current_revisions(engine)
+            break
+        except OperationalError as e:
+            if attempt == attempts:
+                raise
+            logger.warning(f"⏳ Base de datos no disponible (intento {attempt}): {e.orig}")
+            time.sleep(delay)
+            delay = min(delay * 2, 5)
+
+    if current != expected:
+        message = (
+            f"Revisión de esquema {sorted(current) or 'vacía'} distinta de la esperada {sorted(expected)}. "
+            "Ejecuta `alembic upgrade head` antes de arrancar la aplicación."
+        )
+        if mode == "warn":
+            logger.warning(f"⚠️ {message}")
+            return
+        raise SchemaMismatchError(message)
+
+    logger.info(f"✅ Esquema en la revisión {', '.join(sorted(current))}")
@@ -0,0 +1,312 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Resultados recientes por (acción, usuario, clave) para servir cuando se rechaza una petición
+MAX_CACHED_RESULTS = 2000
+# Cubos guardados en memoria antes de purgar los que ya están llenos
+MAX_BUCKETS = 10000
+
+# Cubo de tokens atómico en Redis; usa el reloj del servidor para que todos los workers coincidan
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(now - ts, 0) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+# Libera el candado solo si sigue siendo nuestro (pudo expirar y tomarlo otro worker)
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+# Detalle de la respuesta 429 por motivo de rechazo
+ADMISSION_DETAILS = {
+    "rate_limited": "Too many requests for this operation, try again later",
+    "in_progress": "The same operation is already in progress"
+}
+
+
+class AdmissionRejected(Exception):
+    """Petición no admitida: sin tokens o con la misma operación en curso (main.py la convierte en 429)"""
+
+    def __init__(self, reason: str, retry_after: float, cached: Any = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.cached = cached
+
+    @property
+    def retry_after_header(self) -> Dict[str, str]:
+        return {"Retry-After": str(max(int(self.retry_after + 0.999), 1))}
+
+
+class LocalBackend:
+    """Cubos de tokens y candados en memoria del worker"""
+
+    name = "local"
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        """(admitida, segundos hasta el próximo token)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > MAX_BUCKETS:
+                self._purgar(now, rate, burst)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def _purgar(self, now: float, rate: float, burst: float):
+        # Un cubo que ya se habría rellenado equivale a no tenerlo
+        self._buckets = {
+            key: (tokens, updated) for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * rate < burst
+        }
+
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        # Dentro del worker la exclusión ya la da el single-flight en memoria
+        return ""
+
+    def release(self, key: str, token: Optional[str]):
+        pass
+
+
+class RedisBackend:
+    """Cubos de tokens y candados compartidos entre workers (ADMISSION_REDIS_URL)"""
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        import redis
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._take = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._release = self._client.register_script(RELEASE_LOCK_SCRIPT)
+
+    def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        allowed, tokens = self._take(keys=[f"admission:bucket:{key}"], args=[rate, burst])
+        if allowed:
+            return True, 0.0
+        return False, (1 - float(tokens)) / rate
+
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if self._client.set(f"admission:lock:{key}", token, nx=True, px=int(ttl * 1000)):
+            return token
+        return None
+
+    def release(self, key: str, token: Optional[str]):
+        if token:
+            self._release(keys=[f"admission:lock:{key}"], args=[token])
+
+
+class AdmissionController:
+    """
+    Control de admisión por usuario para una operación cara (entrenar, priorizar).
+    Cada usuario tiene un cubo de tokens (per_minute de ritmo sostenido y burst de
+    ráfaga) y las peticiones idénticas concurrentes se deduplican en el event loop
+    (shared): la primera ejecuta y las demás esperan su resultado sin ocupar un hilo
+    ni gastar tokens. Con un backend compartido el cubo y el candado de la operación
+    valen para todos los workers. Si Redis falla se sigue con el backend en memoria
+    (mejor admitir de más que tumbar la API).
+    """
+
+    def __init__(self, action: str, per_minute: Callable[[], float], burst: Callable[[], int]):
+        self.action = action
+        self._per_minute = per_minute
+        self._burst = burst
+        self._flights: Dict[Hashable, "asyncio.Future"] = {}
+        self._running: Set[Hashable] = set()
+        self._results: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+        self.deduplicated = 0
+        self.served_cached = 0
+
+    async def shared(self, key: Hashable, start: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Single-flight en el event loop, antes de pedir hilo: si ya hay una petición
+        idéntica en curso se espera su resultado (o su excepción) sin ocupar un hilo
+        del limitador; si no, esta petición ejecuta start() y lo comparte.
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(flight), settings.SINGLE_FLIGHT_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                raise self._rechazar("in_progress", settings.ADMISSION_RETRY_SECONDS, None)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                # Se canceló la petición que ejecutaba, no esta
+                raise self._rechazar("in_progress", settings.ADMISSION_RETRY_SECONDS, None)
+            with self._lock:
+                self.deduplicated += 1
+            return result
+
+        flight = self._flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await start()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            # Marca la excepción como recuperada aunque no haya peticiones esperando
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            self._flights.pop(key, None)
+
+    def run(self, user_id, fn: Callable[[], Any], key: Hashable = "") -> Any:
+        """
+        Ejecuta fn si la petición se admite. Lanza AdmissionRejected (con el último
+        resultado de la misma clave en .cached, si lo hay) cuando no quedan tokens o
+        la operación ya está en curso, en este worker (p. ej. /train mientras reentrena
+        un feedback) o en otro. No espera nunca: se ejecuta en un hilo del limitador de ML.
+        """
+        flight_key = (user_id, key)
+        with self._lock:
+            busy = flight_key in self._running
+            if not busy:
+                self._running.add(flight_key)
+        if busy:
+            raise self._rechazar("in_progress", settings.ADMISSION_RETRY_SECONDS, flight_key)
+
+        try:
+            lock_key = f"{self.action}:{user_id}:{key}"
+            backend = admission_backend()
+            allowed, retry_after = self._tomar_token(backend, f"{self.action}:{user_id}")
+            if not allowed:
+                raise self._rechazar("rate_limited", retry_after, flight_key)
+            lock = self._adquirir(backend, lock_key)
+            if lock is None:
+                raise self._rechazar("in_progress", settings.ADMISSION_RETRY_SECONDS, flight_key)
+            try:
+                result = fn()
+            finally:
+                self._liberar(backend, lock_key, lock)
+            with self._lock:
+                self.admitted += 1
+                self._results[flight_key] = result
+                self._results.move_to_end(flight_key)
+                if len(self._results) > MAX_CACHED_RESULTS:
+                    self._results.popitem(last=False)
+            return result
+        finally:
+            with self._lock:
+                self._running.discard(flight_key)
+
+    def _rechazar(self, reason: str, retry_after: float, flight_key: Optional[Hashable]) -> AdmissionRejected:
+        with self._lock:
+            self.rejected += 1
+            cached = self._results.get(flight_key) if flight_key is not None else None
+        return AdmissionRejected(reason, retry_after, cached)
+
+    def _tomar_token(self, backend, bucket_key: str) -> Tuple[bool, float]:
+        rate, burst = self._per_minute() / 60.0, float(self._burst())
+        try:
+            return backend.take(bucket_key, rate, burst)
+        except Exception as e:
+            logger.warning(f"⚠️ Backend de admisión no disponible, se usa el local: {e}")
+            return _local_backend.take(bucket_key, rate, burst)
+
+    def _adquirir(self, backend, lock_key: str) -> Optional[str]:
+        try:
+            return backend.acquire(lock_key, settings.SINGLE_FLIGHT_LOCK_SECONDS)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo tomar el candado compartido de {lock_key}: {e}")
+            return ""
+
+    def _liberar(self, backend, lock_key: str, lock: Optional[str]):
+        try:
+            backend.release(lock_key, lock)
+        except Exception as e:
+            # Expira solo pasado SINGLE_FLIGHT_LOCK_SECONDS
+            logger.warning(f"⚠️ No se pudo liberar el candado compartido de {lock_key}: {e}")
+
+    def served_from_cache(self):
+        with self._lock:
+            self.served_cached += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "deduplicated": self.deduplicated,
+            "served_cached": self.served_cached,
+            "in_flight": len(self._flights) + len(self._running)
+        }
+
+
+_local_backend = LocalBackend()
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def admission_backend():
+    """Backend configurado (Redis si ADMISSION_REDIS_URL está definido y el paquete instalado)"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _local_backend
+                if settings.ADMISSION_REDIS_URL:
+                    try:
+                        _backend = RedisBackend(settings.ADMISSION_REDIS_URL)
+                        logger.info("🔗 Control de admisión compartido en Redis")
+                    except ImportError:
+                        logger.warning("⚠️ ADMISSION_REDIS_URL definido pero falta el paquete redis; se usa el backend local")
+    return _backend
+
+
+# Entrenar (explícito o por feedback negativo) comparte cubo: el coste es el mismo
+train_admission = AdmissionController(
+    "train", lambda: settings.ML_TRAIN_PER_MINUTE, lambda: settings.ML_TRAIN_BURST
+)
+prioritized_admission = AdmissionController(
+    "prioritized", lambda: settings.ML_PRIORITIZED_PER_MINUTE, lambda: settings.ML_PRIORITIZED_BURST
+)
+
+
+def admission_stats() -> Dict[str, Any]:
+    return {
+        "backend": admission_backend().name,
+        "train": train_admission.stats(),
+        "prioritized": prioritized_admission.stats()
+    }
@@ -0,0 +1,104 @@
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import anyio
+import anyio.to_thread
+
+from app.config import settings
+
+
+class ThreadLimiter:
+    """
+    Límite de hilos propio para un grupo de rutas síncronas. El CapacityLimiter de
+    anyio se crea al primer uso (necesita el event loop en marcha) y se registran
+    la cola (peticiones esperando un hilo) y el tiempo de espera acumulado.
+    """
+
+    def __init__(self, name: str, tokens: Callable[[], int]):
+        self.name = name
+        self._tokens = tokens
+        self._limiter: Optional[anyio.CapacityLimiter] = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.max_waiting = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def limiter(self) -> anyio.CapacityLimiter:
+        if self._limiter is None:
+            with self._lock:
+                if self._limiter is None:
+                    self._limiter = anyio.CapacityLimiter(self._tokens())
+        return self._limiter
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        limiter = self.limiter
+        waiting = limiter.statistics().tasks_waiting + (1 if limiter.available_tokens == 0 else 0)
+        self.max_waiting = max(self.max_waiting, waiting)
+        self.calls += 1
+        queued_at = time.perf_counter()
+
+        def call():
+            # Ya en el hilo: el tiempo hasta aquí es la espera en la cola del limitador
+            with self._lock:
+                self.wait_seconds += time.perf_counter() - queued_at
+            return fn(*args, **kwargs)
+
+        return await anyio.to_thread.run_sync(call, limiter=limiter)
+
+    def stats(self) -> Dict[str, Any]:
+        if self._limiter is None:
+            return {"threads": self._tokens(), "busy": 0, "waiting": 0, "max_waiting": 0, "calls": 0, "wait_ms": 0.0}
+        statistics = self._limiter.statistics()
+        return {
+            "threads": int(statistics.total_tokens),
+            "busy": statistics.borrowed_tokens,
+            "waiting": statistics.tasks_waiting,
+            "max_waiting": self.max_waiting,
+            "calls": self.calls,
+            "wait_ms": round(self.wait_seconds * 1000, 1)
+        }
+
+
+ml_threads = ThreadLimiter("ml", lambda: settings.ML_THREADS)
+
+
+def ml_endpoint(fn: Optional[Callable] = None, *, single_flight=None,
+                key: Optional[Callable[..., Hashable]] = None) -> Callable:
+    """
+    Ejecuta un endpoint síncrono en el limitador de ML en lugar del threadpool por
+    defecto, para que una ráfaga de entrenamientos o priorizaciones no deje sin
+    hilos a las rutas CRUD. functools.wraps conserva la firma para FastAPI.
+
+    Con single_flight (un AdmissionController) y key (clave a partir de los
+    argumentos resueltos del endpoint), las peticiones idénticas en curso se
+    deduplican en el event loop antes de pedir hilo: los duplicados no ocupan el limitador.
+    """
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if single_flight is None:
+                return await ml_threads.run(fn, *args, **kwargs)
+            return await single_flight.shared(key(**kwargs), lambda: ml_threads.run(fn, *args, **kwargs))
+        return wrapper
+    return decorate(fn) if fn is not None else decorate
+
+
+def configure_default_threads():
+    """Ajusta el threadpool por defecto (rutas CRUD y dependencias); llamar con el loop en marcha"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.CRUD_THREADS
+
+
+def thread_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Ocupación y cola de cada limitador (llamar desde el event loop, p. ej. un endpoint async)"""
+    default = anyio.to_thread.current_default_thread_limiter().statistics()
+    return {
+        "crud": {
+            "threads": int(default.total_tokens),
+            "busy": default.borrowed_tokens,
+            "waiting": default.tasks_waiting
+        },
+        "ml": ml_threads.stats()
+    }
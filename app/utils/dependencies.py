@@ -0,0 +1,14 @@
+from fastapi import Depends
+
+from app.database import read_session_for
+from app.models.database_models import User
+from app.security.auth import get_current_active_user
+
+
+def get_read_db(current_user: User = Depends(get_current_active_user)):
+    """Sesión de lectura para endpoints GET (réplica con read-your-writes)"""
+    db = read_session_for(current_user.id)
+    try:
+        yield db
+    finally:
+        db.close()
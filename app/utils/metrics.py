@@ -0,0 +1,318 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# PlainTextResponse añade "; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+COMMIT_BUCKETS = (0, 1, 2, 5, 10)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+AGENT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Una familia de métricas ya calculada: (nombre, tipo, ayuda, [(etiquetas, valor)])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Contador monótono con etiquetas (valores posicionales en el orden de label_names)"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in values]
+
+
+class Histogram:
+    """Histograma acumulativo con buckets fijos, como los de prometheus_client"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def time(self, *labels) -> "_Timer":
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class MetricsRegistry:
+    """
+    Registro en memoria del proceso. Los contadores e histogramas se actualizan en el
+    camino de la petición; los valores que ya mantienen otros módulos (cachés, hilos,
+    arranque) se leen al exportar mediante collectors que devuelven familias.
+    """
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, help: str, label_names: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Texto en el formato de exposición de Prometheus (0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "smarttask_http_requests_total", "Peticiones HTTP por ruta y código", ("method", "route", "status")
+)
+HTTP_LATENCY = registry.histogram(
+    "smarttask_http_request_duration_seconds", "Latencia de las peticiones por ruta", ("method", "route")
+)
+REQUEST_QUERIES = registry.histogram(
+    "smarttask_http_request_db_queries", "Consultas SQL por petición", ("method", "route"), QUERY_BUCKETS
+)
+REQUEST_COMMITS = registry.histogram(
+    "smarttask_http_request_db_commits", "Commits por petición", ("method", "route"), COMMIT_BUCKETS
+)
+REQUEST_POOL_WAIT = registry.histogram(
+    "smarttask_http_request_db_pool_wait_seconds", "Espera de pool acumulada por petición", ("method", "route"),
+    POOL_WAIT_BUCKETS
+)
+DB_QUERIES = registry.counter("smarttask_db_queries_total", "Consultas SQL ejecutadas (peticiones y trabajos)")
+DB_COMMITS = registry.counter("smarttask_db_commits_total", "Commits de transacciones")
+POOL_WAIT = registry.histogram(
+    "smarttask_db_pool_wait_seconds", "Espera para obtener una conexión del pool", ("engine",), POOL_WAIT_BUCKETS
+)
+AGENT_SECONDS = registry.histogram(
+    "smarttask_agent_seconds", "Duración de las operaciones de TaskAgent", ("operation",), AGENT_BUCKETS
+)
+PREDICTIONS = registry.counter(
+    "smarttask_predictions_total", "Priorizaciones por origen del puntaje (ml, population, rules)", ("source",)
+)
+PREDICTED_TASKS = registry.counter(
+    "smarttask_predicted_tasks_total", "Tareas puntuadas por origen del puntaje", ("source",)
+)
+
+
+class RequestStats:
+    """Consultas, commits y espera de pool de la petición en curso"""
+
+    __slots__ = ("queries", "commits", "pool_wait")
+
+    def __init__(self):
+        self.queries = 0
+        self.commits = 0
+        self.pool_wait = 0.0
+
+
+# Se copia a los hilos del threadpool con el contexto; al ser mutable, los hilos suman sobre el mismo objeto
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    DB_QUERIES.inc()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+
+
+@event.listens_for(Engine, "commit")
+def _count_commit(conn):
+    DB_COMMITS.inc()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.commits += 1
+
+
+def instrument_pool(engine: Engine, name: str):
+    """
+    Mide la espera de checkout del pool del engine. El pool no tiene evento previo al
+    checkout, así que se envuelve su _do_get (cola de conexiones libres o creación de
+    una nueva); incluye el tiempo de conexión cuando el pool aún no está lleno.
+    """
+    pool = engine.pool
+    if getattr(pool, "_metrics_instrumented", False):
+        return
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            waited = time.perf_counter() - started
+            POOL_WAIT.observe(waited, name)
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.pool_wait += waited
+
+    pool._do_get = timed_do_get
+    pool._metrics_instrumented = True
+
+
+def pool_status(engine: Engine) -> Dict[str, float]:
+    pool = engine.pool
+    status = {}
+    for key in ("size", "checkedout", "overflow", "checkedin"):
+        getter = getattr(pool, key, None)
+        if getter is not None:
+            status[key] = getter()
+    # QueuePool cuenta el overflow desde -pool_size; solo interesan las conexiones extra abiertas
+    if "overflow" in status:
+        status["overflow"] = max(status["overflow"], 0)
+    return status
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: latencia, código y consultas/commits por ruta. La etiqueta es la
+    plantilla de la ruta (/api/v1/tasks/{task_id}), no la URL, para no disparar la
+    cardinalidad; las peticiones sin ruta se agrupan en "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_REQUESTS.inc(method, path, str(status_code))
+            HTTP_LATENCY.observe(elapsed, method, path)
+            REQUEST_QUERIES.observe(stats.queries, method, path)
+            REQUEST_COMMITS.observe(stats.commits, method, path)
+            REQUEST_POOL_WAIT.observe(stats.pool_wait, method, path)
+
+
+def gauge(name: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> Family:
+    return name, "gauge", help, list(samples)
+
+
+def cache_families(caches: Dict[str, Dict]) -> List[Family]:
+    """Aciertos, fallos y tasa de acierto de cachés con cache_info() {hits, misses}"""
+    hits, misses, ratios = [], [], []
+    for name, info in caches.items():
+        total = info["hits"] + info["misses"]
+        hits.append(({"cache": name}, info["hits"]))
+        misses.append(({"cache": name}, info["misses"]))
+        ratios.append(({"cache": name}, info["hits"] / total if total else 0.0))
+    return [
+        ("smarttask_cache_hits_total", "counter", "Aciertos de caché", hits),
+        ("smarttask_cache_misses_total", "counter", "Fallos de caché", misses),
+        gauge("smarttask_cache_hit_ratio", "Tasa de acierto de caché desde el arranque", ratios)
+    ]
@@ -0,0 +1,65 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker(log_level: int):
+    """Inicializa cada proceso: logging propio y sin conexiones heredadas del padre"""
+    from app.database import engine, read_engine
+    logging.basicConfig(level=log_level, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    logging.getLogger("app").setLevel(log_level)
+    engine.dispose(close=False)
+    if read_engine is not engine:
+        read_engine.dispose(close=False)
+
+
+def default_workers() -> int:
+    return settings.BATCH_WORKERS or os.cpu_count() or 1
+
+
+def worker_pool(workers: Optional[int] = None, max_tasks_per_child: Optional[int] = None,
+                log_level: int = logging.WARNING) -> ProcessPoolExecutor:
+    """
+    Pool de procesos para los trabajos por lotes. Usa 'spawn' para que ningún
+    worker herede conexiones ni estado del padre; con max_tasks_per_child cada
+    proceso se recicla tras N lotes y la memoria no crece sin límite.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers or default_workers(),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(log_level,),
+        max_tasks_per_child=max_tasks_per_child
+    )
+
+
+def run_bounded(executor: ProcessPoolExecutor, fn: Callable, items: Iterable[Tuple],
+                max_in_flight: int) -> Iterator[Tuple[Tuple, Any, Optional[BaseException]]]:
+    """
+    Envía fn(*args) por cada args de items sin tener más de max_in_flight lotes
+    pendientes (memoria acotada aunque items sea muy grande) y devuelve
+    (args, resultado, error) a medida que terminan.
+    """
+    pending: Dict[Future, Tuple] = {}
+    items = iter(items)
+    exhausted = False
+    while True:
+        while not exhausted and len(pending) < max_in_flight:
+            args = next(items, None)
+            if args is None:
+                exhausted = True
+                break
+            pending[executor.submit(fn, *args)] = args
+        if not pending:
+            return
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            args = pending.pop(future)
+            error = future.exception()
+            yield args, (None if error else future.result()), error
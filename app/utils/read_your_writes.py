@@ -0,0 +1,104 @@
+import time
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import Optional
+
+from app.config import settings
+
+# Marca de la última escritura que lleva el cliente: cookie (navegador) o cabecera (otros clientes)
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+# Tolerancia a la diferencia de reloj entre workers/hosts
+CLOCK_SKEW_SECONDS = 1.0
+
+
+class RequestWrites:
+    """Marca recibida del cliente y hora del último commit con escrituras de usuario en la petición"""
+
+    __slots__ = ("client_last_write", "committed_at")
+
+    def __init__(self, client_last_write: Optional[float]):
+        self.client_last_write = client_last_write
+        self.committed_at: Optional[float] = None
+
+
+# Mutable: los hilos del threadpool reciben una copia del contexto con el mismo objeto
+_request_writes: ContextVar[Optional[RequestWrites]] = ContextVar("request_writes", default=None)
+
+
+def record_commit():
+    """Anota en la petición en curso (si la hay) que se confirmaron escrituras de usuario"""
+    writes = _request_writes.get()
+    if writes is not None:
+        writes.committed_at = time.time()
+
+
+def client_wrote_recently() -> bool:
+    """Si el cliente de la petición en curso escribió (en cualquier worker) dentro de la ventana"""
+    writes = _request_writes.get()
+    if writes is None or writes.client_last_write is None:
+        return False
+    age = time.time() - writes.client_last_write
+    return -CLOCK_SKEW_SECONDS <= age <= settings.READ_YOUR_WRITES_SECONDS
+
+
+def _parse_marker(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _client_marker(scope) -> Optional[float]:
+    marker = None
+    for name, value in scope.get("headers", ()):
+        if name == LAST_WRITE_HEADER.lower().encode():
+            marker = _parse_marker(value.decode("latin-1"))
+        elif name == b"cookie":
+            cookie = SimpleCookie()
+            try:
+                cookie.load(value.decode("latin-1"))
+            except Exception:
+                continue
+            if LAST_WRITE_COOKIE in cookie and marker is None:
+                marker = _parse_marker(cookie[LAST_WRITE_COOKIE].value)
+    return marker
+
+
+class ReadYourWritesMiddleware:
+    """
+    Read-your-writes entre workers: la respuesta de una petición que confirmó escrituras
+    lleva la hora del commit en la cookie last_write y en la cabecera X-Last-Write
+    (que el cliente puede reenviar). Mientras esa marca esté dentro de
+    READ_YOUR_WRITES_SECONDS las lecturas van al primario, lo atienda el worker que
+    lo atienda. Una marca falsa solo desvía lecturas al primario durante la ventana.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        writes = RequestWrites(_client_marker(scope))
+        token = _request_writes.set(writes)
+
+        async def send_with_marker(message):
+            if message["type"] == "http.response.start" and writes.committed_at is not None:
+                marker = f"{writes.committed_at:.3f}"
+                max_age = int(settings.READ_YOUR_WRITES_SECONDS + 0.999)
+                headers = list(message.get("headers", []))
+                headers.append((LAST_WRITE_HEADER.lower().encode(), marker.encode()))
+                headers.append((
+                    b"set-cookie",
+                    f"{LAST_WRITE_COOKIE}={marker}; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax".encode()
+                ))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_marker)
+        finally:
+            _request_writes.reset(token)
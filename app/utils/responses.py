@@ -0,0 +1,34 @@
+from typing import Any, List, Type
+
+from pydantic import BaseModel
+from pydantic_core import to_json
+from sqlalchemy import Float, Numeric, cast
+from starlette.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Respuesta JSON serializada en bloque con el serializador de pydantic-core.
+    Acepta dicts/listas con UUID, datetime y JSONB tal cual vienen de la base
+    de datos, sin pasar por jsonable_encoder ni por la validación del response_model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def columns_for(model, schema: Type[BaseModel]) -> List:
+    """Columnas del modelo ORM que corresponden a los campos del schema de respuesta"""
+    columns = []
+    for name in schema.model_fields:
+        column = getattr(model, name)
+        # DECIMAL se serializaría como string; los schemas lo exponen como float
+        if isinstance(column.type, Numeric) and not isinstance(column.type, Float):
+            column = cast(column, Float).label(name)
+        columns.append(column)
+    return columns
+
+
+def rows_as_dicts(rows) -> List[dict]:
+    """Convierte filas (tuplas) de una consulta proyectada en dicts listos para serializar"""
+    return [row._asdict() for row in rows]
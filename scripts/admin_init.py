@@ -176,12 +176,13 @@ if __name__ == "__main__":
     print("🛠️  Script de creación de administrador")
     print("=" * 50)
     
-    # Crear tablas si no existen
+    # Verificar que las migraciones estén aplicadas (alembic upgrade head)
     try:
-        Base.metadata.create_all(bind=engine)
+        from app.startup import check_schema_revision
+        check_schema_revision(engine)
         print("✅ Tablas de base de datos verificadas")
     except Exception as e:
-        print(f"❌ Error al crear tablas: {e}")
+        print(f"❌ Error al verificar el esquema: {e}")
         sys.exit(1)
     
     # Opciones
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark del plan del día (300 tareas pendientes por defecto).
+
+Mide DayPlanner.plan (mochila por programación dinámica + colocación EDF con
+ventanas de energía) sobre tareas sintéticas con duraciones, deadlines y
+energía variados, y lo compara con la planificación voraz por densidad.
+No necesita base de datos. El objetivo es quedar muy por debajo de 100 ms.
+
+Uso:
+    python scripts/benchmarks/bench_day_plan.py [--tasks 300] [--hours 10] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.services.planner import DayPlanner
+from app.services.schedule_service import EnergyProfile
+
+OBJETIVO_MS = 100
+
+
+def generar_perfil(rng) -> EnergyProfile:
+    # Más energía por la mañana, bajón después de comer
+    horas = np.arange(24)
+    media = 2 + 0.8 * np.exp(-((horas - 10) ** 2) / 8) - 0.6 * np.exp(-((horas - 15) ** 2) / 4)
+    counts = rng.integers(2, 6, (7, 24)).astype(float)
+    sums = counts * np.clip(media + rng.normal(0, 0.1, (7, 24)), 1, 3)
+    return EnergyProfile(uuid.uuid4(), counts, sums)
+
+
+def generar_items(planner: DayPlanner, n: int, rng):
+    items = []
+    for i in range(n):
+        deadline = None
+        if rng.random() < 0.4:
+            deadline = planner.start + timedelta(minutes=int(rng.integers(30, 24 * 60)))
+        items.append(planner.build_item(
+            uuid.uuid4(), f"Tarea {i}",
+            float(rng.uniform(0.5, 7.5)),
+            int(rng.choice([15, 30, 45, 60, 90, 120, 180])),
+            str(rng.choice(["low", "medium", "high"])),
+            deadline
+        ))
+    return items
+
+
+def medir(nombre: str, fn, repeat: int):
+    resultado = fn()  # calentamiento
+    tiempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        resultado = fn()
+        tiempos.append(time.perf_counter() - inicio)
+    mejor = min(tiempos) * 1000
+    medio = sum(tiempos) / len(tiempos) * 1000
+    print(f"  {nombre:<22} mejor: {mejor:7.2f} ms   medio: {medio:7.2f} ms   "
+          f"tareas: {len(resultado['scheduled']):3d}   prioridad: {resultado['total_priority']:8.2f}")
+    return medio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=300)
+    parser.add_argument("--hours", type=float, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    start = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    planner = DayPlanner(start, args.hours, generar_perfil(rng))
+    items = generar_items(planner, args.tasks, rng)
+
+    print(f"📊 Plan de {args.hours:g} h con {args.tasks} tareas ({args.repeat} repeticiones)")
+    dp = medir("DP + EDF", lambda: planner.plan(items, time_budget_ms=1000), args.repeat)
+    # Presupuesto cero: fuerza el camino voraz
+    medir("voraz", lambda: planner.plan(items, time_budget_ms=0), args.repeat)
+
+    if dp < OBJETIVO_MS:
+        print(f"✅ DP + EDF dentro del objetivo ({dp:.2f} ms < {OBJETIVO_MS} ms)")
+    else:
+        print(f"❌ DP + EDF fuera del objetivo ({dp:.2f} ms >= {OBJETIVO_MS} ms)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialización de listados (1k filas por defecto).
+
+Compara el camino anterior (entidades ORM + response_model de FastAPI +
+jsonable_encoder + JSONResponse) con el camino rápido (filas proyectadas
+como tuplas + FastJSONResponse). No necesita base de datos: las filas se
+generan en memoria, así que mide solo hidratación y serialización.
+
+Uso:
+    python scripts/benchmarks/bench_list_responses.py [--rows 1000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.database_models import Task
+from app.models.pydantic_models import TaskResponse
+from app.utils.responses import FastJSONResponse, rows_as_dicts
+
+
+def generar_datos(n: int) -> List[dict]:
+    user_id = uuid.uuid4()
+    ahora = datetime.now()
+    datos = []
+    for i in range(n):
+        datos.append({
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "category_id": None,
+            "title": f"Tarea de prueba {i}",
+            "description": "Descripción larga de la tarea " * 10,
+            "urgency": "high" if i % 3 == 0 else "medium",
+            "impact": "low" if i % 2 else "high",
+            "estimated_duration": 30 + i % 120,
+            "deadline": ahora + timedelta(days=i % 7),
+            "priority_score": 1 + i % 100,
+            "priority_level": "medium",
+            "completion_probability": Decimal("0.5000"),
+            "status": "pending",
+            "energy_required": "medium",
+            "created_at": ahora,
+            "updated_at": ahora,
+            "completed_at": None,
+            "actual_duration": None,
+        })
+    return datos
+
+
+def camino_actual(datos: List[dict], field) -> bytes:
+    tareas = [Task(**d) for d in datos]
+    contenido = asyncio.run(serialize_response(field=field, response_content=tareas))
+    return JSONResponse(contenido).body
+
+
+def camino_rapido(datos: List[dict], Fila) -> bytes:
+    filas = [Fila(**dict(d, completion_probability=float(d["completion_probability"]))) for d in datos]
+    return FastJSONResponse(rows_as_dicts(filas)).body
+
+
+def medir(nombre: str, fn, repeat: int) -> float:
+    fn()  # calentamiento
+    tiempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - inicio)
+    mejor = min(tiempos) * 1000
+    medio = sum(tiempos) / len(tiempos) * 1000
+    print(f"  {nombre:<28} mejor: {mejor:8.2f} ms   medio: {medio:8.2f} ms")
+    return medio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    datos = generar_datos(args.rows)
+    field = create_response_field(name="Response", type_=List[TaskResponse])
+    # Las filas proyectadas se comportan como namedtuples (Row._asdict)
+    Fila = namedtuple("Fila", list(TaskResponse.model_fields))
+
+    print(f"📊 Serializando {args.rows} tareas ({args.repeat} repeticiones)")
+    actual = medir("ORM + response_model", lambda: camino_actual(datos, field), args.repeat)
+    rapido = medir("tuplas + FastJSONResponse", lambda: camino_rapido(datos, Fila), args.repeat)
+    print(f"⚡ Aceleración: {actual / rapido:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
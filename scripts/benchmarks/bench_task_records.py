@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria y latencia del camino de puntuación (50k tareas pendientes
+de un usuario por defecto).
+
+Compara entidades ORM Task (con estado de instrumentación y seguimiento de
+cambios), filas proyectadas (tuplas con nombre, como las Row de SQLAlchemy) y
+TaskRecord con __slots__. Para cada representación mide la memoria retenida
+(tracemalloc), el tiempo de construcción y el de puntuar todo el lote con el
+modelo (características + predict) y con las reglas. No necesita base de
+datos: las tareas se generan en memoria.
+
+Uso:
+    python scripts/benchmarks/bench_task_records.py [--tasks 50000] [--repeat 3]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.models.database_models import Task
+from app.services.ai_service import caracteristicas, entrenar_clasificador, puntaje_por_reglas
+from app.services.task_records import TaskRecord
+
+CAMPOS = list(TaskRecord.__slots__)
+FilaProyectada = namedtuple("FilaProyectada", CAMPOS)
+
+TITULOS = ["Revisar informe", "Fix bug en login", "Preparar reunión", "Urgente: deploy", "Leer documentación"]
+DESCRIPCIONES = [None, "", "Detalles de la tarea pendiente", "Error crítico en producción, resolver hoy"]
+
+
+def generar_datos(n: int, rng) -> list:
+    ahora = datetime.now()
+    niveles = ["low", "medium", "high"]
+    datos = []
+    for i in range(n):
+        datos.append({
+            "id": uuid.uuid4(),
+            "title": f"{TITULOS[i % len(TITULOS)]} {i}",
+            "description": DESCRIPCIONES[i % len(DESCRIPCIONES)],
+            "urgency": niveles[rng.integers(3)],
+            "impact": niveles[rng.integers(3)],
+            "energy_required": niveles[rng.integers(3)],
+            "estimated_duration": int(rng.choice([15, 30, 60, 120, 240])),
+            "deadline": ahora + timedelta(hours=int(rng.integers(-24, 24 * 14))) if rng.random() < 0.6 else None,
+            "priority_level": niveles[rng.integers(3)],
+            "completed_at": None
+        })
+    return datos
+
+
+def construir(nombre: str, datos: list):
+    if nombre == "entidades ORM":
+        return [Task(**d) for d in datos]
+    if nombre == "filas proyectadas":
+        return [FilaProyectada(**d) for d in datos]
+    return [TaskRecord(**d) for d in datos]
+
+
+def medir_memoria(nombre: str, datos: list):
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    tareas = construir(nombre, datos)
+    construccion = (time.perf_counter() - inicio) * 1000
+    retenida, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tareas, retenida, pico, construccion
+
+
+def medir_tiempo(fn, repeat: int) -> float:
+    fn()  # calentamiento
+    tiempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    datos = generar_datos(args.tasks, rng)
+
+    # Modelo pequeño entrenado sobre una muestra, como el de un usuario real
+    muestra = [TaskRecord(**d) for d in datos[:200]]
+    modelo = entrenar_clasificador(
+        np.array([caracteristicas(t) for t in muestra]),
+        np.array([int(rng.integers(1, 4)) for _ in muestra])
+    )
+
+    print(f"📊 Puntuación de {args.tasks} tareas pendientes (mejor de {args.repeat})")
+    print(f"  {'representación':<18} {'memoria':>10} {'pico':>10} {'construir':>11} {'modelo':>10} {'reglas':>10}")
+    resultados = {}
+    for nombre in ("entidades ORM", "filas proyectadas", "TaskRecord"):
+        tareas, retenida, pico, construccion = medir_memoria(nombre, datos)
+        ml = medir_tiempo(lambda: modelo.predict(np.array([caracteristicas(t) for t in tareas])), args.repeat)
+        reglas = medir_tiempo(lambda: [puntaje_por_reglas(t) for t in tareas], args.repeat)
+        resultados[nombre] = retenida
+        print(f"  {nombre:<18} {retenida / 2**20:7.1f} MB {pico / 2**20:7.1f} MB {construccion:8.1f} ms "
+              f"{ml:7.1f} ms {reglas:7.1f} ms")
+        del tareas
+        gc.collect()
+
+    ahorro = 1 - resultados["TaskRecord"] / resultados["entidades ORM"]
+    print(f"✅ TaskRecord retiene un {ahorro:.0%} menos de memoria que las entidades ORM")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Compacta ai_models: conserva el modelo activo y las últimas MODEL_RETENTION
+versiones por usuario y tipo, y borra el resto en lotes pequeños. Cada
+reentrenamiento ya poda las versiones de su usuario; este script limpia el
+histórico acumulado y se puede programar en cron, p. ej. tras el reentrenamiento:
+
+    0 5 * * * cd /app && python scripts/compact_models.py
+"""
+
+import argparse
+import os
+import sys
+
+# Añadir el directorio raíz al path para importar los módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.model_registry import ModelRegistry, COMPACTION_BATCH_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep", type=int, default=settings.MODEL_RETENTION, help="Versiones por usuario y tipo")
+    parser.add_argument("--batch-size", type=int, default=COMPACTION_BATCH_SIZE, help="Filas borradas por lote")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        deleted = ModelRegistry.compact(db, keep=args.keep, batch_size=args.batch_size)
+        print(f"✅ {deleted} modelos antiguos eliminados (se conservan {args.keep} por usuario y tipo)")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Genera las recomendaciones diarias (top-k tareas por usuario) de todos los
+usuarios activos. Pensado para ejecutarse una vez al día desde cron, p. ej.:
+
+    15 6 * * * cd /app && python scripts/generate_recommendations.py
+
+Los usuarios que ya tienen recomendaciones para la fecha se omiten, así que
+volver a ejecutarlo el mismo día solo completa los que faltan.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import date
+
+# Añadir el directorio raíz al path para importar los módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.recommendation_service import RecommendationEngine, RECOMMENDATION_USER_CHUNK
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="Fecha (YYYY-MM-DD), por defecto hoy")
+    parser.add_argument("--top-k", type=int, default=None, help="Recomendaciones por usuario (RECOMMENDATIONS_TOP_K)")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool (BATCH_WORKERS, 1 = sin pool)")
+    parser.add_argument("--chunk-size", type=int, default=RECOMMENDATION_USER_CHUNK, help="Usuarios por lote")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    # El detalle por tarea de TaskAgent no aporta en un trabajo por lotes
+    logging.getLogger("app.services.ai_service").setLevel(logging.WARNING)
+
+    try:
+        stats = RecommendationEngine(args.date, args.top_k, args.workers, args.chunk_size).run()
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    print(f"✅ {stats['recommendations']} recomendaciones para {stats['users']} usuarios ({stats['date']})")
+    print(f"⏱️ {stats['seconds']} s en total, {stats['seconds_per_1000_users']} s por 1000 usuarios")
+    if stats["errors"]:
+        print(f"⚠️ {stats['errors']} usuarios con errores")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
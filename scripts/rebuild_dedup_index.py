@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Script para (re)construir el índice de duplicados (task_dedup_bands)
+de las tareas abiertas existentes. Solo es necesario una vez tras aplicar
+la migración 0004; las tareas nuevas se indexan al crearse.
+"""
+
+import sys
+import os
+
+# Añadir el directorio raíz al path para importar los módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models.database_models import Task
+from app.services.dedup_service import DuplicateDetector, OPEN_STATUSES
+
+BATCH_SIZE = 500
+
+def rebuild_index():
+    # Sesión de lectura aparte: el cursor del servidor no sobrevive a los commits de escritura
+    reader = SessionLocal()
+    db = SessionLocal()
+    try:
+        total = 0
+        stmt = select(Task.id, Task.user_id, Task.title).where(Task.status.in_(OPEN_STATUSES))
+        result = reader.execute(stmt, execution_options={"yield_per": BATCH_SIZE})
+        for batch in result.partitions():
+            for task in batch:
+                DuplicateDetector.index_task(db, task)
+            db.commit()
+            total += len(batch)
+            print(f"🔄 {total} tareas indexadas...")
+        print(f"✅ Índice de duplicados reconstruido ({total} tareas)")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+        reader.close()
+
+if __name__ == "__main__":
+    rebuild_index()
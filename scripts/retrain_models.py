@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Reentrena los modelos de prioridad de los usuarios cuyo dataset cambió desde
+su último modelo (tareas completadas o feedback nuevos, o sin modelo aún).
+Pensado para ejecutarse cada noche desde cron, p. ej.:
+
+    30 3 * * * cd /app && python scripts/retrain_models.py
+
+La duración y el tamaño del dataset de cada entrenamiento quedan en
+ai_models.training_metadata.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Añadir el directorio raíz al path para importar los módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.training_service import RetrainingJob, RETRAIN_USER_CHUNK
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool (BATCH_WORKERS, 1 = sin pool)")
+    parser.add_argument("--chunk-size", type=int, default=RETRAIN_USER_CHUNK, help="Usuarios por lote")
+    parser.add_argument("--limit", type=int, default=None, help="Máximo de usuarios en esta ejecución")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar los usuarios pendientes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    # El detalle por tarea de TaskAgent no aporta en un trabajo por lotes
+    logging.getLogger("app.services.ai_service").setLevel(logging.WARNING)
+
+    job = RetrainingJob(args.workers, args.chunk_size, args.limit)
+    try:
+        if args.dry_run:
+            print(f"🔍 {job.count_pending()} usuarios con datos nuevos para reentrenar")
+            return
+        stats = job.run()
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    print(f"✅ {stats['trained']} modelos reentrenados ({stats['users']} usuarios revisados, "
+          f"{stats['skipped']} sin datos suficientes)")
+    print(f"⏱️ {stats['seconds']} s en total, {stats['train_ms']} ms de entrenamiento, {stats['samples']} tareas")
+    if stats["errors"]:
+        print(f"⚠️ {stats['errors']} usuarios con errores")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -147,12 +147,13 @@ if __name__ == "__main__":
     print("🛠️  Script de inicialización de datos de prueba")
     print("=" * 50)
     
-    # Crear tablas si no existen
+    # Verificar que las migraciones estén aplicadas (alembic upgrade head)
     try:
-        Base.metadata.create_all(bind=engine)
+        from app.startup import check_schema_revision
+        check_schema_revision(engine)
         print("✅ Tablas de base de datos verificadas")
     except Exception as e:
-        print(f"❌ Error al crear tablas: {e}")
+        print(f"❌ Error al verificar el esquema: {e}")
         sys.exit(1)
     
     create_admin_user()
\ No newline at end of file
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Busca los mejores hiperparámetros del modelo de prioridad de cada usuario
+(búsqueda en rejilla con validación cruzada repartida en un pool de procesos)
+y los guarda en model_hyperparameters. Los reentrenamientos siguientes los
+reutilizan sin repetir la búsqueda. Pensado para cron semanal, p. ej.:
+
+    0 2 * * 0 cd /app && python scripts/tune_models.py
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Añadir el directorio raíz al path para importar los módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.tuning_service import TuningJob, TUNING_USER_CHUNK
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool (BATCH_WORKERS, 1 = sin pool)")
+    parser.add_argument("--chunk-size", type=int, default=TUNING_USER_CHUNK, help="Usuarios por lote")
+    parser.add_argument("--limit", type=int, default=None, help="Máximo de usuarios en esta ejecución")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar los usuarios pendientes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger("app.services.ai_service").setLevel(logging.WARNING)
+
+    job = TuningJob(args.workers, args.chunk_size, args.limit)
+    try:
+        if args.dry_run:
+            print(f"🔍 {job.count_pending()} usuarios pendientes de búsqueda de hiperparámetros")
+            return
+        stats = job.run()
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    print(f"✅ Hiperparámetros ajustados para {stats['tuned']} usuarios ({stats['users']} revisados, "
+          f"{stats['skipped']} sin datos suficientes)")
+    print(f"⏱️ {stats['seconds']} s en total")
+    if stats["errors"]:
+        print(f"⚠️ {stats['errors']} usuarios con errores")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import uuid
+from unittest import mock
+
+from starlette.requests import Request
+
+from app.services import collection_versions
+from app.services.collection_versions import check_collection_etag
+
+USER_ID = uuid.uuid4()
+
+
+def _request(query: str, if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": query.encode(), "headers": headers})
+
+
+def _etag(query: str, if_none_match: str = None, versions=None, extra: str = ""):
+    versions = versions or {"tasks": 3}
+    with mock.patch.object(collection_versions, "get_collection_versions", return_value=versions):
+        return check_collection_etag(_request(query, if_none_match), None, USER_ID, ["tasks"], extra)
+
+
+def test_etag_distinto_por_pagina_y_filtro():
+    etags = {_etag(q)[0] for q in ("", "skip=0&limit=10", "skip=10&limit=10", "status=pending")}
+    assert len(etags) == 4
+
+
+def test_etag_ignora_el_orden_de_los_parametros():
+    assert _etag("skip=10&limit=5")[0] == _etag("limit=5&skip=10")[0]
+
+
+def test_304_solo_para_la_misma_query():
+    etag, _ = _etag("skip=0&limit=10")
+    assert _etag("skip=0&limit=10", etag)[1].status_code == 304
+    assert _etag("skip=10&limit=10", etag)[1] is None
+
+
+def test_etag_cambia_con_la_version_y_el_extra():
+    base = _etag("limit=10")[0]
+    assert _etag("limit=10", versions={"tasks": 4})[0] != base
+    assert _etag("limit=10", extra="modelo-2")[0] != base
@@ -0,0 +1,67 @@
+import uuid
+from datetime import datetime
+from unittest import mock
+
+import numpy as np
+
+from app.services import schedule_service
+from app.services.schedule_service import EnergyProfile, EnergyProfileCache
+
+LUNES_10 = datetime(2024, 6, 3, 10)
+
+
+def _perfil(user_id):
+    return EnergyProfile(user_id, np.zeros((7, 24)), np.zeros((7, 24)))
+
+
+def _cache(max_size=2):
+    cache = EnergyProfileCache(max_size=max_size)
+    load = mock.patch.object(schedule_service.EnergyProfile, "load", side_effect=lambda db, user_id: _perfil(user_id))
+    return cache, load
+
+
+def test_lru_descarta_el_menos_usado():
+    cache, load = _cache(max_size=2)
+    a, b, c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    with load as loader:
+        cache.get(None, a)
+        cache.get(None, b)
+        cache.get(None, a)  # a pasa a ser el más reciente
+        cache.get(None, c)  # expulsa a b
+        cache.get(None, a)
+        cache.get(None, b)
+
+    assert [call.args[1] for call in loader.call_args_list] == [a, b, c, b]
+    info = cache.cache_info()
+    assert info["size"] == 2
+    assert info["evictions"] == 2
+    assert (info["hits"], info["misses"]) == (2, 4)
+
+
+def test_entrada_caducada_se_elimina_al_acceder():
+    cache, load = _cache()
+    user_id = uuid.uuid4()
+    with load, mock.patch.object(schedule_service.settings, "ENERGY_PROFILE_TTL_SECONDS", 60), \
+            mock.patch.object(schedule_service.time, "monotonic", side_effect=[0.0, 100.0]):
+        cache.get(None, user_id)
+        # Un registro sobre el perfil caducado no lo mantiene vivo
+        cache.apply(user_id, LUNES_10, "high", 1)
+
+    assert cache.cache_info()["size"] == 0
+
+
+def test_apply_sustituye_las_matrices():
+    cache, load = _cache()
+    user_id = uuid.uuid4()
+    with load:
+        perfil = cache.get(None, user_id)
+    antes = perfil.expected
+    copia = antes.copy()
+
+    cache.apply(user_id, LUNES_10, "high", 1)
+
+    # La matriz que tenía un lector no cambia; el perfil apunta a una nueva
+    assert perfil.expected is not antes
+    assert np.array_equal(antes, copia)
+    assert perfil.expected[0, 10] > antes[0, 10]
+    assert perfil.total_logs == 1
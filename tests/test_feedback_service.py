@@ -0,0 +1,65 @@
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import feedback_service
+from app.services.feedback_service import consumir_feedback
+
+Fila = namedtuple("Fila", "user_id task_id actual_priority at ai_feedback_id marca")
+
+USER_ID = uuid.uuid4()
+MARCA = datetime(2024, 6, 3, 12)
+
+
+def _session(filas, ai_marcados=0):
+    """Sesión simulada: la primera consulta devuelve el feedback; el update de ai_feedback, ai_marcados"""
+    db = mock.MagicMock()
+    lectura = mock.MagicMock()
+    lectura.all.return_value = filas
+    escritura = mock.MagicMock(rowcount=ai_marcados)
+    db.execute.side_effect = [lectura] + [escritura] * 3
+    return db
+
+
+def _consumir(db, hasta=None):
+    with mock.patch.object(feedback_service, "record_user_writes"):
+        return consumir_feedback(db, [USER_ID], hasta)
+
+
+def test_no_cuenta_las_filas_releidas_por_el_margen():
+    filas = [
+        # Releídas: anteriores a la marca pero dentro de WATERMARK_OVERLAP
+        Fila(USER_ID, uuid.uuid4(), "high", MARCA - timedelta(minutes=2), None, MARCA),
+        Fila(USER_ID, uuid.uuid4(), "low", MARCA, None, MARCA),
+        # Nueva
+        Fila(USER_ID, uuid.uuid4(), "medium", MARCA + timedelta(minutes=1), None, MARCA),
+    ]
+    assert _consumir(_session(filas)) == 1
+
+
+def test_sin_marca_previa_todo_es_nuevo():
+    filas = [Fila(USER_ID, uuid.uuid4(), "high", MARCA, None, None) for _ in range(3)]
+    assert _consumir(_session(filas)) == 3
+
+
+def test_ai_feedback_cuenta_solo_lo_que_marca_esta_transaccion():
+    filas = [
+        Fila(USER_ID, uuid.uuid4(), "high", MARCA, uuid.uuid4(), None),
+        Fila(USER_ID, uuid.uuid4(), "low", MARCA, uuid.uuid4(), None),
+    ]
+    # Otro reentrenamiento ya marcó uno de los dos
+    assert _consumir(_session(filas, ai_marcados=1)) == 1
+
+
+def test_lectura_retrasada_no_consume_feedback_posterior():
+    # hasta = instante de lectura del dataset: lo confirmado después sigue pendiente
+    hasta = MARCA + timedelta(seconds=30)
+    db = _session([])
+    assert _consumir(db, hasta) == 0
+
+    consulta = db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect())
+    assert list(consulta.params.values()).count(hasta) == 2
+    db.commit.assert_not_called()
@@ -0,0 +1,84 @@
+import itertools
+import random
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.services.planner import DayPlanner
+from app.services.schedule_service import EnergyProfile
+
+INICIO = datetime(2024, 6, 3, 9)
+SIN_LIMITE_MS = 10_000
+
+
+def _items(planner, tareas):
+    """tareas: (prioridad, minutos[, energía[, deadline]])"""
+    items = []
+    for i, tarea in enumerate(tareas):
+        priority, minutes, energy, deadline = (tuple(tarea) + (None, None))[:4]
+        items.append(planner.build_item(uuid.uuid4(), f"Tarea {i}", priority, minutes, energy, deadline))
+    return items
+
+
+def _optimo(tareas, capacity_minutes):
+    """Mejor prioridad total por fuerza bruta (sin deadlines ni energía)"""
+    best = 0.0
+    for r in range(len(tareas) + 1):
+        for subset in itertools.combinations(tareas, r):
+            if sum(minutes for _, minutes in subset) <= capacity_minutes:
+                best = max(best, sum(priority for priority, _ in subset))
+    return best
+
+
+def test_mochila_supera_al_voraz():
+    planner = DayPlanner(INICIO, 1)
+    # El voraz por densidad toma la de 40 min y no le cabe nada más
+    items = _items(planner, [(8.0, 40), (5.5, 30), (5.5, 30)])
+    plan = planner.plan(items, SIN_LIMITE_MS)
+
+    assert plan["algorithm"] == "dp"
+    assert plan["total_priority"] == 11.0
+    assert plan["unscheduled"] == [items[0].task_id]
+
+
+def test_mochila_alcanza_el_optimo():
+    rng = random.Random(7)
+    for _ in range(20):
+        tareas = [(round(rng.uniform(0.5, 7.5), 2), rng.choice([15, 30, 45, 60, 90])) for _ in range(9)]
+        planner = DayPlanner(INICIO, 2)
+        plan = planner.plan(_items(planner, tareas), SIN_LIMITE_MS)
+        assert plan["total_priority"] == round(_optimo(tareas, 120), 4)
+        assert plan["used_minutes"] <= 120
+
+
+def test_respeta_deadlines_y_no_solapa():
+    planner = DayPlanner(INICIO, 4)
+    deadline = INICIO + timedelta(minutes=60)
+    items = _items(planner, [(3.0, 60), (2.0, 30, "medium", deadline), (2.0, 30, "medium", deadline)])
+    plan = planner.plan(items, SIN_LIMITE_MS)
+
+    por_tarea = {entry["task_id"]: entry for entry in plan["scheduled"]}
+    for item in items[1:]:
+        assert por_tarea[item.task_id]["end"] <= deadline
+    tramos = sorted((entry["start"], entry["end"]) for entry in plan["scheduled"])
+    assert all(fin <= siguiente for (_, fin), (siguiente, _) in zip(tramos, tramos[1:]))
+
+
+def test_ventana_de_energia():
+    # Energía baja (1) de 9 a 11 y alta (3) después
+    counts = np.full((7, 24), 50.0)
+    sums = np.where(np.arange(24) < 11, 1.0, 3.0)[None, :] * counts
+    planner = DayPlanner(INICIO, 4, EnergyProfile(uuid.uuid4(), counts, sums))
+    items = _items(planner, [(5.0, 60, "high")])
+    plan = planner.plan(items, SIN_LIMITE_MS)
+
+    assert plan["scheduled"][0]["start"] >= INICIO.replace(hour=11)
+
+
+def test_sin_presupuesto_usa_el_voraz():
+    planner = DayPlanner(INICIO, 1)
+    plan = planner.plan(_items(planner, [(8.0, 40), (5.5, 30), (5.5, 30)]), 0)
+
+    assert plan["algorithm"] == "greedy"
+    assert plan["total_priority"] == 8.0
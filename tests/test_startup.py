@@ -0,0 +1,38 @@
+from unittest import mock
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import startup
+from app.startup import SchemaMismatchError, check_schema_revision
+
+
+def _check(retries: int, current, mode: str = "strict"):
+    with mock.patch.object(startup.settings, "SCHEMA_CHECK", mode), \
+            mock.patch.object(startup.settings, "SCHEMA_CHECK_RETRIES", retries), \
+            mock.patch.object(startup, "expected_revisions", return_value={"head"}), \
+            mock.patch.object(startup, "current_revisions", side_effect=current) as revisions, \
+            mock.patch.object(startup.time, "sleep"):
+        check_schema_revision(None)
+    return revisions
+
+
+@pytest.mark.parametrize("retries", [0, -1, 1])
+def test_sin_reintentos_hace_un_intento(retries):
+    assert _check(retries, [{"head"}]).call_count == 1
+
+
+def test_sin_reintentos_propaga_el_error_de_conexion():
+    error = OperationalError("SELECT 1", {}, Exception("connection refused"))
+    with pytest.raises(OperationalError):
+        _check(0, [error])
+
+
+def test_reintenta_hasta_conectar():
+    error = OperationalError("SELECT 1", {}, Exception("connection refused"))
+    assert _check(3, [error, error, {"head"}]).call_count == 3
+
+
+def test_revision_distinta_en_modo_estricto():
+    with pytest.raises(SchemaMismatchError):
+        _check(1, [{"old"}])
@@ -0,0 +1,82 @@
+import uuid
+from unittest import mock
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.database_models import Task
+from app.models.pydantic_models import TaskCreate
+from app.services import task_service
+from app.services.task_service import TaskService
+
+USER_ID = uuid.uuid4()
+
+
+def _session(owned_categories=()):
+    """Sesión simulada: flush asigna ids a las tareas añadidas, como haría el INSERT"""
+    db = mock.MagicMock()
+    added = []
+    db.add_all.side_effect = added.extend
+
+    def flush():
+        for task in added:
+            if task.id is None:
+                task.id = uuid.uuid4()
+
+    db.flush.side_effect = flush
+    db.query.return_value.filter.return_value.all.return_value = [(category_id,) for category_id in owned_categories]
+    return db
+
+
+def test_lote_en_una_sola_transaccion():
+    db = _session()
+    with mock.patch.object(task_service.DuplicateDetector, "index_task"), \
+            mock.patch.object(task_service.DuplicateDetector, "find_candidates", return_value=[]):
+        results = TaskService.create_tasks_batch(db, [TaskCreate(title="a"), TaskCreate(title="b")], USER_ID)
+
+    assert len(results) == 2
+    db.add_all.assert_called_once()
+    db.commit.assert_called_once()
+    db.rollback.assert_not_called()
+
+
+def test_duplicados_dentro_del_lote():
+    db = _session()
+    with mock.patch.object(task_service.DuplicateDetector, "index_task") as index_task, \
+            mock.patch.object(task_service.DuplicateDetector, "find_candidates", return_value=[]) as find:
+        results = TaskService.create_tasks_batch(
+            db, [TaskCreate(title="Comprar pan"), TaskCreate(title="Comprar pan!")], USER_ID
+        )
+
+    primera, segunda = (task for task, _ in results)
+    # Todas se indexan antes de buscar, y la búsqueda corre tras el flush de las bandas
+    assert index_task.call_count == 2
+    assert db.flush.call_count == 2
+    # La segunda puede encontrar a la primera; ninguna se encuentra a sí misma ni a las siguientes
+    assert find.call_args_list[0].kwargs["exclude_ids"] == [primera.id, segunda.id]
+    assert find.call_args_list[1].kwargs["exclude_ids"] == [segunda.id]
+
+
+def test_categoria_ajena_no_escribe_nada():
+    propia = uuid.uuid4()
+    db = _session(owned_categories=[propia])
+    tasks = [TaskCreate(title="a", category_id=propia), TaskCreate(title="b", category_id=uuid.uuid4())]
+
+    with pytest.raises(HTTPException) as error:
+        TaskService.create_tasks_batch(db, tasks, USER_ID)
+
+    assert error.value.status_code == 404
+    db.add_all.assert_not_called()
+    db.commit.assert_not_called()
+
+
+def test_error_a_mitad_de_lote_revierte_todo():
+    db = _session()
+    with mock.patch.object(task_service.DuplicateDetector, "index_task"), \
+            mock.patch.object(task_service.DuplicateDetector, "find_candidates", side_effect=[[], RuntimeError("boom")]):
+        with pytest.raises(RuntimeError):
+            TaskService.create_tasks_batch(db, [TaskCreate(title="a"), TaskCreate(title="b")], USER_ID)
+
+    db.commit.assert_not_called()
+    db.rollback.assert_called_once()
+    assert all(isinstance(task, Task) for task in db.add_all.call_args.args[0])
@@ -0,0 +1,21 @@
+import uuid
+from datetime import datetime
+from unittest import mock
+
+from app.services import training_service
+
+
+def test_lote_lee_dataset_y_hora_del_primario():
+    primario = mock.MagicMock(name="primario")
+    leido_en = datetime(2024, 6, 3, 12)
+    fila = {"user_id": uuid.uuid4()}
+    with mock.patch.object(training_service, "SessionLocal", return_value=primario), \
+            mock.patch.object(training_service, "instante_de_lectura", return_value=leido_en) as instante, \
+            mock.patch.object(training_service, "entrenar_usuario", return_value=fila) as entrenar:
+        filas, omitidos, errores, hasta = training_service._entrenar_lote([fila["user_id"]])
+
+    # La marca de consumo y el dataset salen de la misma sesión del primario
+    instante.assert_called_once_with(primario)
+    entrenar.assert_called_once_with(primario, fila["user_id"])
+    assert (filas, omitidos, errores, hasta) == ([fila], 0, 0, leido_en)
+    primario.close.assert_called_once()